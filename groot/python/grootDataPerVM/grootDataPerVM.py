@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 """Groot Object Report"""
 from pyhesity import *
-import psycopg2
+from pyhesity_groot import grootConnect
 from datetime import datetime
 import codecs
 
@@ -31,9 +31,9 @@ apiauth(vip, username, domain)
 
 print('Collecting report data...')
 
-# get groot connection info from cluster
-reporting = api('get', 'postgres', quiet=True)
-if 'errorCode' in reporting:
+# connect to groot (tries the next node if one is down)
+conn = grootConnect()
+if conn is None:
     print('statistics DB not found on %s' % vip)
     exit()
 
@@ -41,8 +41,6 @@ cluster = api('get', 'cluster')
 # limit query to numdays
 startUsecs = timeAgo(numdays, 'days')
 
-# connect to groot
-conn = psycopg2.connect(host=reporting[0]['nodeIp'], port=reporting[0]['port'], database="postgres", user=reporting[0]['defaultUsername'], password=reporting[0]['defaultPassword'])
 cur = conn.cursor()
 
 # sql query ----------------------------------------
@@ -1,12 +1,12 @@
 #!/usr/bin/env python
 """Groot Object Protection Report for python"""
 from pyhesity import *
-import psycopg2
+from pyhesity_report import ReportWriter
+from pyhesity_groot import grootConnect
 from datetime import datetime
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-import codecs
 
 # command line arguments
 import argparse
@@ -36,18 +36,14 @@ apiauth(vip, username, domain)
 
 print('Collecting report data...')
 
-# get groot connection info from cluster
-reporting = api('get', 'postgres', quiet=True)
-if 'errorCode' in reporting:
+# connect to groot (tries the next node if one is down)
+conn = grootConnect()
+if conn is None:
     print('statistics DB not found on %s' % vip)
     exit()
 
 cluster = api('get', 'cluster')
 
-parents = {}
-
-# connect to groot
-conn = psycopg2.connect(host=reporting[0]['nodeIp'], port=reporting[0]['port'], database="postgres", user=reporting[0]['defaultUsername'], password=reporting[0]['defaultPassword'])
 cur = conn.cursor()
 
 # limit query to numdays
@@ -59,22 +55,24 @@ jobInfo = {}
 sql_failures = """
 select
     reporting.protection_jobs.job_name,
-    start_time_usecs,
-    entity_name,
-    protection_job_run_entities.entity_id,
+    protection_job_run_entities.start_time_usecs,
+    leaf_entities.entity_name,
+    CASE WHEN parent.entity_name is null then reporting.registered_sources.source_name ELSE parent.entity_name END,
     env_name,
     status_name
 from
     reporting.protection_job_run_entities
     INNER JOIN reporting.leaf_entities on leaf_entities.entity_id = protection_job_run_entities.entity_id
+    LEFT JOIN reporting.leaf_entities as parent on leaf_entities.parent_id = parent.entity_id
+    LEFT JOIN reporting.registered_sources on reporting.registered_sources.source_id = reporting.protection_job_run_entities.parent_source_id
     INNER JOIN reporting.environment_types on environment_types.env_id = protection_job_run_entities.entity_env_type
     INNER JOIN reporting.protection_jobs on protection_jobs.job_id = protection_job_run_entities.job_id
     INNER JOIN reporting.job_run_status on job_run_status.status_id = protection_job_run_entities.status
 WHERE
-    start_time_usecs > %s
+    protection_job_run_entities.start_time_usecs > %s
 ORDER BY
-    start_time_usecs DESC,
-    entity_name;""" % startUsecs
+    protection_job_run_entities.start_time_usecs DESC,
+    leaf_entities.entity_name;""" % startUsecs
 
 title = 'Object Protection Report (%s)' % cluster['name']
 now = datetime.now()
@@ -208,60 +206,33 @@ html += '''</span>
     <th>Parent Name</th>
     <th>Type</th>
     <th>Status</th>
-</tr>'''
+</tr>
+'''
+
+outfileName = 'objectReport-%s.html' % cluster['name']
+report = ReportWriter(htmlFileName=outfileName)
+report.write(html)
 
 # get failures
 cur.execute(sql_failures, (startUsecs,))
 rows = cur.fetchall()
-for row in rows:
-    (jobName, startTimeUsecs, entityName, entity_id, envType, status) = row
-    parentname = ''
-    if entity_id in parents:
-        if parents[entity_id] != 'none':
-            parentname = parents[entity_id]
-    else:
-        entity = api('get', 'protectionSources/objects/%s' % entity_id, quiet=True)
-        if entity:
-            if 'parentId' in entity:
-                parent = api('get', 'protectionSources/objects/%s' % entity['parentId'], quiet=True)
-                if parent:
-                    parentname = parent['name']
-                    parents[entity_id] = parentname
-                else:
-                    parents[entity_id] = 'none'
-            else:
-                parents[entity_id] = 'none'
-        else:
-            parents[entity_id] = 'none'
 
-    html += '''<tr class="%s">
-            <td>%s</td>
-            <td>%s</td>
-            <td>%s</td>
-            <td>%s</td>
-            <td>%s</td>
-            <td>%s</td>
-        </tr>''' % (status, jobName, usecsToDate(startTimeUsecs), entityName, parentname, envType[1:], status)
+# parent names come from the query (parent entity, or the registered source)
+for row in rows:
+    (jobName, startTimeUsecs, entityName, parentname, envType, status) = row
+    if parentname is None:
+        parentname = ''
+    report.row([jobName, usecsToDate(startTimeUsecs), entityName, parentname, envType[1:], status], rowClass=status)
 
 cur.close()
 
-html += '''</table>
-</div>
-</body>
-</html>
-'''
-
-print('saving report as objectReport-%s.html' % cluster['name'])
-outfileName = 'objectReport-%s.html' % cluster['name']
-f = codecs.open(outfileName, 'w', 'utf-8')
-# f = open(outfileName, "w")
-f.write(html)
-f.close()
+report.close()
+print('saving report as %s' % outfileName)
 
 # email report
 if mailserver is not None:
     print('Sending report to %s...' % ', '.join(sendto))
-    emailhtml = MIMEText(html, 'html', 'utf-8')
+    emailhtml = MIMEText(report.readHtml(), 'html', 'utf-8')
     msg = MIMEMultipart('alternative')
     msg['Subject'] = title
     msg['From'] = sendfrom
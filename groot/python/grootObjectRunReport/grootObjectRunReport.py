@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 """Groot Object Run Report"""
 from pyhesity import *
-import psycopg2
+from pyhesity_groot import GrootRunner
 import codecs
 
 # command line arguments
@@ -16,6 +16,7 @@ parser.add_argument('-i', '--useApiKey', action='store_true')
 parser.add_argument('-pwd', '--password', type=str, default=None)
 parser.add_argument('-np', '--noprompt', action='store_true')
 parser.add_argument('-m', '--minutes', type=int, default=1440)
+parser.add_argument('-w', '--workers', type=int, default=4)
 
 args = parser.parse_args()
 
@@ -28,26 +29,31 @@ useApiKey = args.useApiKey
 password = args.password
 noprompt = args.noprompt
 minutes = args.minutes
+workers = args.workers
 
 # authenticate
 apiauth(vip=vip, username=username, domain=domain, password=password, useApiKey=useApiKey, helios=mcm, prompt=(not noprompt))
 
+# exit if not authenticated
+if apiconnected() is False:
+    print('authentication failed')
+    exit(1)
+
 print('Collecting report data...')
 
-# get groot connection info from cluster
-reporting = api('get', 'postgres', quiet=True)
-if 'errorCode' in reporting:
-    print('statistics DB not found on %s' % vip)
+# groot connections to the selected clusters (all helios connected clusters by default)
+if mcm or vip.lower() == 'helios.cohesity.com':
+    runner = GrootRunner(clusternames, workers=workers)
+else:
+    runner = GrootRunner(workers=workers)
+if len(runner.clusterNames()) == 0:
+    for clusterName in sorted(runner.errors):
+        print(runner.errors[clusterName])
     exit(1)
 
-cluster = api('get', 'cluster')
 # limit query to numdays
 startUsecs = timeAgo(minutes, 'minutes')
 
-# connect to groot
-conn = psycopg2.connect(host=reporting[0]['nodeIp'], port=reporting[0]['port'], database="postgres", user=reporting[0]['defaultUsername'], password=reporting[0]['defaultPassword'])
-cur = conn.cursor()
-
 # sql query ----------------------------------------
 sql_query = """
 select
@@ -107,18 +113,25 @@ where
 reporting.protection_job_run_entities.end_time_usecs >= %s
 order by to_timestamp(protection_job_run_entities.end_time_usecs  / 1000000) desc""" % startUsecs
 
-outfileName = 'objectRuns-%s.csv' % cluster['name']
+if len(runner.clusterNames()) == 1:
+    outfileName = 'objectRuns-%s.csv' % runner.clusterNames()[0]
+else:
+    outfileName = 'objectRuns.csv'
 f = codecs.open(outfileName, 'w', 'utf-8')
 
-cur.execute(sql_query)
-
-colnames = [desc[0] for desc in cur.description]
-f.write('%s\n' % ','.join(colnames))
-
-rows = cur.fetchall()
-for row in rows:
+# rows from all clusters (the query includes the cluster name)
+headerWritten = False
+for (clusterName, row) in runner.query(sql_query):
+    if headerWritten is False:
+        f.write('%s\n' % ','.join(runner.columns))
+        headerWritten = True
     f.write('%s\n' % ','.join([str(i) for i in row]))
+if headerWritten is False and runner.columns is not None:
+    f.write('%s\n' % ','.join(runner.columns))
+
+for clusterName in sorted(runner.errors):
+    print('%s: %s' % (clusterName, runner.errors[clusterName]))
 
-cur.close()
+runner.close()
 print('saving report as %s' % outfileName)
 f.close()
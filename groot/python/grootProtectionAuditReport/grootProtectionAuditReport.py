@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 """Groot Object Run Report"""
 from pyhesity import *
-import psycopg2
+from pyhesity_groot import GrootRunner, GrootSummary
 import codecs
 
 # command line arguments
@@ -10,36 +10,36 @@ parser = argparse.ArgumentParser()
 parser.add_argument('-v', '--vip', type=str, default='helios.cohesity.com')
 parser.add_argument('-u', '--username', type=str, default='helios')
 parser.add_argument('-d', '--domain', type=str, default='local')
-parser.add_argument('-c', '--clustername', type=str)
+parser.add_argument('-c', '--clustername', action='append', type=str)
 parser.add_argument('-mcm', '--mcm', action='store_true')
 parser.add_argument('-i', '--useApiKey', action='store_true')
 parser.add_argument('-pwd', '--password', type=str, default=None)
 parser.add_argument('-np', '--noprompt', action='store_true')
 parser.add_argument('-y', '--days', type=int, default=90)
+parser.add_argument('-w', '--workers', type=int, default=4)
+parser.add_argument('-ss', '--summarystore', action='store_true')
+parser.add_argument('-sf', '--storefile', type=str, default=None)
+parser.add_argument('-rs', '--refreshstore', action='store_true')
 
 args = parser.parse_args()
 
 vip = args.vip
 username = args.username
 domain = args.domain
-clustername = args.clustername
+clusternames = args.clustername
 mcm = args.mcm
 useApiKey = args.useApiKey
 password = args.password
 noprompt = args.noprompt
 days = args.days
+workers = args.workers
+summarystore = args.summarystore
+storefile = args.storefile
+refreshstore = args.refreshstore
 
 # authenticate
 apiauth(vip=vip, username=username, domain=domain, password=password, useApiKey=useApiKey, helios=mcm, prompt=(not noprompt))
 
-# if connected to helios or mcm, select access cluster
-if mcm or vip.lower() == 'helios.cohesity.com':
-    if clustername is not None:
-        heliosCluster(clustername)
-    else:
-        print('-clustername is required when connecting to Helios or MCM')
-        exit()
-
 # exit if not authenticated
 if apiconnected() is False:
     print('authentication failed')
@@ -47,17 +47,16 @@ if apiconnected() is False:
 
 print('Collecting report data...')
 
-# get groot connection info from cluster
-reporting = api('get', 'postgres', quiet=True)
-if 'errorCode' in reporting:
-    print('statistics DB not found on %s' % vip)
+# groot connections to the selected clusters (all helios connected clusters by default)
+if mcm or vip.lower() == 'helios.cohesity.com':
+    runner = GrootRunner(clusternames, workers=workers)
+else:
+    runner = GrootRunner(workers=workers)
+if len(runner.clusterNames()) == 0:
+    for clusterName in sorted(runner.errors):
+        print(runner.errors[clusterName])
     exit(1)
-
-cluster = api('get', 'cluster')
-
-# connect to groot
-conn = psycopg2.connect(host=reporting[0]['nodeIp'], port=reporting[0]['port'], database="postgres", user=reporting[0]['defaultUsername'], password=reporting[0]['defaultPassword'])
-cur = conn.cursor()
+multicluster = len(runner.clusterNames()) > 1
 
 # sql query ----------------------------------------
 sql_query = """
@@ -74,7 +73,7 @@ DISTINCT
     TO_CHAR((TRUNC(reporting.protection_job_run_entities.duration_usecs/6e+7, 2) || ' minute')::interval, 'HH24:MI:SS') as "Protection Duration",
     to_timestamp(reporting.protection_job_runs.snapshot_expiry_time_usecs / 1000000)  as "Local Snapshot Expiry",
     reporting.backup_schedule.retention_days as "Backup Retention Days",
-    reporting.protection_job_runs.error_msg as "Error Message - PG Level"
+    reporting.protection_job_runs.error_msg as "Error Message - PG Level"%s
 from reporting.protection_job_run_entities
     INNER JOIN reporting.registered_sources on reporting.registered_sources.source_id = reporting.protection_job_run_entities.parent_source_id
     INNER JOIN reporting.protection_jobs on protection_jobs.job_id = protection_job_run_entities.job_id
@@ -89,24 +88,107 @@ from reporting.protection_job_run_entities
     LEFT JOIN reporting.policy_replication_schedule on p1.id=policy_replication_schedule.policy_id
     LEFT JOIN reporting.protection_job_run_replication_entities on reporting.protection_job_run_entities.job_run_id = reporting.protection_job_run_replication_entities.job_run_id and reporting.protection_job_run_entities.job_id = reporting.protection_job_run_replication_entities.job_id and reporting.protection_job_run_entities.entity_id=reporting.protection_job_run_replication_entities.entity_id
 where
-to_timestamp(reporting.protection_job_run_entities.end_time_usecs / 1000000) BETWEEN (NOW() - INTERVAL '%s days') AND (NOW())
-order by to_timestamp(protection_job_run_entities.end_time_usecs  / 1000000) desc""" % days
-
-cur.execute(sql_query)
-rows = cur.fetchall()
-
-latestJobRunId = 0
-if len(rows) > 0:
-    latestJobRunId = rows[0][5]
-
-outfileName = 'protectionAuditReport-%s.tsv' % cluster['name']
+%s
+order by to_timestamp(protection_job_run_entities.end_time_usecs  / 1000000) desc"""
+
+sql_window = "to_timestamp(reporting.protection_job_run_entities.end_time_usecs / 1000000) BETWEEN (NOW() - INTERVAL '%s days') AND (NOW())" % days
+
+# raw values kept in the summary store (the run end time and the run values that can change later)
+sql_raw = """,
+    reporting.protection_job_run_entities.start_time_usecs,
+    reporting.protection_job_run_entities.end_time_usecs,
+    reporting.protection_job_run_entities.duration_usecs,
+    reporting.protection_job_run_entities.source_delta_size_bytes,
+    reporting.protection_job_runs.job_run_id,
+    reporting.protection_job_runs.end_time_usecs,
+    reporting.protection_job_runs.snapshot_expiry_time_usecs,
+    reporting.protection_job_runs.sla_violated"""
+
+# runs that ended at or after the stored runs, are still running, or changed since they were stored
+sql_since = "(COALESCE(reporting.protection_job_runs.end_time_usecs, 0) = 0 or reporting.protection_job_runs.end_time_usecs >= %s or reporting.protection_job_runs.job_run_id = ANY(%s::bigint[]))"
+
+# current values of the stored runs that can change after the run ends
+sql_runstates = """
+select job_run_id, snapshot_expiry_time_usecs, sla_violated
+from reporting.protection_job_runs
+where end_time_usecs >= %s and end_time_usecs < %s"""
+
+if multicluster:
+    outfileName = 'protectionAuditReport.tsv'
+else:
+    outfileName = 'protectionAuditReport-%s.tsv' % runner.clusterNames()[0]
 f = codecs.open(outfileName, 'w', 'utf-8')
-colnames = [desc[0] for desc in cur.description]
-f.write('%s\n' % '\t'.join(colnames))
 
-for row in rows:
-    f.write('%s\n' % '\t'.join([str(i) for i in row]))
 
-cur.close()
+def writeHeader(colnames):
+    if multicluster:
+        colnames = ['Cluster Name'] + colnames
+    f.write('%s\n' % '\t'.join(colnames))
+
+
+if summarystore:
+    # only query runs that are not in the local summary store yet, then report from the store
+    summary = GrootSummary(storefile)
+    syncStartUsecs = timeAgo(days + 1, 'days')
+    fromUsecs = {}
+    for clusterName in runner.clusterNames():
+        fromUsecs[clusterName] = summary.start('protectionAudit', clusterName, syncStartUsecs, refresh=refreshstore)
+    runStates = dict([(c, {}) for c in fromUsecs])
+    for (clusterName, row) in runner.query(sql_runstates, clusterParams=dict([(c, (syncStartUsecs, fromUsecs[c])) for c in fromUsecs])):
+        runStates[clusterName][row[0]] = '%s|%s' % (row[1], row[2])
+    staleRuns = dict([(c, [int(r) for r in summary.staleRuns('protectionAudit', c, runStates[c])]) for c in fromUsecs])
+    for (clusterName, row) in runner.query(sql_query % (sql_raw, sql_since), clusterParams=dict([(c, (fromUsecs[c], staleRuns[c])) for c in fromUsecs])):
+        (startTimeUsecs, endTimeUsecs, durationUsecs, dataRead, runId, runEndUsecs, expiryUsecs, slaViolated) = row[-8:]
+        summary.add('protectionAudit', clusterName, {'runId': runId, 'runEndUsecs': runEndUsecs, 'runState': '%s|%s' % (expiryUsecs, slaViolated),
+                                                     'startTimeUsecs': startTimeUsecs, 'endTimeUsecs': endTimeUsecs, 'jobName': row[4], 'objectName': row[0],
+                                                     'status': row[3], 'bytes': dataRead, 'durationUsecs': durationUsecs, 'row': list(row[:-8])})
+    for clusterName in runner.clusterNames():
+        if clusterName in runner.errors:
+            # stored rows of this cluster may be incomplete, start over next time
+            summary.clear('protectionAudit', clusterName)
+        else:
+            summary.finish('protectionAudit', clusterName, syncStartUsecs)
+    if runner.columns is not None:
+        writeHeader(runner.columns[:-8])
+    for clusterName in runner.clusterNames():
+        for row in summary.rows('protectionAudit', clusterName, timeAgo(days, 'days'), by='endTimeUsecs'):
+            if multicluster:
+                row = [clusterName] + row
+            f.write('%s\n' % '\t'.join([str(i) for i in row]))
+else:
+    # rows from all clusters (tagged with the cluster name when there is more than one)
+    headerWritten = False
+    for (clusterName, row) in runner.query(sql_query % ('', sql_window)):
+        if headerWritten is False:
+            writeHeader(runner.columns)
+            headerWritten = True
+        if multicluster:
+            row = (clusterName,) + tuple(row)
+        f.write('%s\n' % '\t'.join([str(i) for i in row]))
+    if headerWritten is False and runner.columns is not None:
+        writeHeader(runner.columns)
+
+for clusterName in sorted(runner.errors):
+    print('%s: %s' % (clusterName, runner.errors[clusterName]))
+
+runner.close()
 print('saving report as %s' % outfileName)
 f.close()
+
+# daily rollups from the summary store
+if summarystore:
+    dailyfileName = outfileName.replace('.tsv', '-daily.tsv')
+    print('saving daily summary as %s' % dailyfileName)
+    f = codecs.open(dailyfileName, 'w', 'utf-8')
+    headings = ['Date', 'Protection Group Name', 'Object Name', 'Object Status', 'Runs', 'Data Read (MiB)', 'Duration (Min)']
+    if multicluster:
+        headings = ['Cluster Name'] + headings
+    f.write('%s\n' % '\t'.join(headings))
+    for clusterName in runner.clusterNames():
+        for day in summary.daily('protectionAudit', clusterName, usecsToDate(timeAgo(days, 'days'), '%Y-%m-%d')):
+            row = [day['day'], day['jobName'], day['objectName'], day['status'], day['runs'], round(day['bytes'] / (1024 * 1024.0), 2), round(day['durationUsecs'] / 60000000.0, 1)]
+            if multicluster:
+                row = [clusterName] + row
+            f.write('%s\n' % '\t'.join([str(i) for i in row]))
+    f.close()
+    summary.close()
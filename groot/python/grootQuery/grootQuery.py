@@ -1,8 +1,10 @@
 #!/usr/bin/env python
 """Groot Object Run Report"""
 from pyhesity import *
-import psycopg2
+from pyhesity_groot import grootConnect
 import codecs
+import gzip
+import itertools
 
 # command line arguments
 import argparse
@@ -17,6 +19,10 @@ parser.add_argument('-pwd', '--password', type=str, default=None)
 parser.add_argument('-np', '--noprompt', action='store_true')
 parser.add_argument('-q', '--queryfile', type=str, required=True)
 parser.add_argument('-o', '--outfile', type=str, required=True)
+parser.add_argument('-st', '--stream', action='store_true')
+parser.add_argument('-is', '--itersize', type=int, default=10000)
+parser.add_argument('-cp', '--copy', action='store_true')
+parser.add_argument('-gz', '--gzip', action='store_true')
 
 args = parser.parse_args()
 
@@ -30,6 +36,10 @@ password = args.password
 noprompt = args.noprompt
 queryfile = args.queryfile
 outfile = args.outfile
+stream = args.stream
+itersize = args.itersize
+copy = args.copy
+gzipoutput = args.gzip
 
 # authenticate
 apiauth(vip=vip, username=username, domain=domain, password=password, useApiKey=useApiKey, helios=mcm, prompt=(not noprompt))
@@ -49,9 +59,9 @@ if apiconnected() is False:
 
 print('Collecting report data...')
 
-# get groot connection info from cluster
-reporting = api('get', 'postgres', quiet=True)
-if 'errorCode' in reporting:
+# connect to groot (tries the next node if one is down)
+conn = grootConnect()
+if conn is None:
     print('statistics DB not found on %s' % vip)
     exit(1)
 
@@ -63,20 +73,47 @@ except Exception:
     print('unable to open sql file')
     exit(1)
 
-# connect to groot
-conn = psycopg2.connect(host=reporting[0]['nodeIp'], port=reporting[0]['port'], database="postgres", user=reporting[0]['defaultUsername'], password=reporting[0]['defaultPassword'])
-cur = conn.cursor()
+if gzipoutput and not outfile.lower().endswith('.gz'):
+    outfile = '%s.gz' % outfile
 
-cur.execute(sql_query)
-rows = cur.fetchall()
+if copy:
+    # COPY streams the result straight from postgres into the output file
+    conn.set_client_encoding('UTF8')
+    sql_query = sql_query.strip().rstrip(';')
+    if gzipoutput:
+        f = gzip.open(outfile, 'wb')
+    else:
+        f = open(outfile, 'wb')
+    cur = conn.cursor()
+    cur.copy_expert("COPY (%s) TO STDOUT WITH CSV HEADER DELIMITER E'\\t'" % sql_query, f)
+else:
+    if gzipoutput:
+        f = codecs.getwriter('utf-8')(gzip.open(outfile, 'wb'))
+    else:
+        f = codecs.open(outfile, 'w', 'utf-8')
+    if stream:
+        # named (server side) cursor, fetches itersize rows at a time
+        sql_query = sql_query.strip().rstrip(';')
+        cur = conn.cursor(name='grootquery')
+        cur.itersize = itersize
+        cur.execute(sql_query)
+        # column names are only known after the first fetch
+        rows = iter(cur)
+        firstrow = next(rows, None)
+        if firstrow is not None:
+            rows = itertools.chain([firstrow], rows)
+    else:
+        cur = conn.cursor()
+        cur.execute(sql_query)
+        rows = cur.fetchall()
 
-f = codecs.open(outfile, 'w', 'utf-8')
-colnames = [desc[0] for desc in cur.description]
-f.write('%s\n' % '\t'.join(colnames))
+    colnames = [desc[0] for desc in cur.description]
+    f.write('%s\n' % '\t'.join(colnames))
 
-for row in rows:
-    f.write('%s\n' % '\t'.join([str(i) for i in row]))
+    for row in rows:
+        f.write('%s\n' % '\t'.join([str(i) for i in row]))
 
 cur.close()
+conn.close()
 print('saving report as %s' % outfile)
 f.close()
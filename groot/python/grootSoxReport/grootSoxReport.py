@@ -2,7 +2,7 @@
 """Groot Object Protection Report for python"""
 from pyhesity import *
 from fnmatch import fnmatch
-import psycopg2
+from pyhesity_groot import grootConnect, GrootSummary
 from datetime import datetime
 import codecs
 import smtplib
@@ -22,6 +22,9 @@ parser.add_argument('-s', '--mailserver', type=str)
 parser.add_argument('-p', '--mailport', type=int, default=25)
 parser.add_argument('-t', '--sendto', action='append', type=str)
 parser.add_argument('-r', '--sendfrom', type=str)
+parser.add_argument('-ss', '--summarystore', action='store_true')
+parser.add_argument('-sf', '--storefile', type=str, default=None)
+parser.add_argument('-rs', '--refreshstore', action='store_true')
 args = parser.parse_args()
 
 vip = args.vip
@@ -33,15 +36,18 @@ mailserver = args.mailserver
 mailport = args.mailport
 sendto = args.sendto
 sendfrom = args.sendfrom
+summarystore = args.summarystore
+storefile = args.storefile
+refreshstore = args.refreshstore
 
 # authenticate
 apiauth(vip, username, domain)
 
 print('Collecting report data...')
 
-# get groot connection info from cluster
-reporting = api('get', 'postgres', quiet=True)
-if 'errorCode' in reporting:
+# connect to groot (tries the next node if one is down)
+conn = grootConnect()
+if conn is None:
     print('statistics DB not found on %s' % vip)
     exit()
 
@@ -49,8 +55,6 @@ cluster = api('get', 'cluster')
 # limit query to numdays
 startUsecs = timeAgo(numdays, 'days')
 
-# connect to groot
-conn = psycopg2.connect(host=reporting[0]['nodeIp'], port=reporting[0]['port'], database="postgres", user=reporting[0]['defaultUsername'], password=reporting[0]['defaultPassword'])
 cur = conn.cursor()
 
 # sql query ----------------------------------------
@@ -82,7 +86,7 @@ select
   CASE
     WHEN pjr.sla_violated is True then 'Yes'
     ELSE 'No'
-  END as "SLA Violation"
+  END as "SLA Violation"%s
 from
   reporting.protection_job_run_entities jre,
   reporting.protection_jobs pj,
@@ -101,9 +105,28 @@ where
   and jre.job_run_id = pjr.job_run_id
   and jre.parent_source_id = rs.source_id
   and pj.policy_id = ppolicy.id
-  and jre.start_time_usecs > %s
+  and %s
 order by
-  to_timestamp(jre.start_time_usecs / 1000000) desc;""" % startUsecs
+  to_timestamp(jre.start_time_usecs / 1000000) desc;"""
+
+# raw values kept in the summary store (the run end time and the run values that can change later)
+sql_raw = """,
+  jre.start_time_usecs,
+  jre.end_time_usecs,
+  jre.duration_usecs,
+  pjr.job_run_id,
+  pjr.end_time_usecs,
+  pjr.snapshot_expiry_time_usecs,
+  pjr.sla_violated"""
+
+# runs that ended at or after the stored runs, are still running, or changed since they were stored
+sql_since = "(COALESCE(pjr.end_time_usecs, 0) = 0 or pjr.end_time_usecs >= %s or pjr.job_run_id = ANY(%s::bigint[]))"
+
+# current values of the stored runs that can change after the run ends
+sql_runstates = """
+select job_run_id, snapshot_expiry_time_usecs, sla_violated
+from reporting.protection_job_runs
+where end_time_usecs >= %s and end_time_usecs < %s"""
 
 now = datetime.now()
 date = now.strftime("%m/%d/%Y %H:%M:%S")
@@ -111,8 +134,25 @@ date = now.strftime("%m/%d/%Y %H:%M:%S")
 csv = 'Job Name,Object Name,Source Type,Source Name,Job Status,Policy Name,Full/Incremental,Data Read,Duration,Start Time,End Time,Expiry Date,SLA Violation\n'
 
 # get failures
-cur.execute(sql_query)
-rows = cur.fetchall()
+if summarystore:
+    # only query runs that are not in the local summary store yet
+    summary = GrootSummary(storefile)
+    fromUsecs = summary.start('soxReport', cluster['name'], startUsecs + 1, refresh=refreshstore)
+    staleRuns = []
+    if fromUsecs > startUsecs + 1:
+        cur.execute(sql_runstates, (startUsecs + 1, fromUsecs))
+        staleRuns = summary.staleRuns('soxReport', cluster['name'], dict((r[0], '%s|%s' % (r[1], r[2])) for r in cur))
+    cur.execute(sql_query % (sql_raw, sql_since), (fromUsecs, [int(r) for r in staleRuns]))
+    for row in cur:
+        (startTimeUsecs, endTimeUsecs, durationUsecs, runId, runEndUsecs, expiryUsecs, slaViolated) = row[14:]
+        summary.add('soxReport', cluster['name'], {'runId': runId, 'runEndUsecs': runEndUsecs, 'runState': '%s|%s' % (expiryUsecs, slaViolated),
+                                                   'startTimeUsecs': startTimeUsecs, 'endTimeUsecs': endTimeUsecs, 'jobName': row[0], 'objectName': row[1],
+                                                   'status': row[4], 'bytes': row[8], 'durationUsecs': durationUsecs, 'row': list(row[:14])})
+    summary.finish('soxReport', cluster['name'], startUsecs + 1)
+    rows = summary.rows('soxReport', cluster['name'], startUsecs + 1)
+else:
+    cur.execute(sql_query % ('', 'jre.start_time_usecs > %s' % startUsecs))
+    rows = cur.fetchall()
 for row in rows:
     (jobName, objectName, sourceType, sourceName, jobStatus, taskType, policyName, fullincr, dataread, duration, startTime, endTime, expiryDate, slaviolated) = row
     if namefilter is None or fnmatch(objectName.lower(), namefilter.lower()) or fnmatch(sourceName.lower(), namefilter.lower()) or fnmatch(jobName.lower(), namefilter.lower()):
@@ -133,6 +173,18 @@ f = codecs.open(outfileName, 'w', 'utf-8')
 f.write(csv)
 f.close()
 
+# daily rollups from the summary store
+if summarystore:
+    dailyfileName = outfileName.replace('.csv', '-daily.csv')
+    print('saving daily summary as %s' % dailyfileName)
+    f = codecs.open(dailyfileName, 'w', 'utf-8')
+    f.write('Date,Job Name,Object Name,Job Status,Runs,Data Read,Duration (Min)\n')
+    for day in summary.daily('soxReport', cluster['name'], usecsToDate(startUsecs, '%Y-%m-%d')):
+        if namefilter is None or fnmatch(day['objectName'].lower(), namefilter.lower()) or fnmatch(day['jobName'].lower(), namefilter.lower()):
+            f.write('%s,%s,%s,%s,%s,%s,%s\n' % (day['day'], day['jobName'], day['objectName'], day['status'], day['runs'], "%s MB" % (day['bytes'] / (1024 * 1024)), round(day['durationUsecs'] / 60000000.0, 1)))
+    f.close()
+    summary.close()
+
 # email report
 if mailserver is not None:
     print('Sending report to %s...' % ', '.join(sendto))
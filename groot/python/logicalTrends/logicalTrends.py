@@ -1,8 +1,10 @@
 #!/usr/bin/env python
 """Logcal Trends for python"""
 from pyhesity import *
-import psycopg2
-from datetime import datetime
+from pyhesity_groot import grootConnect
+import json
+import os
+from datetime import datetime, timedelta
 
 # command line arguments
 import argparse
@@ -11,6 +13,7 @@ parser.add_argument('-v', '--vip', type=str, required=True)
 parser.add_argument('-u', '--username', type=str, required=True)
 parser.add_argument('-d', '--domain', type=str, default='local')
 parser.add_argument('-n', '--units', type=str, choices=['MB', 'GB', 'TB', 'mb', 'gb', 'tb'], default='GB')
+parser.add_argument('-inc', '--incremental', action='store_true')
 
 args = parser.parse_args()
 
@@ -18,6 +21,7 @@ vip = args.vip
 username = args.username
 domain = args.domain
 units = args.units
+incremental = args.incremental
 
 multiplier = 1024 * 1024 * 1024
 if units.lower() == 'mb':
@@ -30,52 +34,88 @@ apiauth(vip, username, domain)
 
 print('Collecting report data...')
 
-# get groot connection info from cluster
-reporting = api('get', 'postgres', quiet=True)
-if 'errorCode' in reporting:
+# connect to groot (tries the next node if one is down)
+conn = grootConnect()
+if conn is None:
     print('statistics DB not found on %s' % vip)
     exit()
 
-# connect to groot
-conn = psycopg2.connect(host=reporting[0]['nodeIp'], port=reporting[0]['port'], database="postgres", user=reporting[0]['defaultUsername'], password=reporting[0]['defaultPassword'])
 cur = conn.cursor()
 
-# logical trend sql query
-logical_trend = """
-select
-  start_time_usecs,
-  source_logical_size_bytes,
-  protection_job_run_entities.entity_id,
-  env_name
-from
-  reporting.protection_job_run_entities
-  INNER JOIN reporting.leaf_entities on leaf_entities.entity_id = protection_job_run_entities.entity_id
-  INNER JOIN reporting.environment_types on environment_types.env_id = protection_job_run_entities.entity_env_type
-WHERE
-  start_time_usecs > 0
-ORDER BY
-  start_time_usecs;"""
-
-# get records
-cur.execute(logical_trend)
-rows = cur.fetchall()
-
-# data dictionary
+# daily totals from previous runs (logicalBytes and entity count per day and environment)
 trend = {}
-trendTypes = []
-
-for row in rows:
-    (startTimeUsecs, logicalBytes, entityId, entityType) = row
-    startDate = datetime.strptime(usecsToDate(startTimeUsecs), '%Y-%m-%d %H:%M:%S').strftime("%Y-%m-%d")
-    if startDate not in trend:
-        trend[startDate] = {}
-    if entityType not in trend[startDate]:
-        trend[startDate][entityType] = {"logicalBytes": 0, "entities": []}
-    if entityType not in trendTypes:
-        trendTypes.append(entityType)
-    if entityId not in trend[startDate][entityType]['entities']:
-        trend[startDate][entityType]['logicalBytes'] += logicalBytes
-        trend[startDate][entityType]['entities'].append(entityId)
+trendfile = 'logicalTrends-%s.json' % vip
+if incremental and os.path.exists(trendfile):
+    f = open(trendfile, 'r')
+    trend = json.load(f)
+    f.close()
+
+# range of run start times
+cur.execute("select min(start_time_usecs), max(start_time_usecs) from reporting.protection_job_run_entities where start_time_usecs > 0;")
+(firstUsecs, lastUsecs) = cur.fetchone()
+
+# only aggregate days that have not been seen (the last stored day may have been incomplete)
+if len(trend) > 0:
+    lastDay = max(trend.keys())
+    del trend[lastDay]
+    windowStart = datetime.strptime(lastDay, '%Y-%m-%d')
+elif firstUsecs is not None:
+    windowStart = datetime.strptime(usecsToDate(firstUsecs, '%Y-%m-%d'), '%Y-%m-%d')
+
+if lastUsecs is not None and dateToUsecs(windowStart) <= lastUsecs:
+    # local midnights, so days match usecsToDate
+    days = []
+    midnights = []
+    day = windowStart
+    while dateToUsecs(day) <= lastUsecs:
+        days.append(day.strftime('%Y-%m-%d'))
+        midnights.append(dateToUsecs(day))
+        day = day + timedelta(days=1)
+    midnights.append(dateToUsecs(day))
+
+    # logical size of each entity's first run of the day, summed per day and environment
+    logical_trend = """
+    select
+      day,
+      env_name,
+      count(*),
+      sum(source_logical_size_bytes)
+    from (
+      select distinct on (day, env_name, protection_job_run_entities.entity_id)
+        width_bucket(start_time_usecs, %s::bigint[]) as day,
+        env_name,
+        source_logical_size_bytes
+      from
+        reporting.protection_job_run_entities
+        INNER JOIN reporting.leaf_entities on leaf_entities.entity_id = protection_job_run_entities.entity_id
+        INNER JOIN reporting.environment_types on environment_types.env_id = protection_job_run_entities.entity_env_type
+      WHERE
+        start_time_usecs >= %s and start_time_usecs < %s
+      ORDER BY
+        day, env_name, protection_job_run_entities.entity_id, start_time_usecs
+    ) as firstruns
+    GROUP BY
+      day, env_name;"""
+
+    # get records
+    cur.execute(logical_trend, (midnights, midnights[0], midnights[-1]))
+    for (day, entityType, itemCount, logicalBytes) in cur.fetchall():
+        startDate = days[day - 1]
+        if startDate not in trend:
+            trend[startDate] = {}
+        trend[startDate][entityType] = {"logicalBytes": int(logicalBytes or 0), "count": itemCount}
+
+cur.close()
+conn.close()
+
+if incremental:
+    f = open(trendfile, 'w')
+    json.dump(trend, f)
+    f.close()
+
+trendTypes = set()
+for startDate in trend:
+    trendTypes.update(trend[startDate].keys())
 
 # output to csv
 f = open('logicalTrends-%s.csv' % vip, 'w')
@@ -88,9 +128,9 @@ for startDate in sorted(trend.keys()):
     theseLogical = []
     theseCount = []
     for entityType in sorted(trendTypes):
-        entityData = trend[startDate].get(entityType, {"logicalBytes": 0, "entities": []})
+        entityData = trend[startDate].get(entityType, {"logicalBytes": 0, "count": 0})
         logical = round(entityData['logicalBytes'] / multiplier, 2)
-        itemCount = len(entityData['entities'])
+        itemCount = entityData['count']
         print('  %s (%s)  %s' % (entityType, itemCount, logical))
         theseLogical.append(str(logical))
         theseCount.append(str(itemCount))
@@ -154,13 +154,9 @@ apiauth(vip=vip, username=username, domain=domain, password=password, useApiKey=
 for sourceserver in sourceservers:
     print('\n============================\n %s\n============================\n' % sourceserver)
 
-    search = api('get', '/searchvms?entityTypes=kView&entityTypes=kAcropolis&entityTypes=kAWS&entityTypes=kAWSNative&entityTypes=kAWSSnapshotManager&entityTypes=kAzure&entityTypes=kAzureNative&entityTypes=kFlashBlade&entityTypes=kGCP&entityTypes=kGenericNas&entityTypes=kHyperV&entityTypes=kHyperVVSS&entityTypes=kIsilon&entityTypes=kKVM&entityTypes=kNetapp&entityTypes=kPhysical&entityTypes=kVMware&vmName=%s' % sourceserver)
+    search = apiStream('get', '/searchvms?entityTypes=kView&entityTypes=kAcropolis&entityTypes=kAWS&entityTypes=kAWSNative&entityTypes=kAWSSnapshotManager&entityTypes=kAzure&entityTypes=kAzureNative&entityTypes=kFlashBlade&entityTypes=kGCP&entityTypes=kGenericNas&entityTypes=kHyperV&entityTypes=kHyperVVSS&entityTypes=kIsilon&entityTypes=kKVM&entityTypes=kNetapp&entityTypes=kPhysical&entityTypes=kVMware&vmName=%s' % sourceserver, 'vms[*]')
 
-    if 'vms' not in search:
-        print('no backups found for %s' % sourceserver)
-        continue
-
-    searchResults = [vm for vm in search['vms'] if vm['vmDocument']['objectName'].lower() == sourceserver.lower()]
+    searchResults = [vm for vm in search if vm['vmDocument']['objectName'].lower() == sourceserver.lower()]
 
     if len(searchResults) == 0:
         print('no backups found for %s' % sourceserver)
@@ -83,72 +83,65 @@ print("Searching for old snapshots...")
 for job in sorted(jobs, key=lambda job: job['name'].lower()):
     if len(jobnames) == 0 or job['name'].lower() in [j.lower() for j in jobnames]:
         print('\n%s' % job['name'])
-        endUsecs = nowUsecs
-        while 1:
-            runs = api('get', 'protectionRuns?jobId=%s&numRuns=%s&endTimeUsecs=%s&excludeTasks=true' % (job['id'], numruns, endUsecs))
-            if len(runs) > 0:
-                endUsecs = runs[-1]['backupRun']['stats']['startTimeUsecs'] - 1
-            else:
-                break
-            for run in runs:
-                startdate = usecsToDate(run['copyRun'][0]['runStartTimeUsecs'])
-                startdateusecs = run['copyRun'][0]['runStartTimeUsecs']
-
-                # check for replication
-                replicated = False
-                for copyRun in run['copyRun']:
-                    if copyRun['target']['type'] == 'kRemote':
-                        if copyRun['status'] == 'kSuccess':
-                            if replicationtarget is None or copyRun['target']['replicationTarget']['clusterName'].lower() == replicationtarget.lower():
-                                replicated = True
-
-                # check for archive
-                archived = False
-                for copyRun in run['copyRun']:
-                    if copyRun['target']['type'] == 'kArchival':
-                        if copyRun['status'] == 'kSuccess':
-                            if archivetarget is None or copyRun['target']['archivalTarget']['vaultName'].lower() == archivetarget.lower():
-                                archived = True
-
-                if startdateusecs < timeAgo(daystokeep, 'days') and run['backupRun']['snapshotsDeleted'] is False:
-                    skip = False
-                    if replicated is False and confirmreplication is True:
-                        skip = True
-                        if replicationtarget is not None:
-                            print("    Skipping %s (not replicated to %s)" % (startdate, replicationtarget))
-                        else:
-                            print("    Skipping %s (not replicated)" % startdate)
-                    elif archived is False and confirmarchive is True:
-                        skip = True
-                        if archivetarget is not None:
-                            print("    Skipping %s (not archived to %s)" % (startdate, archivetarget))
-                        else:
-                            print("    Skipping %s (not archived)" % startdate)
-                    if skip is False:
-                        if expire:
-                            exactRun = api('get', '/backupjobruns?exactMatchStartTimeUsecs=%s&id=%s' % (startdateusecs, job['id']))
-                            jobUid = exactRun[0]['backupJobRuns']['protectionRuns'][0]['backupRun']['base']['jobUid']
-                            expireRun = {
-                                "jobRuns":
-                                    [
-                                        {
-                                            "expiryTimeUsecs": 0,
-                                            "jobUid": {
-                                                "clusterId": jobUid['clusterId'],
-                                                "clusterIncarnationId": jobUid['clusterIncarnationId'],
-                                                "id": jobUid['objectId'],
-                                            },
-                                            "runStartTimeUsecs": startdateusecs,
-                                            "copyRunTargets": [
-                                                {
-                                                    "daysToKeep": 0,
-                                                    "type": "kLocal",
-                                                }
-                                            ]
-                                        }
-                                    ]
-                            }
-                            print("    Expiring %s" % startdate)
-                            api('put', 'protectionRuns', expireRun)
-                        else:
-                            print("    %s" % startdate)
+        for run in iterRuns(job['id'], endTimeUsecs=nowUsecs, numRuns=numruns, params='&excludeTasks=true'):
+            startdate = usecsToDate(run['copyRun'][0]['runStartTimeUsecs'])
+            startdateusecs = run['copyRun'][0]['runStartTimeUsecs']
+
+            # check for replication
+            replicated = False
+            for copyRun in run['copyRun']:
+                if copyRun['target']['type'] == 'kRemote':
+                    if copyRun['status'] == 'kSuccess':
+                        if replicationtarget is None or copyRun['target']['replicationTarget']['clusterName'].lower() == replicationtarget.lower():
+                            replicated = True
+
+            # check for archive
+            archived = False
+            for copyRun in run['copyRun']:
+                if copyRun['target']['type'] == 'kArchival':
+                    if copyRun['status'] == 'kSuccess':
+                        if archivetarget is None or copyRun['target']['archivalTarget']['vaultName'].lower() == archivetarget.lower():
+                            archived = True
+
+            if startdateusecs < timeAgo(daystokeep, 'days') and run['backupRun']['snapshotsDeleted'] is False:
+                skip = False
+                if replicated is False and confirmreplication is True:
+                    skip = True
+                    if replicationtarget is not None:
+                        print("    Skipping %s (not replicated to %s)" % (startdate, replicationtarget))
+                    else:
+                        print("    Skipping %s (not replicated)" % startdate)
+                elif archived is False and confirmarchive is True:
+                    skip = True
+                    if archivetarget is not None:
+                        print("    Skipping %s (not archived to %s)" % (startdate, archivetarget))
+                    else:
+                        print("    Skipping %s (not archived)" % startdate)
+                if skip is False:
+                    if expire:
+                        exactRun = api('get', '/backupjobruns?exactMatchStartTimeUsecs=%s&id=%s' % (startdateusecs, job['id']))
+                        jobUid = exactRun[0]['backupJobRuns']['protectionRuns'][0]['backupRun']['base']['jobUid']
+                        expireRun = {
+                            "jobRuns":
+                                [
+                                    {
+                                        "expiryTimeUsecs": 0,
+                                        "jobUid": {
+                                            "clusterId": jobUid['clusterId'],
+                                            "clusterIncarnationId": jobUid['clusterIncarnationId'],
+                                            "id": jobUid['objectId'],
+                                        },
+                                        "runStartTimeUsecs": startdateusecs,
+                                        "copyRunTargets": [
+                                            {
+                                                "daysToKeep": 0,
+                                                "type": "kLocal",
+                                            }
+                                        ]
+                                    }
+                                ]
+                        }
+                        print("    Expiring %s" % startdate)
+                        api('put', 'protectionRuns', expireRun)
+                    else:
+                        print("    %s" % startdate)
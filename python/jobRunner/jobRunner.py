@@ -93,11 +93,12 @@ runNowTask = {
 # wait for any of the jobs are currently running
 print("Checking for running jobs...")
 jobRunning = False
+protectionJobs = api('get', 'protectionJobs')
 
 for jobName in jobs:
 
     # find job
-    job = [job for job in api('get', 'protectionJobs') if job['name'].lower() == jobName.lower()]
+    job = [job for job in protectionJobs if job['name'].lower() == jobName.lower()]
     if not job:
         print("Job '%s' not found" % jobName)
     else:
@@ -129,7 +130,7 @@ if jobRunning is False:
         f = open(triggerfilepath, 'r')
         jobstate = f.read()
         if jobstate == 'not started':
-            job = [job for job in api('get', 'protectionJobs') if job['name'].lower() == jobName.lower()]
+            job = [job for job in protectionJobs if job['name'].lower() == jobName.lower()]
             if not job:
                 print("Job '%s' not found" % jobName)
             else:
@@ -146,7 +147,7 @@ if jobRunning is False:
         exit()
 
     # find job
-    job = [thisjob for thisjob in api('get', 'protectionJobs') if thisjob['name'].lower() == jobName.lower()]
+    job = [thisjob for thisjob in protectionJobs if thisjob['name'].lower() == jobName.lower()]
     if not job:
         print("Job '%s' not found" % jobName)
     else:
@@ -34,15 +34,8 @@ nowUsecs = dateToUsecs(now.strftime("%Y-%m-%d %H:%M:%S"))
 
 for job in sorted(api('get', 'protectionJobs'), key=lambda job: job['name'].lower()):
     if jobname is None or jobname.lower() == job['name'].lower():
-        endUsecs = nowUsecs
-        while(1):
-            runs = [r for r in api('get', 'protectionRuns?jobId=%s&numRuns=%s&endTimeUsecs=%s&excludeTasks=true&excludeNonRestoreableRuns=true' % (job['id'], numruns, endUsecs)) if r['backupRun']['stats']['endTimeUsecs'] < endUsecs]
-            if len(runs) > 0:
-                endUsecs = runs[-1]['backupRun']['stats']['startTimeUsecs']
-            else:
-                break
-            for run in runs:
-                startdate = usecsToDate(run['copyRun'][0]['runStartTimeUsecs'])
-                startdateusecs = run['copyRun'][0]['runStartTimeUsecs']
-                if startdateusecs < timeAgo(olderthan, 'days') and run['backupRun']['snapshotsDeleted'] is False:
-                    print("%s: %s (%s)" % (startdate, job['name'], run['backupRun']['runType'][1:]))
+        for run in iterRuns(job['id'], endTimeUsecs=nowUsecs, numRuns=numruns, params='&excludeTasks=true&excludeNonRestoreableRuns=true'):
+            startdate = usecsToDate(run['copyRun'][0]['runStartTimeUsecs'])
+            startdateusecs = run['copyRun'][0]['runStartTimeUsecs']
+            if startdateusecs < timeAgo(olderthan, 'days') and run['backupRun']['snapshotsDeleted'] is False:
+                print("%s: %s (%s)" % (startdate, job['name'], run['backupRun']['runType'][1:]))
@@ -1,5 +1,5 @@
 #!/usr/bin/env python
-"""Cohesity Python REST API Wrapper Module - 2023.03.30"""
+"""Cohesity Python REST API Wrapper Module - 2026.10.18"""
 
 ##########################################################################################
 # Change Log
@@ -20,6 +20,17 @@
 # 2022.11.26 - added v2 file download
 # 2023.03.09 - added impersonate and switchback functions and improved tenant ID lookup
 # 2023.03.30 - added try/except for log file
+# 2026.10.18 - added keep-alive session pool per context and apiConnectionStats
+# 2026.10.18 - added iterRuns protection run pagination generator
+# 2026.10.18 - added opt-in on-disk response cache (apiCache)
+# 2026.10.18 - added retry with backoff, Retry-After handling and per cluster circuit breaker
+# 2026.10.18 - debug log is written by a background thread (no more sleep on repeated errors)
+# 2026.10.18 - added context parameter to all helpers, newContext and per thread default context (useContext)
+# 2026.10.18 - added forEachCluster parallel helios cluster helper
+# 2026.10.18 - added apiStream for incremental parsing of large json responses
+# 2026.10.18 - added per endpoint latency and payload metrics (apiMetrics)
+# 2026.10.18 - added indexSources protection source tree index
+# 2026.10.18 - added timeSeriesStats parallel, timestamp aligned stats helper
 #
 ##########################################################################################
 # Install Notes
@@ -40,8 +51,23 @@ import getpass
 import base64
 import os
 import urllib3
-import traceback
+import sys
+import atexit
+import linecache
+import threading
+import hashlib
+import glob
+import random
+import re
+import codecs
+from email.utils import parsedate_tz, mktime_tz
 from os.path import expanduser
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+from requests.adapters import HTTPAdapter
+from requests.compat import cookielib
 
 ### ignore unsigned certificates
 import requests.packages.urllib3
@@ -74,7 +100,23 @@ __all__ = ['api_version',
            'setContext',
            'getDate',
            'impersonate',
-           'switchback']
+           'switchback',
+           'apiConnectionStats',
+           'iterRuns',
+           'runInfo',
+           'apiCache',
+           'apiCacheClear',
+           'setRetryPolicy',
+           'newContext',
+           'useContext',
+           'forEachCluster',
+           'parallelMap',
+           'apiStream',
+           'apiMetrics',
+           'apiMetricsReport',
+           'apiMetricsDump',
+           'indexSources',
+           'timeSeriesStats']
 
 COHESITY_API = {
     'APIROOT': '',
@@ -83,30 +125,131 @@ COHESITY_API = {
     'AUTHENTICATED': False,
     'LAST_ERROR': 'OK'
 }
+HELIOSCLUSTERS = []
+CONNECTEDHELIOSCLUSTERS = []
+THREADSTATE = threading.local()  # per thread default context and last error
 
 APIMETHODS = ['get', 'post', 'put', 'delete']
 CONFIGDIR = expanduser("~") + '/.pyhesity'
 SCRIPTDIR = os.path.dirname(os.path.realpath(__file__))
 PWFILE = os.path.join(SCRIPTDIR, 'YWRtaW4')
 LOGFILE = os.path.join(SCRIPTDIR, 'pyhesity-debug.log')
+POOLSIZE = 10
+APICACHE = {
+    'ENABLED': False,
+    'TTL': 300,
+    'MAXENTRIES': 500,
+    'CACHEDIR': os.path.join(CONFIGDIR, 'cache'),
+    'FAMILIES': ['protectionJobs', 'protectionSources', 'protectionPolicies', 'cluster', 'vaults', 'remoteClusters']
+}
+# retry policies per method (post is only retried when the cluster refused the request)
+# read timeouts (300 seconds) are not retried unless retryOnTimeout is set, and no retry
+# is started once maxRetryTime seconds have passed since the first attempt
+RETRYPOLICY = {
+    'get': {'retries': 3, 'backoff': 1, 'maxBackoff': 30, 'retryOnError': True, 'retryOnTimeout': False, 'maxRetryTime': 300},
+    'post': {'retries': 2, 'backoff': 1, 'maxBackoff': 30, 'retryOnError': False, 'retryOnTimeout': False, 'maxRetryTime': 300},
+    'put': {'retries': 3, 'backoff': 1, 'maxBackoff': 30, 'retryOnError': True, 'retryOnTimeout': False, 'maxRetryTime': 300},
+    'delete': {'retries': 3, 'backoff': 1, 'maxBackoff': 30, 'retryOnError': True, 'retryOnTimeout': False, 'maxRetryTime': 300}
+}
+RETRYSTATUS = [429, 502, 503, 504]
+REFUSEDSTATUS = [429, 503]
+BREAKER = {'THRESHOLD': 5, 'COOLDOWN': 60}
+APISTATS = {'retries': 0, 'failures': 0, 'breakerTrips': 0, 'breakerRejects': 0, 'breakers': {}}
+APISTATSLOCK = threading.Lock()
+APIMETRICS = {'ENABLED': False, 'SUMMARY': False, 'PROMFILE': None, 'ATEXIT': False}
+METRICS = {}
+METRICSLOCK = threading.Lock()
+# writes to these resources also invalidate cached reads of another resource family
+CACHEFAMILYALIASES = {
+    'protectionJobState': 'protectionJobs',
+    'data-protect/protection-groups': 'protectionJobs',
+    'data-protect/policies': 'protectionPolicies',
+    'data-protect/sources': 'protectionSources',
+    'clusters': 'cluster',
+    'remote-clusters': 'remoteClusters',
+    'data-protect/external-targets': 'vaults'
+}
 api_version = '2022.09.13'
 
 
-### get last error
-def LAST_API_ERROR():
-    return COHESITY_API['LAST_ERROR']
+### get last error (or retry and circuit breaker stats)
+def LAST_API_ERROR(stats=False, context=None):
+    if context is not None:
+        lasterror = context.get('LAST_ERROR', 'OK')
+    else:
+        lasterror = getattr(THREADSTATE, 'lasterror', None)
+        if lasterror is None:
+            lasterror = __context()['LAST_ERROR']
+    if stats is True:
+        APISTATSLOCK.acquire()
+        try:
+            laststats = {
+                'lastError': lasterror,
+                'retries': APISTATS['retries'],
+                'failures': APISTATS['failures'],
+                'breakerTrips': APISTATS['breakerTrips'],
+                'breakerRejects': APISTATS['breakerRejects'],
+                'breakers': dict((k, dict(b)) for (k, b) in APISTATS['breakers'].items())
+            }
+        finally:
+            APISTATSLOCK.release()
+        return laststats
+    return lasterror
+
+
+### contexts
+def __context(context=None):
+    """context to use: explicit context, else this thread's default, else the global context"""
+    if context is not None:
+        return context
+    threadcontext = getattr(THREADSTATE, 'context', None)
+    if threadcontext is not None:
+        return threadcontext
+    return COHESITY_API
+
+
+def __seterror(context, error):
+    context['LAST_ERROR'] = error
+    THREADSTATE.lasterror = error
+
+
+def newContext():
+    """new unauthenticated context (authenticate with apiauth(..., context=mycontext))"""
+    return {
+        'APIROOT': '',
+        'APIROOTv2': '',
+        'HEADER': {},
+        'AUTHENTICATED': False,
+        'LAST_ERROR': 'OK'
+    }
+
+
+def useContext(context=None):
+    """set the default context for calls made from this thread (None reverts to the global context)"""
+    previous = getattr(THREADSTATE, 'context', None)
+    THREADSTATE.context = context
+    return previous
 
 
 ### authentication
-def apiauth(vip='helios.cohesity.com', username='helios', domain='local', password=None, updatepw=None, prompt=None, quiet=None, helios=False, useApiKey=False, tenantId=None, noretry=False, regionid=None, mfaType='Totp', mfaCode=None, emailMfaCode=False):
+def apiauth(vip='helios.cohesity.com', username='helios', domain='local', password=None, updatepw=None, prompt=None, quiet=None, helios=False, useApiKey=False, tenantId=None, noretry=False, regionid=None, mfaType='Totp', mfaCode=None, emailMfaCode=False, poolSize=None, context=None):
     """authentication function"""
-    global COHESITY_API
     global HELIOSCLUSTERS
     global CONNECTEDHELIOSCLUSTERS
+    THISCONTEXT = __context(context)
+    # errors from earlier calls on this thread do not apply to this login
+    __seterror(THISCONTEXT, 'OK')
+
+    # new keep-alive session for this connection (shared by copies of this context)
+    if poolSize is None:
+        poolSize = THISCONTEXT.get('POOLSIZE', POOLSIZE)
+    THISCONTEXT['POOLSIZE'] = poolSize
+    THISCONTEXT['SESSION'] = __newsession(poolSize)
+    session = THISCONTEXT['SESSION']
 
-    COHESITY_API['APIROOTMCM'] = 'https://%s/mcm/' % vip
-    COHESITY_API['APIROOTMCMv2'] = 'https://%s/v2/mcm/' % vip
-    COHESITY_API['APIROOTREPORTINGv2'] = 'https://%s/heliosreporting/api/v1/public/' % vip
+    THISCONTEXT['APIROOTMCM'] = 'https://%s/mcm/' % vip
+    THISCONTEXT['APIROOTMCMv2'] = 'https://%s/v2/mcm/' % vip
+    THISCONTEXT['APIROOTREPORTINGv2'] = 'https://%s/heliosreporting/api/v1/public/' % vip
 
     if '\\' in username:
         (domain, username) = username.split('\\')
@@ -117,124 +260,128 @@ def apiauth(vip='helios.cohesity.com', username='helios', domain='local', passwo
     # if password is None:
     pwd = __getpassword(vip=vip, username=username, password=password, domain=domain, useApiKey=useApiKey, helios=helios, updatepw=updatepw, prompt=prompt)
     if pwd is None:
-        COHESITY_API['AUTHENTICATED'] = False
-        COHESITY_API['LAST_ERROR'] = 'no password provided for %s/%s at %s' % (domain, username, vip)
+        THISCONTEXT['AUTHENTICATED'] = False
+        __seterror(THISCONTEXT, 'no password provided for %s/%s at %s' % (domain, username, vip))
         return None
-    COHESITY_API['HEADER'] = {'accept': 'application/json', 'content-type': 'application/json'}
-    COHESITY_API['APIROOT'] = 'https://' + vip + '/irisservices/api/v1'
-    COHESITY_API['APIROOTv2'] = 'https://' + vip + '/v2/'
+    THISCONTEXT['HEADER'] = {'accept': 'application/json', 'content-type': 'application/json'}
+    THISCONTEXT['APIROOT'] = 'https://' + vip + '/irisservices/api/v1'
+    THISCONTEXT['APIROOTv2'] = 'https://' + vip + '/v2/'
     if vip == 'helios.cohesity.com' or helios is not False:
-        COHESITY_API['HEADER'] = {'accept': 'application/json', 'content-type': 'application/json', 'apiKey': pwd}
+        THISCONTEXT['HEADER'] = {'accept': 'application/json', 'content-type': 'application/json', 'apiKey': pwd}
         if regionid is not None:
-            COHESITY_API['HEADER']['regionid'] = regionid
-        URL = COHESITY_API['APIROOTMCM'] + 'clusters/connectionStatus'
+            THISCONTEXT['HEADER']['regionid'] = regionid
+        URL = THISCONTEXT['APIROOTMCM'] + 'clusters/connectionStatus'
         try:
-            HELIOSCLUSTERS = (requests.get(URL, headers=COHESITY_API['HEADER'], verify=False, timeout=300)).json()
-            if HELIOSCLUSTERS is not None and 'message' in HELIOSCLUSTERS:
-                print(HELIOSCLUSTERS['message'])
-                if 'Authentication failed' in HELIOSCLUSTERS['message'] and noretry is False and prompt is not False:
-                    apiauth(vip=vip, username=username, domain=domain, updatepw=True, prompt=prompt, helios=helios, useApiKey=useApiKey, quiet=True)
+            heliosclusters = (session.get(URL, headers=THISCONTEXT['HEADER'], verify=False, timeout=300)).json()
+            if heliosclusters is not None and 'message' in heliosclusters:
+                print(heliosclusters['message'])
+                if 'Authentication failed' in heliosclusters['message'] and noretry is False and prompt is not False:
+                    apiauth(vip=vip, username=username, domain=domain, updatepw=True, prompt=prompt, helios=helios, useApiKey=useApiKey, quiet=True, poolSize=poolSize, context=context)
                 else:
-                    COHESITY_API['AUTHENTICATED'] = False
-                    COHESITY_API['LAST_ERROR'] = 'Helios/MCM authentication failed'
+                    THISCONTEXT['AUTHENTICATED'] = False
+                    __seterror(THISCONTEXT, 'Helios/MCM authentication failed')
                     return None
-            if HELIOSCLUSTERS is not None and 'errorCode' not in HELIOSCLUSTERS:
-                CONNECTEDHELIOSCLUSTERS = [cluster for cluster in HELIOSCLUSTERS if cluster['connectedToCluster'] is True]
-                COHESITY_API['AUTHENTICATED'] = True
-                COHESITY_API['LAST_ERROR'] = 'OK'
+            if heliosclusters is not None and 'errorCode' not in heliosclusters:
+                THISCONTEXT['HELIOSCLUSTERS'] = heliosclusters
+                THISCONTEXT['CONNECTEDHELIOSCLUSTERS'] = [cluster for cluster in heliosclusters if cluster['connectedToCluster'] is True]
+                if THISCONTEXT is COHESITY_API:
+                    HELIOSCLUSTERS = THISCONTEXT['HELIOSCLUSTERS']
+                    CONNECTEDHELIOSCLUSTERS = THISCONTEXT['CONNECTEDHELIOSCLUSTERS']
+                THISCONTEXT['AUTHENTICATED'] = True
+                __seterror(THISCONTEXT, 'OK')
                 if quiet is None:
                     print("Connected!")
             else:
-                URL = COHESITY_API['APIROOTMCMv2'] + 'dms/regions'
-                REGIONS = (requests.get(URL, headers=COHESITY_API['HEADER'], verify=False, timeout=300)).json()
+                URL = THISCONTEXT['APIROOTMCMv2'] + 'dms/regions'
+                REGIONS = (session.get(URL, headers=THISCONTEXT['HEADER'], verify=False, timeout=300)).json()
                 if REGIONS is not None and 'message' in REGIONS:
                     print(REGIONS['message'])
-                    COHESITY_API['AUTHENTICATED'] = False
-                    COHESITY_API['LAST_ERROR'] = 'DMaaS authentication failed'
+                    THISCONTEXT['AUTHENTICATED'] = False
+                    __seterror(THISCONTEXT, 'DMaaS authentication failed')
                     return None
                 if REGIONS is not None and 'errorCode' not in REGIONS:
-                    COHESITY_API['AUTHENTICATED'] = True
-                    COHESITY_API['LAST_ERROR'] = 'OK'
+                    THISCONTEXT['AUTHENTICATED'] = True
+                    __seterror(THISCONTEXT, 'OK')
                     if quiet is None:
                         print("Connected!")
         except requests.exceptions.RequestException as e:
-            COHESITY_API['AUTHENTICATED'] = False
-            COHESITY_API['LAST_ERROR'] = e
+            THISCONTEXT['AUTHENTICATED'] = False
+            __seterror(THISCONTEXT, e)
             if 'Authentication failed' in e and noretry is False and prompt is not False:
-                apiauth(vip=vip, username=username, domain=domain, updatepw=True, prompt=prompt, helios=helios, useApiKey=useApiKey)
+                apiauth(vip=vip, username=username, domain=domain, updatepw=True, prompt=prompt, helios=helios, useApiKey=useApiKey, poolSize=poolSize, context=context)
             if quiet is None:
                 __writelog(e)
                 print(e)
     elif useApiKey is True:
-        COHESITY_API['HEADER'] = {'accept': 'application/json', 'content-type': 'application/json', 'apiKey': pwd}
-        COHESITY_API['AUTHENTICATED'] = True
+        THISCONTEXT['HEADER'] = {'accept': 'application/json', 'content-type': 'application/json', 'apiKey': pwd}
+        THISCONTEXT['AUTHENTICATED'] = True
         if tenantId is not None:
-            impersonate(tenantId)
-        COHESITY_API['LAST_ERROR'] = 'OK'
-        cluster = api('get', 'cluster', quiet=True)
+            impersonate(tenantId, context=THISCONTEXT)
+        __seterror(THISCONTEXT, 'OK')
+        cluster = api('get', 'cluster', quiet=True, context=THISCONTEXT)
         if cluster is not None and 'id' in cluster:
             if quiet is None:
                 print("Connected!")
         else:
-            COHESITY_API['AUTHENTICATED'] = False
-            if 'StatusUnauthorized' in COHESITY_API['LAST_ERROR'] or 'invalid header value' in COHESITY_API['LAST_ERROR']:
-                COHESITY_API['LAST_ERROR'] = 'API key authentication failed'
+            THISCONTEXT['AUTHENTICATED'] = False
+            if 'StatusUnauthorized' in THISCONTEXT['LAST_ERROR'] or 'invalid header value' in THISCONTEXT['LAST_ERROR']:
+                __seterror(THISCONTEXT, 'API key authentication failed')
                 print('API key authentication failed')
                 if prompt is not False and noretry is not True:
-                    apiauth(vip=vip, username=username, domain=domain, updatepw=True, prompt=prompt, helios=helios, useApiKey=useApiKey)
+                    apiauth(vip=vip, username=username, domain=domain, updatepw=True, prompt=prompt, helios=helios, useApiKey=useApiKey, poolSize=poolSize, context=context)
             else:
-                print('Connection failed: %s' % COHESITY_API['LAST_ERROR'])
+                print('Connection failed: %s' % THISCONTEXT['LAST_ERROR'])
     else:
         creds = json.dumps({"domain": domain, "password": pwd, "username": username, "otpType": mfaType, "otpCode": mfaCode})
         emailcreds = json.dumps({"domain": domain, "password": pwd, "username": username})
 
-        url = COHESITY_API['APIROOT'] + '/public/accessTokens'
+        url = THISCONTEXT['APIROOT'] + '/public/accessTokens'
         try:
             if emailMfaCode is True:
-                emailurl = COHESITY_API['APIROOTv2'] + 'email-otp'
-                response = requests.post(emailurl, data=emailcreds, headers=COHESITY_API['HEADER'], verify=False, timeout=300)
+                emailurl = THISCONTEXT['APIROOTv2'] + 'email-otp'
+                response = session.post(emailurl, data=emailcreds, headers=THISCONTEXT['HEADER'], verify=False, timeout=300)
                 mfaCode = getpass.getpass("Enter emailed MFA code: ")
                 creds = json.dumps({"domain": domain, "password": pwd, "username": username, "otpType": 'Email', "otpCode": mfaCode})
 
-            response = requests.post(url, data=creds, headers=COHESITY_API['HEADER'], verify=False, timeout=300)
+            response = session.post(url, data=creds, headers=THISCONTEXT['HEADER'], verify=False, timeout=300)
             if response != '':
                 if response.status_code == 201:
                     accessToken = response.json()['accessToken']
                     tokenType = response.json()['tokenType']
-                    COHESITY_API['HEADER'] = {'accept': 'application/json',
+                    THISCONTEXT['HEADER'] = {'accept': 'application/json',
                                               'content-type': 'application/json',
                                               'authorization': tokenType + ' ' + accessToken}
-                    COHESITY_API['AUTHENTICATED'] = True
+                    THISCONTEXT['AUTHENTICATED'] = True
                     if tenantId is not None:
-                        impersonate(tenantId)
-                    COHESITY_API['LAST_ERROR'] = 'OK'
+                        impersonate(tenantId, context=THISCONTEXT)
+                    __seterror(THISCONTEXT, 'OK')
                     if quiet is None:
                         print("Connected!")
                 else:
                     # try session auth
                     if response.status_code == 400 and 'access denied' in response.json()['message'].lower():
                         try:
-                            url = COHESITY_API['APIROOTv2'] + 'users/sessions'
+                            url = THISCONTEXT['APIROOTv2'] + 'users/sessions'
                             creds = json.dumps({"domain": domain, "password": pwd, "username": username, "otpType": mfaType.lower(), "otpCode": mfaCode})
                             if emailMfaCode is True:
                                 creds = json.dumps({"domain": domain, "password": pwd, "username": username, "otpType": 'email', "otpCode": mfaCode})
                             # creds = json.dumps({"domain": domain, "password": pwd, "username": username})
-                            response = requests.post(url, data=creds, headers=COHESITY_API['HEADER'], verify=False, timeout=300)
+                            response = session.post(url, data=creds, headers=THISCONTEXT['HEADER'], verify=False, timeout=300)
                             if response != '':
                                 if response.status_code == 201:
                                     sessionId = response.json()['sessionId']
-                                    COHESITY_API['HEADER'] = {'accept': 'application/json',
+                                    THISCONTEXT['HEADER'] = {'accept': 'application/json',
                                                               'content-type': 'application/json',
                                                               'session-id': sessionId}
-                                    COHESITY_API['AUTHENTICATED'] = True
+                                    THISCONTEXT['AUTHENTICATED'] = True
                                     if tenantId is not None:
-                                        impersonate(tenantId)
-                                    COHESITY_API['LAST_ERROR'] = 'OK'
+                                        impersonate(tenantId, context=THISCONTEXT)
+                                    __seterror(THISCONTEXT, 'OK')
                                     if quiet is None:
                                         print("Connected!")
                                 else:
-                                    COHESITY_API['AUTHENTICATED'] = False
-                                    COHESITY_API['LAST_ERROR'] = 'Error %s' % response.status_code
+                                    THISCONTEXT['AUTHENTICATED'] = False
+                                    __seterror(THISCONTEXT, 'Error %s' % response.status_code)
                                     __writelog('Error %s' % response.status_code)
                                     # __writelog(response.json()['message'])
                                     if quiet is None:
@@ -242,149 +389,373 @@ def apiauth(vip='helios.cohesity.com', username='helios', domain='local', passwo
                                         # print(response.json()['message'])
                                     if response.status_code == 400 and 'invalid username' in response.json()['message'].lower():
                                         if noretry is not True and prompt is not False:
-                                            apiauth(vip=vip, username=username, domain=domain, updatepw=True, prompt=prompt, helios=helios, useApiKey=useApiKey)
+                                            apiauth(vip=vip, username=username, domain=domain, updatepw=True, prompt=prompt, helios=helios, useApiKey=useApiKey, poolSize=poolSize, context=context)
                         except requests.exceptions.RequestException as e2:
                             __writelog(e2)
-                            COHESITY_API['AUTHENTICATED'] = False
-                            COHESITY_API['LAST_ERROR'] = e2
+                            THISCONTEXT['AUTHENTICATED'] = False
+                            __seterror(THISCONTEXT, e2)
                             if quiet is None:
                                 print(e2)
                     else:
-                        COHESITY_API['AUTHENTICATED'] = False
+                        THISCONTEXT['AUTHENTICATED'] = False
                         if response.status_code == 400:
-                            COHESITY_API['LAST_ERROR'] = 'invalid username or password.'
+                            __seterror(THISCONTEXT, 'invalid username or password.')
                         else:
-                            COHESITY_API['LAST_ERROR'] = 'Error %s' % response.status_code
+                            __seterror(THISCONTEXT, 'Error %s' % response.status_code)
                         # __writelog(response.json()['message'])
-                        __writelog(COHESITY_API['LAST_ERROR'])
+                        __writelog(THISCONTEXT['LAST_ERROR'])
                         if quiet is None:
-                            print(COHESITY_API['LAST_ERROR'])
+                            print(THISCONTEXT['LAST_ERROR'])
                         if response.status_code == 400 and 'invalid username' in response.json()['message'].lower():
                             if noretry is False and prompt is not False:
-                                apiauth(vip=vip, username=username, domain=domain, updatepw=True, prompt=prompt, helios=helios, useApiKey=useApiKey)
+                                apiauth(vip=vip, username=username, domain=domain, updatepw=True, prompt=prompt, helios=helios, useApiKey=useApiKey, poolSize=poolSize, context=context)
 
         except requests.exceptions.RequestException as e:
             __writelog(e)
-            COHESITY_API['AUTHENTICATED'] = False
-            COHESITY_API['LAST_ERROR'] = e
+            THISCONTEXT['AUTHENTICATED'] = False
+            __seterror(THISCONTEXT, e)
             if quiet is None:
                 print(e)
 
 
-def apiconnected():
-    return COHESITY_API['AUTHENTICATED']
+def apiconnected(context=None):
+    return __context(context)['AUTHENTICATED']
 
 
-def apidrop():
-    global COHESITY_API
-    COHESITY_API['AUTHENTICATED'] = False
+def apidrop(context=None):
+    __context(context)['AUTHENTICATED'] = False
 
 
-def impersonate(tenantId):
-    if COHESITY_API['AUTHENTICATED'] is True:
-        tenants = api('get', 'tenants')
+def impersonate(tenantId, context=None):
+    THISCONTEXT = __context(context)
+    if THISCONTEXT['AUTHENTICATED'] is True:
+        tenants = api('get', 'tenants', context=THISCONTEXT)
         if tenants is not None and len(tenants) > 0:
             thistenant = [t for t in tenants if t['name'].lower() == tenantId.lower()]
             if thistenant is not None and len(thistenant) > 0:
-                COHESITY_API['HEADER']['x-impersonate-tenant-id'] = thistenant[0]['tenantId']
+                THISCONTEXT['HEADER']['x-impersonate-tenant-id'] = thistenant[0]['tenantId']
             else:
                 print('tenant %s not found' % tenantId)
         else:
             print('tenant %s not found' % tenantId)
 
 
-def switchback():
-    if 'x-impersonate-tenant-id' in COHESITY_API['HEADER']:
-        del COHESITY_API['HEADER']['x-impersonate-tenant-id']
+def switchback(context=None):
+    THISCONTEXT = __context(context)
+    if 'x-impersonate-tenant-id' in THISCONTEXT['HEADER']:
+        del THISCONTEXT['HEADER']['x-impersonate-tenant-id']
 
 
-def heliosCluster(clusterName=None, verbose=False):
-    global COHESITY_API
+def heliosCluster(clusterName=None, verbose=False, context=None):
+    THISCONTEXT = __context(context)
     if clusterName is not None:
         if isinstance(clusterName, dict) is True:
             clusterName = clusterName['name']
-        accessCluster = [cluster for cluster in CONNECTEDHELIOSCLUSTERS if cluster['name'].lower() == clusterName.lower()]
+        accessCluster = [cluster for cluster in heliosClusters(context=THISCONTEXT) if cluster['name'].lower() == clusterName.lower()]
         if not accessCluster:
             print('Cluster %s not connected to Helios' % clusterName)
         else:
-            COHESITY_API['HEADER']['accessClusterId'] = str(accessCluster[0]['clusterId'])
+            THISCONTEXT['HEADER']['accessClusterId'] = str(accessCluster[0]['clusterId'])
             if verbose is True:
                 print('Using %s' % clusterName)
     else:
         print("\n{0:<20}{1:<36}{2}".format('ClusterID', 'SoftwareVersion', "ClusterName"))
         print("{0:<20}{1:<36}{2}".format('---------', '---------------', "-----------"))
-        for cluster in sorted(CONNECTEDHELIOSCLUSTERS, key=lambda cluster: cluster['name'].lower()):
+        for cluster in heliosClusters(context=THISCONTEXT):
             print("{0:<20}{1:<36}{2}".format(cluster['clusterId'], cluster['softwareVersion'], cluster['name']))
 
 
-def heliosClusters():
-    return sorted(CONNECTEDHELIOSCLUSTERS, key=lambda cluster: cluster['name'].lower())
-
-
-### api call function
-def api(method, uri, data=None, quiet=None, mcm=None, mcmv2=None, v=1, reportingv2=None, context=None):
-    """api call function"""
-    if context is not None:
-        THISCONTEXT = context
-    else:
-        THISCONTEXT = COHESITY_API
-    if THISCONTEXT['AUTHENTICATED'] is False:
-        print('Not Connected')
-        return None
-    response = ''
+def heliosClusters(context=None):
+    connectedclusters = __context(context).get('CONNECTEDHELIOSCLUSTERS', CONNECTEDHELIOSCLUSTERS)
+    return sorted(connectedclusters, key=lambda cluster: cluster['name'].lower())
+
+
+### run a function against many helios clusters in parallel
+def forEachCluster(fn, clusters=None, workers=8, context=None):
+    """yield {'cluster', 'result', 'error', 'seconds'} as each cluster finishes
+
+    fn(cluster) is called in a worker thread whose default context is a copy of
+    the helios context pointed at that cluster, so api() calls inside fn need no
+    context parameter. Exceptions raised by fn are returned in 'error'.
+    """
+    THISCONTEXT = __context(context)
+    connectedclusters = heliosClusters(context=THISCONTEXT)
+    if clusters is None:
+        clusters = connectedclusters
+    todo = []
+    for cluster in clusters:
+        if not isinstance(cluster, dict):
+            accessCluster = [c for c in connectedclusters if c['name'].lower() == str(cluster).lower()]
+            if not accessCluster:
+                yield {'cluster': {'name': cluster}, 'result': None, 'error': 'Cluster %s not connected to Helios' % cluster, 'seconds': 0}
+                continue
+            cluster = accessCluster[0]
+        todo.append(cluster)
+
+    def clusterfn(cluster):
+        clustercontext = getContext(THISCONTEXT)
+        clustercontext['HEADER']['accessClusterId'] = str(cluster['clusterId'])
+        useContext(clustercontext)
+        starttime = time.time()
+        result = None
+        error = None
+        try:
+            result = fn(cluster)
+        except Exception as e:
+            error = '%s' % e
+            __writelog('forEachCluster: %s: %s' % (cluster['name'], e))
+        useContext(None)
+        return {'cluster': cluster, 'result': result, 'error': error, 'seconds': round(time.time() - starttime, 3)}
+
+    for (cluster, result, error) in parallelMap(clusterfn, todo, workers=workers, ordered=False):
+        yield result
+
+
+### run a function on many items in worker threads
+def parallelMap(fn, items, workers=8, ordered=True, context=None):
+    """call fn(item) for each item in up to workers threads, yield (item, result, error)
+
+    results are yielded in the order of items as soon as they (and every item before
+    them) are done, or as each one finishes with ordered=False. Exceptions raised by fn
+    are returned in error (as a string), while exit() and other non-Exception errors
+    raised by fn are raised again in the caller. context is the default context of the worker
+    threads, so api() calls inside fn need no context parameter.
+    """
+    items = list(items)
+    todo = queue.Queue()
+    for (index, item) in enumerate(items):
+        todo.put((index, item))
+    results = queue.Queue()
+    stop = threading.Event()
+
+    def worker():
+        if context is not None:
+            useContext(context)
+        while not stop.is_set():
+            try:
+                (index, item) = todo.get_nowait()
+            except queue.Empty:
+                return
+            result = None
+            error = None
+            fatal = None
+            try:
+                result = fn(item)
+            except Exception as e:
+                error = '%s' % e
+            except BaseException as e:
+                # exit() etc. in fn, raised again in the caller
+                error = '%s' % e
+                fatal = e
+            finally:
+                # always produce a result, so the caller never waits forever
+                results.put((index, result, error, fatal))
+            if fatal is not None:
+                return
+
+    for i in range(min(max(workers, 1), len(items))):
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+    try:
+        pending = {}
+        nextIndex = 0
+        for i in range(len(items)):
+            (index, result, error, fatal) = results.get()
+            if fatal is not None:
+                raise fatal
+            if ordered is not True:
+                yield (items[index], result, error)
+                continue
+            pending[index] = (result, error)
+            while nextIndex in pending:
+                (result, error) = pending.pop(nextIndex)
+                yield (items[nextIndex], result, error)
+                nextIndex += 1
+    finally:
+        # stop the workers if the caller stops early
+        stop.set()
+
+
+### keep-alive session pool
+def __newsession(poolSize=None):
+    """create a requests session with a keep-alive connection pool"""
+    if poolSize is None:
+        poolSize = POOLSIZE
+    session = requests.Session()
+    # auth is header based, don't carry cookies between calls
+    session.cookies.set_policy(cookielib.DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def __getsession(context):
+    """get (or create) the session for a context"""
+    if context.get('SESSION', None) is None:
+        context['SESSION'] = __newsession(context.get('POOLSIZE', None))
+    return context['SESSION']
+
+
+def apiConnectionStats(context=None):
+    """return count of requests, connections opened and connections reused"""
+    context = __context(context)
+    stats = {'requests': 0, 'opened': 0, 'reused': 0}
+    session = context.get('SESSION', None)
+    if session is None:
+        return stats
+    adapters = []
+    for adapter in session.adapters.values():
+        if adapter not in adapters:
+            adapters.append(adapter)
+    for adapter in adapters:
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                stats['requests'] += pool.num_requests
+                stats['opened'] += pool.num_connections
+    stats['reused'] = max(stats['requests'] - stats['opened'], 0)
+    return stats
+
+
+### url routing
+def __apiurl(context, uri, mcm=None, mcmv2=None, v=1, reportingv2=None):
     if mcm is not None:
-        url = THISCONTEXT['APIROOTMCM'] + uri
+        url = context['APIROOTMCM'] + uri
     elif mcmv2 is not None:
-        url = THISCONTEXT['APIROOTMCMv2'] + uri
+        url = context['APIROOTMCMv2'] + uri
     elif reportingv2 is not None:
-        url = THISCONTEXT['APIROOTREPORTINGv2'] + uri
+        url = context['APIROOTREPORTINGv2'] + uri
     else:
         if v == 2:
-            url = THISCONTEXT['APIROOTv2'] + uri
+            url = context['APIROOTv2'] + uri
         else:
             if uri[0] != '/':
                 uri = '/public/' + uri
-            url = THISCONTEXT['APIROOT'] + uri
+            url = context['APIROOT'] + uri
+    return (url, uri)
+
+
+### api call function
+def api(method, uri, data=None, quiet=None, mcm=None, mcmv2=None, v=1, reportingv2=None, context=None, cache=None):
+    """api call function"""
+    THISCONTEXT = __context(context)
+    if THISCONTEXT['AUTHENTICATED'] is False:
+        print('Not Connected')
+        return None
+    response = ''
+    (url, uri) = __apiurl(THISCONTEXT, uri, mcm, mcmv2, v, reportingv2)
 
     if method in APIMETHODS:
-        try:
-            if method == 'get':
-                response = requests.get(url, headers=THISCONTEXT['HEADER'], verify=False, timeout=300)
-            if method == 'post':
-                response = requests.post(url, headers=THISCONTEXT['HEADER'], json=data, verify=False, timeout=300)
-            if method == 'put':
-                response = requests.put(url, headers=THISCONTEXT['HEADER'], json=data, verify=False, timeout=300)
-            if method == 'delete':
-                response = requests.delete(url, headers=THISCONTEXT['HEADER'], json=data, verify=False, timeout=300)
-            COHESITY_API['LAST_ERROR'] = 'OK'
-        except requests.exceptions.RequestException as e:
-            __writelog(e)
-            COHESITY_API['LAST_ERROR'] = '%s' % e
+        session = __getsession(THISCONTEXT)
+        header = THISCONTEXT['HEADER']
+
+        # response cache
+        cachefile = None
+        cached = None
+        if APICACHE['ENABLED'] is True and mcm is None and mcmv2 is None and reportingv2 is None:
+            family = __cachefamily(uri, v)
+            if method == 'get' and cache is not False and family in APICACHE['FAMILIES']:
+                cachefile = __cachefile(THISCONTEXT, family, url)
+                cached = __cacheread(cachefile)
+                if cached is not None:
+                    if cached['expires'] > time.time():
+                        if APIMETRICS['ENABLED'] is True:
+                            __apimetric(method, uri, 'cached', 0, 0, cacheHit=True)
+                        return cached['response']
+                    if cached.get('etag', None) is not None:
+                        header = dict(header)
+                        header['If-None-Match'] = cached['etag']
+            elif method != 'get':
+                __cacheinvalidate(THISCONTEXT, family)
+                if family in CACHEFAMILYALIASES:
+                    __cacheinvalidate(THISCONTEXT, CACHEFAMILYALIASES[family])
+
+        # circuit breaker
+        breakerkey = __breakerkey(THISCONTEXT, mcm, mcmv2, reportingv2)
+        if __breakeropen(breakerkey) is True:
+            __seterror(THISCONTEXT, 'circuit breaker open for %s' % breakerkey)
             if quiet is None:
-                print(e)
+                print(THISCONTEXT['LAST_ERROR'])
+            return None
+
+        policy = RETRYPOLICY[method]
+        attempt = 0
+        starttime = time.time()
+        while True:
+            response = ''
+            error = None
+            try:
+                if method == 'get':
+                    response = session.get(url, headers=header, verify=False, timeout=300)
+                if method == 'post':
+                    response = session.post(url, headers=THISCONTEXT['HEADER'], json=data, verify=False, timeout=300)
+                if method == 'put':
+                    response = session.put(url, headers=THISCONTEXT['HEADER'], json=data, verify=False, timeout=300)
+                if method == 'delete':
+                    response = session.delete(url, headers=THISCONTEXT['HEADER'], json=data, verify=False, timeout=300)
+                __seterror(THISCONTEXT, 'OK')
+            except requests.exceptions.RequestException as e:
+                error = e
+            if error is not None:
+                retry = policy['retryOnError']
+                if isinstance(error, requests.exceptions.ReadTimeout) and policy['retryOnTimeout'] is not True:
+                    retry = False
+            elif response.status_code in RETRYSTATUS:
+                retry = method != 'post' or response.status_code in REFUSEDSTATUS
+            else:
+                break
+            if retry is False or attempt >= policy['retries']:
+                break
+            delay = __retrydelay(policy, attempt + 1, response)
+            if time.time() - starttime + delay > policy['maxRetryTime']:
+                break
+            attempt += 1
+            __apistat('retries')
+            time.sleep(delay)
+
+        failed = error is not None or response.status_code in RETRYSTATUS
+        __breakerupdate(breakerkey, failed)
+        if APIMETRICS['ENABLED'] is True:
+            if error is not None:
+                __apimetric(method, uri, 'error', time.time() - starttime, 0, attempt)
+            else:
+                __apimetric(method, uri, response.status_code, time.time() - starttime, len(response.content), attempt, response.status_code == 304 and cached is not None)
+        if error is not None:
+            __writelog(error)
+            __seterror(THISCONTEXT, '%s' % error)
+            if attempt > 0:
+                __seterror(THISCONTEXT, '%s (after %s retries)' % (error, attempt))
+            if quiet is None:
+                print(error)
 
         if isinstance(response, bool):
             return ''
         if response != '':
+            if response.status_code == 304 and cached is not None:
+                __cachewrite(cachefile, cached['response'], cached['etag'])
+                return cached['response']
             if response.status_code == 204:
-                COHESITY_API['LAST_ERROR'] = response.reason
+                __seterror(THISCONTEXT, response.reason)
                 return ''
             if response.status_code == 404:
-                COHESITY_API['LAST_ERROR'] = response.reason
+                __seterror(THISCONTEXT, response.reason)
                 if quiet is None:
                     print('Invalid api call: ' + uri)
                 return None
             try:
                 responsejson = response.json()
             except ValueError as ve:
-                COHESITY_API['LAST_ERROR'] = response.reason
+                __seterror(THISCONTEXT, response.reason)
                 return None
             if isinstance(responsejson, bool):
                 return ''
             if responsejson is not None:
                 if 'errorCode' in responsejson:
                     if 'message' in responsejson:
-                        COHESITY_API['LAST_ERROR'] = responsejson['errorCode'][1:] + ': ' + responsejson['message']
+                        __seterror(THISCONTEXT, responsejson['errorCode'][1:] + ': ' + responsejson['message'])
                         if quiet is None:
                             print(responsejson['errorCode'][1:] + ': ' + responsejson['message'])
                             return {'error': responsejson['errorCode'][1:] + ': ' + responsejson['message']}
@@ -397,12 +768,719 @@ def api(method, uri, data=None, quiet=None, mcm=None, mcmv2=None, v=1, reporting
                         else:
                             return None
                 else:
+                    if cachefile is not None and response.status_code == 200:
+                        __cachewrite(cachefile, responsejson, response.headers.get('ETag', None))
                     return responsejson
     else:
         if quiet is None:
             print("invalid api method")
 
 
+### api metrics
+METRICSIDS = re.compile(r'(?<=/)(?:\d+(?::\d+)*|[0-9a-fA-F]{8}-[0-9a-fA-F-]{27}|[0-9a-fA-F]{24,})(?=/|$)')
+
+
+def __uritemplate(uri):
+    """protectionRuns?jobId=12&numRuns=5 -> protectionRuns?jobId&numRuns, protectionJobs/12 -> protectionJobs/{id}"""
+    parts = uri.split('?', 1)
+    template = METRICSIDS.sub('{id}', parts[0])
+    if len(parts) > 1:
+        template += '?' + '&'.join(sorted(set([q.split('=')[0] for q in parts[1].split('&') if q != ''])))
+    return template
+
+
+def __apimetric(method, uri, status, seconds, received, retries=0, cacheHit=False):
+    key = (method, __uritemplate(uri))
+    METRICSLOCK.acquire()
+    try:
+        metric = METRICS.get(key, None)
+        if metric is None:
+            metric = METRICS[key] = {'count': 0, 'latencies': [], 'bytes': 0, 'status': {}, 'retries': 0, 'cacheHits': 0}
+        metric['count'] += 1
+        if status != 'cached':
+            metric['latencies'].append(seconds)
+        metric['bytes'] += received
+        metric['status'][str(status)] = metric['status'].get(str(status), 0) + 1
+        metric['retries'] += retries
+        if cacheHit is True:
+            metric['cacheHits'] += 1
+    finally:
+        METRICSLOCK.release()
+
+
+def __percentile(values, pct):
+    if len(values) == 0:
+        return 0
+    return values[min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))]
+
+
+def apiMetrics(enable=True, summary=True, promFile=None):
+    """record per endpoint metrics (summary table printed at exit, prometheus textfile written at exit)"""
+    APIMETRICS['ENABLED'] = enable
+    APIMETRICS['SUMMARY'] = summary
+    APIMETRICS['PROMFILE'] = promFile
+    if enable is True and APIMETRICS['ATEXIT'] is False:
+        APIMETRICS['ATEXIT'] = True
+        atexit.register(__metricsatexit)
+
+
+def apiMetricsReport():
+    """list of per endpoint metrics, slowest total time first"""
+    METRICSLOCK.acquire()
+    try:
+        report = []
+        for (method, template) in METRICS:
+            metric = METRICS[(method, template)]
+            latencies = sorted(metric['latencies'])
+            report.append({
+                'method': method,
+                'uri': template,
+                'count': metric['count'],
+                'totalSeconds': round(sum(latencies), 3),
+                'p50Seconds': round(__percentile(latencies, 50), 3),
+                'p90Seconds': round(__percentile(latencies, 90), 3),
+                'p99Seconds': round(__percentile(latencies, 99), 3),
+                'maxSeconds': round(max(latencies or [0]), 3),
+                'bytes': metric['bytes'],
+                'status': dict(metric['status']),
+                'retries': metric['retries'],
+                'cacheHits': metric['cacheHits']
+            })
+    finally:
+        METRICSLOCK.release()
+    return sorted(report, key=lambda r: r['totalSeconds'], reverse=True)
+
+
+def apiMetricsDump(fileName):
+    """write metrics to a .json or .csv file"""
+    report = apiMetricsReport()
+    f = codecs.open(fileName, 'w', 'utf-8')
+    if fileName.lower().endswith('.csv'):
+        f.write('Method,URI,Count,Total Seconds,P50 Seconds,P90 Seconds,P99 Seconds,Max Seconds,Bytes,Status Codes,Retries,Cache Hits\n')
+        for r in report:
+            status = ' '.join(['%s:%s' % (k, r['status'][k]) for k in sorted(r['status'])])
+            f.write('"%s","%s",%s,%s,%s,%s,%s,%s,%s,"%s",%s,%s\n' % (r['method'], r['uri'], r['count'], r['totalSeconds'], r['p50Seconds'], r['p90Seconds'], r['p99Seconds'], r['maxSeconds'], r['bytes'], status, r['retries'], r['cacheHits']))
+    else:
+        json.dump(report, f, indent=4)
+    f.close()
+
+
+def __metricsprometheus(fileName):
+    """write metrics in prometheus text format (for the node exporter textfile collector)"""
+    lines = ['# TYPE pyhesity_api_requests_total counter',
+             '# TYPE pyhesity_api_latency_seconds summary',
+             '# TYPE pyhesity_api_received_bytes_total counter',
+             '# TYPE pyhesity_api_retries_total counter',
+             '# TYPE pyhesity_api_cache_hits_total counter']
+    for r in apiMetricsReport():
+        labels = 'method="%s",uri="%s"' % (r['method'], r['uri'].replace('\\', '\\\\').replace('"', '\\"'))
+        for status in sorted(r['status']):
+            lines.append('pyhesity_api_requests_total{%s,status="%s"} %s' % (labels, status, r['status'][status]))
+        for (quantile, key) in [('0.5', 'p50Seconds'), ('0.9', 'p90Seconds'), ('0.99', 'p99Seconds')]:
+            lines.append('pyhesity_api_latency_seconds{%s,quantile="%s"} %s' % (labels, quantile, r[key]))
+        lines.append('pyhesity_api_latency_seconds_sum{%s} %s' % (labels, r['totalSeconds']))
+        lines.append('pyhesity_api_latency_seconds_count{%s} %s' % (labels, r['count'] - r['cacheHits']))
+        lines.append('pyhesity_api_received_bytes_total{%s} %s' % (labels, r['bytes']))
+        lines.append('pyhesity_api_retries_total{%s} %s' % (labels, r['retries']))
+        lines.append('pyhesity_api_cache_hits_total{%s} %s' % (labels, r['cacheHits']))
+    tmpfile = '%s.%s.tmp' % (fileName, os.getpid())
+    f = open(tmpfile, 'w')
+    f.write('\n'.join(lines) + '\n')
+    f.close()
+    if os.path.exists(fileName):
+        os.remove(fileName)
+    os.rename(tmpfile, fileName)
+
+
+def __metricsatexit():
+    if APIMETRICS['ENABLED'] is not True:
+        return
+    try:
+        if APIMETRICS['PROMFILE'] is not None:
+            __metricsprometheus(APIMETRICS['PROMFILE'])
+    except Exception as e:
+        __writelog('error writing metrics to %s: %s' % (APIMETRICS['PROMFILE'], e))
+    if APIMETRICS['SUMMARY'] is True:
+        report = apiMetricsReport()
+        if len(report) > 0:
+            print('\n{0:<9}{1:<60}{2:>7}{3:>10}{4:>8}{5:>8}{6:>8}{7:>12}{8:>8}{9:>7}'.format('Method', 'URI', 'Count', 'Total(s)', 'p50', 'p90', 'p99', 'MiB', 'Retries', 'Cache'))
+            print('{0:<9}{1:<60}{2:>7}{3:>10}{4:>8}{5:>8}{6:>8}{7:>12}{8:>8}{9:>7}'.format('------', '---', '-----', '--------', '---', '---', '---', '---', '-------', '-----'))
+            for r in report:
+                print('{0:<9}{1:<60}{2:>7}{3:>10}{4:>8}{5:>8}{6:>8}{7:>12}{8:>8}{9:>7}'.format(r['method'], r['uri'][:59], r['count'], r['totalSeconds'], r['p50Seconds'], r['p90Seconds'], r['p99Seconds'], round(r['bytes'] / 1048576.0, 1), r['retries'], r['cacheHits']))
+
+
+### streaming api call function
+def apiStream(method, uri, path='[*]', data=None, quiet=None, mcm=None, mcmv2=None, v=1, reportingv2=None, context=None, chunkSize=1048576):
+    """yield the items selected by path from a json response, without loading the whole response
+
+    path examples: '[*]' (items of a top level list), 'vms[*]', '[*].protectionSource',
+    '[*].nodes[*].protectionSource', '**.protectionSource' (protectionSource at any depth)
+    """
+    THISCONTEXT = __context(context)
+    if THISCONTEXT['AUTHENTICATED'] is False:
+        print('Not Connected')
+        return
+    if method not in APIMETHODS:
+        if quiet is None:
+            print("invalid api method")
+        return
+    (url, uri) = __apiurl(THISCONTEXT, uri, mcm, mcmv2, v, reportingv2)
+    session = __getsession(THISCONTEXT)
+    try:
+        if method == 'get':
+            response = session.get(url, headers=THISCONTEXT['HEADER'], verify=False, timeout=300, stream=True)
+        else:
+            response = session.request(method.upper(), url, headers=THISCONTEXT['HEADER'], json=data, verify=False, timeout=300, stream=True)
+    except requests.exceptions.RequestException as e:
+        __writelog(e)
+        __seterror(THISCONTEXT, '%s' % e)
+        if quiet is None:
+            print(e)
+        return
+    try:
+        if response.status_code >= 300:
+            __seterror(THISCONTEXT, 'Error %s: %s' % (response.status_code, response.reason))
+            if quiet is None:
+                print(THISCONTEXT['LAST_ERROR'])
+            return
+        __seterror(THISCONTEXT, 'OK')
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        chunks = (decoder.decode(chunk) for chunk in response.iter_content(chunk_size=chunkSize) if chunk)
+        reader = _JsonStreamReader(chunks)
+        for item in __streamselect(reader, __streampath(path)):
+            yield item
+    except ValueError as ve:
+        __writelog('apiStream: %s: %s' % (uri, ve))
+        __seterror(THISCONTEXT, 'invalid json response: %s' % ve)
+        if quiet is None:
+            print(THISCONTEXT['LAST_ERROR'])
+    finally:
+        response.close()
+
+
+STREAMSTRINGEND = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"')
+STREAMSTRUCTURE = re.compile(r'["{}\[\]]')
+STREAMSCALAR = re.compile(r'[^,}\]\s]+')
+STREAMPATH = re.compile(r'\[\*\]|\*\*|[^.\[\]]+')
+
+
+def __streampath(path):
+    """'[*].nodes[*].protectionSource' -> ['*', 'nodes', '*', 'protectionSource']"""
+    return ['*' if t == '[*]' else t for t in STREAMPATH.findall(path)]
+
+
+class _JsonStreamReader(object):
+    """sliding window over a stream of json text"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.buf = ''
+        self.pos = 0
+
+    def more(self):
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """next non whitespace character ('' at end of stream)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.more() is False:
+                return ''
+
+    def expect(self, chars):
+        c = self.peek()
+        if c == '' or c not in chars:
+            raise ValueError('expected %s, found %s' % (' or '.join(chars), c or 'end of stream'))
+        self.pos += 1
+        return c
+
+    def valueend(self, skip=False):
+        """offset just past the value at pos (skip=True lets go of the text as it goes)"""
+        c = self.peek()
+        if c == '':
+            raise ValueError('unexpected end of stream')
+        offset = 0
+        depth = 0
+        while True:
+            i = self.pos + offset
+            if c == '"' and depth == 0:
+                m = STREAMSTRINGEND.match(self.buf, i + 1)
+                if m is not None and m.end() <= len(self.buf):
+                    return m.end()
+            elif c not in '{[' and depth == 0:
+                m = STREAMSCALAR.match(self.buf, i)
+                if m is not None and m.end() < len(self.buf):
+                    return m.end()
+            else:
+                while True:
+                    m = STREAMSTRUCTURE.search(self.buf, i)
+                    if m is None:
+                        i = len(self.buf)
+                        break
+                    if m.group() == '"':
+                        s = STREAMSTRINGEND.match(self.buf, m.end())
+                        if s is None:
+                            i = m.start()
+                            break
+                        i = s.end()
+                        continue
+                    i = m.end()
+                    if m.group() in '{[':
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth == 0:
+                            return i
+                if skip is True:
+                    self.pos = i
+                    offset = 0
+                else:
+                    offset = i - self.pos
+            if self.more() is False:
+                if c not in '{["' and depth == 0 and STREAMSCALAR.match(self.buf, self.pos + offset) is not None:
+                    return STREAMSCALAR.match(self.buf, self.pos + offset).end()
+                raise ValueError('unexpected end of stream')
+
+    def readvalue(self):
+        end = self.valueend()
+        value = json.loads(self.buf[self.pos:end])
+        self.pos = end
+        return value
+
+    def skipvalue(self):
+        self.pos = self.valueend(skip=True)
+
+
+def __streamselect(reader, path):
+    """yield values matching path from the value at the reader position"""
+    if len(path) == 0:
+        yield reader.readvalue()
+        return
+    token = path[0]
+    c = reader.peek()
+    if token == '*' or (token == '**' and c == '['):
+        if c != '[':
+            reader.skipvalue()
+            return
+        reader.expect('[')
+        if reader.peek() == ']':
+            reader.expect(']')
+            return
+        while True:
+            for item in __streamselect(reader, path if token == '**' else path[1:]):
+                yield item
+            if reader.expect(',]') == ']':
+                return
+    else:
+        if c != '{':
+            reader.skipvalue()
+            return
+        reader.expect('{')
+        if reader.peek() == '}':
+            reader.expect('}')
+            return
+        while True:
+            if reader.peek() != '"':
+                raise ValueError('expected property name')
+            key = reader.readvalue()
+            reader.expect(':')
+            if token == '**':
+                if len(path) > 1 and key == path[1]:
+                    subpath = path[2:]
+                else:
+                    subpath = path
+            elif key == token:
+                subpath = path[1:]
+            else:
+                subpath = None
+            if subpath is None:
+                reader.skipvalue()
+            else:
+                for item in __streamselect(reader, subpath):
+                    yield item
+            if reader.expect(',}') == '}':
+                return
+
+
+### retry policy
+def setRetryPolicy(method=None, retries=None, backoff=None, maxBackoff=None, retryOnError=None, retryOnTimeout=None, maxRetryTime=None, breakerThreshold=None, breakerCooldown=None):
+    """set retry policy for one method (or all methods) and circuit breaker settings"""
+    if method is None:
+        methods = APIMETHODS
+    else:
+        methods = [method]
+    for m in methods:
+        if retries is not None:
+            RETRYPOLICY[m]['retries'] = retries
+        if backoff is not None:
+            RETRYPOLICY[m]['backoff'] = backoff
+        if maxBackoff is not None:
+            RETRYPOLICY[m]['maxBackoff'] = maxBackoff
+        if retryOnError is not None:
+            RETRYPOLICY[m]['retryOnError'] = retryOnError
+        if retryOnTimeout is not None:
+            RETRYPOLICY[m]['retryOnTimeout'] = retryOnTimeout
+        if maxRetryTime is not None:
+            RETRYPOLICY[m]['maxRetryTime'] = maxRetryTime
+    if breakerThreshold is not None:
+        BREAKER['THRESHOLD'] = breakerThreshold
+    if breakerCooldown is not None:
+        BREAKER['COOLDOWN'] = breakerCooldown
+
+
+def __retrydelay(policy, attempt, response):
+    """jittered exponential backoff, or Retry-After if the cluster sent one"""
+    if response != '' and response.headers.get('Retry-After', None) is not None:
+        retryafter = response.headers['Retry-After']
+        try:
+            return min(max(float(retryafter), 0), 300)
+        except ValueError:
+            retrydate = parsedate_tz(retryafter)
+            if retrydate is not None:
+                return min(max(mktime_tz(retrydate) - time.time(), 0), 300)
+    delay = min(policy['maxBackoff'], policy['backoff'] * (2 ** (attempt - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def __apistat(stat):
+    APISTATSLOCK.acquire()
+    APISTATS[stat] += 1
+    APISTATSLOCK.release()
+
+
+### circuit breaker (per cluster)
+def __breakerkey(context, mcm=None, mcmv2=None, reportingv2=None):
+    if mcm is not None or mcmv2 is not None or reportingv2 is not None:
+        return context.get('APIROOTMCM', '')
+    cluster = context.get('APIROOT', '')
+    if 'accessClusterId' in context['HEADER']:
+        cluster = '%s (%s)' % (cluster, context['HEADER']['accessClusterId'])
+    return cluster
+
+
+def __breakeropen(breakerkey):
+    APISTATSLOCK.acquire()
+    try:
+        breaker = APISTATS['breakers'].get(breakerkey, None)
+        if breaker is None or breaker['openUntil'] is None:
+            return False
+        if time.time() >= breaker['openUntil']:
+            # half open, let one call through
+            breaker['openUntil'] = time.time() + BREAKER['COOLDOWN']
+            return False
+        APISTATS['breakerRejects'] += 1
+        return True
+    finally:
+        APISTATSLOCK.release()
+
+
+def __breakerupdate(breakerkey, failed):
+    APISTATSLOCK.acquire()
+    try:
+        breaker = APISTATS['breakers'].get(breakerkey, None)
+        if failed is False:
+            if breaker is not None:
+                breaker['failures'] = 0
+                breaker['openUntil'] = None
+            return
+        APISTATS['failures'] += 1
+        if breaker is None:
+            breaker = APISTATS['breakers'][breakerkey] = {'failures': 0, 'openUntil': None}
+        breaker['failures'] += 1
+        if breaker['failures'] >= BREAKER['THRESHOLD']:
+            if breaker['openUntil'] is None:
+                APISTATS['breakerTrips'] += 1
+            breaker['openUntil'] = time.time() + BREAKER['COOLDOWN']
+    finally:
+        APISTATSLOCK.release()
+
+
+### response cache
+def apiCache(enable=True, ttl=None, maxEntries=None, families=None, cacheDir=None):
+    """enable/disable the on-disk response cache for slow changing resources"""
+    APICACHE['ENABLED'] = enable
+    if ttl is not None:
+        APICACHE['TTL'] = ttl
+    if maxEntries is not None:
+        APICACHE['MAXENTRIES'] = maxEntries
+    if families is not None:
+        APICACHE['FAMILIES'] = families
+    if cacheDir is not None:
+        APICACHE['CACHEDIR'] = cacheDir
+    if enable is True and os.path.isdir(APICACHE['CACHEDIR']) is False:
+        try:
+            os.makedirs(APICACHE['CACHEDIR'])
+        except Exception:
+            APICACHE['ENABLED'] = False
+            __writelog('error creating cache folder %s' % APICACHE['CACHEDIR'])
+
+
+def apiCacheClear(context=None):
+    """remove cached responses (for one context, or all)"""
+    if context is not None:
+        pattern = os.path.join(APICACHE['CACHEDIR'], '%s-*.json' % __cachehash(__cachecluster(context)))
+    else:
+        pattern = os.path.join(APICACHE['CACHEDIR'], '*.json')
+    for cachefile in glob.glob(pattern):
+        try:
+            os.remove(cachefile)
+        except Exception:
+            pass
+
+
+def __cachehash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def __cachecluster(context):
+    """cluster identity of a context (host, helios cluster and impersonated tenant)"""
+    header = context['HEADER']
+    return '%s|%s|%s' % (context.get('APIROOT', ''), header.get('accessClusterId', ''), header.get('x-impersonate-tenant-id', ''))
+
+
+def __cachefamily(uri, v=1):
+    """resource family of a uri (e.g. protectionJobs/123?x=y -> protectionJobs)"""
+    path = uri.split('?')[0].strip('/')
+    if path.startswith('public/'):
+        path = path[7:]
+    parts = path.split('/')
+    if v == 2 and len(parts) > 1:
+        return '/'.join(parts[0:2])
+    return parts[0]
+
+
+def __cachefile(context, family, url):
+    cluster = __cachehash(__cachecluster(context))
+    return os.path.join(APICACHE['CACHEDIR'], '%s-%s-%s.json' % (cluster, __cachehash(family), __cachehash(url)))
+
+
+def __cacheread(cachefile):
+    try:
+        f = open(cachefile, 'r')
+        cached = json.load(f)
+        f.close()
+        os.utime(cachefile, None)  # LRU
+        return cached
+    except Exception:
+        return None
+
+
+def __cachewrite(cachefile, response, etag=None):
+    try:
+        tmpfile = '%s.%s.tmp' % (cachefile, os.getpid())
+        f = open(tmpfile, 'w')
+        json.dump({'expires': time.time() + APICACHE['TTL'], 'etag': etag, 'response': response}, f)
+        f.close()
+        if os.path.exists(cachefile):
+            os.remove(cachefile)
+        os.rename(tmpfile, cachefile)
+    except Exception:
+        return
+    # evict least recently used entries
+    try:
+        cachefiles = glob.glob(os.path.join(APICACHE['CACHEDIR'], '*.json'))
+        if len(cachefiles) > APICACHE['MAXENTRIES']:
+            cachefiles.sort(key=lambda c: os.path.getmtime(c))
+            for oldfile in cachefiles[0:len(cachefiles) - APICACHE['MAXENTRIES']]:
+                os.remove(oldfile)
+    except Exception:
+        pass
+
+
+def __cacheinvalidate(context, family):
+    pattern = os.path.join(APICACHE['CACHEDIR'], '%s-%s-*.json' % (__cachehash(__cachecluster(context)), __cachehash(family)))
+    for cachefile in glob.glob(pattern):
+        try:
+            os.remove(cachefile)
+        except Exception:
+            pass
+
+
+### start time and unique id of a protection run
+def runInfo(run, v=1):
+    """return (startTimeUsecs, runId) of a v1 or v2 (v=2) protection run"""
+    if v == 2:
+        runid = run['id']
+        for key in ['localBackupInfo', 'originalBackupInfo']:
+            if key in run and 'startTimeUsecs' in run[key]:
+                return run[key]['startTimeUsecs'], runid
+        if 'archivalInfo' in run and len(run['archivalInfo'].get('archivalTargetResults', [])) > 0:
+            return run['archivalInfo']['archivalTargetResults'][0]['startTimeUsecs'], runid
+        return int(runid.split(':')[-1]), runid
+    if 'stats' in run['backupRun'] and 'startTimeUsecs' in run['backupRun']['stats']:
+        startTimeUsecs = run['backupRun']['stats']['startTimeUsecs']
+    else:
+        startTimeUsecs = run['copyRun'][0]['runStartTimeUsecs']
+    return startTimeUsecs, run['backupRun'].get('jobRunId', startTimeUsecs)
+
+
+### protection run pagination
+def iterRuns(jobId, startTimeUsecs=None, endTimeUsecs=None, numRuns=100, v=1, params='', prefetch=True, context=None):
+    """yield protection runs (newest first), paging back by endTimeUsecs
+
+    runs older than startTimeUsecs stop the walk, runs repeated across pages are only
+    yielded once, and the next page is fetched in the background while the caller
+    processes the current one. params are appended to the query (e.g. '&excludeTasks=true')
+
+    if a page can not be retrieved, the error is set on the caller's context (see
+    LAST_API_ERROR) and RuntimeError is raised, rather than ending the walk early
+    """
+    callercontext = __context(context)
+    context = getContext(context)  # not affected by later heliosCluster calls
+    if endTimeUsecs is None:
+        endTimeUsecs = dateToUsecs(datetime.now()) + 86400000000
+
+    def getpage(endUsecs):
+        """returns (runs, error)"""
+        if v == 2:
+            page = api('get', 'data-protect/protection-groups/%s/runs?numRuns=%s&endTimeUsecs=%s%s' % (jobId, numRuns, endUsecs, params), v=2, context=context)
+            if page == '':
+                return [], None
+            if isinstance(page, dict) and 'error' not in page:
+                return page.get('runs', []), None
+        else:
+            page = api('get', 'protectionRuns?jobId=%s&numRuns=%s&endTimeUsecs=%s%s' % (jobId, numRuns, endUsecs, params), context=context)
+            if page == '':
+                return [], None
+            if isinstance(page, list):
+                return page, None
+        error = context.get('LAST_ERROR', 'OK')
+        if isinstance(page, dict) and 'error' in page:
+            error = page['error']
+        if error == 'OK':
+            error = 'unexpected response'
+        return None, error
+
+    def fetch(endUsecs):
+        result = {}
+        if prefetch is not True:
+            result['page'] = getpage(endUsecs)
+            return lambda: result['page']
+        thread = threading.Thread(target=lambda: result.update({'page': getpage(endUsecs)}))
+        thread.daemon = True
+        thread.start()
+
+        def wait():
+            thread.join()
+            return result.get('page', (None, 'page request did not complete'))
+        return wait
+
+    lastpageids = set()
+    nextpage = fetch(endTimeUsecs)
+    while nextpage is not None:
+        (runs, error) = nextpage()
+        nextpage = None
+        if runs is None:
+            __seterror(callercontext, 'failed to get runs for job %s: %s' % (jobId, error))
+            raise RuntimeError(LAST_API_ERROR(context=callercontext))
+        pageids = set()
+        pageruns = []
+        oldestUsecs = None
+        for run in runs:
+            runStartUsecs, runid = runInfo(run, v)
+            if oldestUsecs is None or runStartUsecs < oldestUsecs:
+                oldestUsecs = runStartUsecs
+            if runid in lastpageids or runid in pageids:
+                continue
+            pageids.add(runid)
+            if startTimeUsecs is not None and runStartUsecs < startTimeUsecs:
+                continue
+            pageruns.append(run)
+        # fetch the next page while the caller works on this one
+        if len(pageids) > 0 and oldestUsecs is not None and oldestUsecs <= endTimeUsecs:
+            if startTimeUsecs is None or oldestUsecs >= startTimeUsecs:
+                endTimeUsecs = oldestUsecs - 1
+                nextpage = fetch(endTimeUsecs)
+        lastpageids = pageids
+        for run in pageruns:
+            yield run
+
+
+### protection source index
+def indexSources(sources):
+    """index a protectionSources tree in one pass
+
+    returns {'nodes': id -> node, 'parents': id -> parent id, 'names': lower case name -> [ids],
+    'roots': environment -> [root ids]}. nodes are stored without their child 'nodes' list, so
+    sources can be a generator (e.g. apiStream('get', 'protectionSources', '[*]')) and each
+    subtree is released once indexed
+    """
+    index = {'nodes': {}, 'parents': {}, 'names': {}, 'roots': {}}
+    if sources is None:
+        return index
+    if isinstance(sources, dict):
+        sources = [sources]
+    for root in sources:
+        if 'protectionSource' not in root:
+            continue
+        rootSource = root['protectionSource']
+        index['roots'].setdefault(rootSource.get('environment'), []).append(rootSource['id'])
+        stack = [(root, None)]
+        while len(stack) > 0:
+            (node, parentId) = stack.pop()
+            source = node['protectionSource']
+            index['nodes'][source['id']] = dict((k, v) for (k, v) in node.items() if k != 'nodes')
+            if parentId is not None:
+                index['parents'][source['id']] = parentId
+            index['names'].setdefault(source.get('name', '').lower(), []).append(source['id'])
+            for child in node.get('nodes', []):
+                if 'protectionSource' in child:
+                    stack.append((child, source['id']))
+    return index
+
+
+### time series stats for many entities and metrics
+def timeSeriesStats(stats, startTimeMsecs, endTimeMsecs=None, rollupFunction='latest', rollupIntervalSecs=86400, workers=8, asFrame=False, context=None):
+    """get many statistics/timeSeriesStats series at once, aligned by timestamp
+
+    stats is a list of (schemaName, metricName, entityId) tuples, or dicts with those keys and
+    optional entityParam (default entityIdList), rollupFunction, rollupIntervalSecs, params
+    and key. Calls run in parallel (workers) and identical queries are only made once.
+    returns {'timestamps': [msecs, ...], 'series': {key: [value or None per timestamp]}} where
+    key defaults to (schemaName, metricName, entityId). asFrame=True returns a pandas DataFrame
+    """
+    THISCONTEXT = getContext(context)
+    if endTimeMsecs is None:
+        endTimeMsecs = int(dateToUsecs(datetime.now()) / 1000)
+    queries = {}
+    for stat in stats:
+        if not isinstance(stat, dict):
+            stat = {'schemaName': stat[0], 'metricName': stat[1], 'entityId': stat[2]}
+        key = stat.get('key', (stat['schemaName'], stat['metricName'], stat['entityId']))
+        queries[key] = 'statistics/timeSeriesStats?schemaName=%s&metricName=%s&%s=%s&startTimeMsecs=%s&endTimeMsecs=%s&rollupFunction=%s&rollupIntervalSecs=%s%s' % (
+            stat['schemaName'], stat['metricName'], stat.get('entityParam', 'entityIdList'), stat['entityId'], startTimeMsecs, endTimeMsecs,
+            stat.get('rollupFunction', rollupFunction), stat.get('rollupIntervalSecs', rollupIntervalSecs), stat.get('params', ''))
+    uris = {}
+    for (key, uri) in queries.items():
+        uris.setdefault(uri, []).append(key)
+    points = {}
+    for (uri, response, error) in parallelMap(lambda uri: api('get', uri, context=THISCONTEXT), list(uris), workers=workers, ordered=False):
+        datapoints = {}
+        if response is not None and isinstance(response, dict):
+            for datapoint in response.get('dataPointVec', []):
+                data = datapoint.get('data', {})
+                datapoints[datapoint['timestampMsecs']] = data.get('int64Value', data.get('doubleValue'))
+        points[uri] = datapoints
+    timestamps = sorted(set([t for datapoints in points.values() for t in datapoints]))
+    series = {}
+    for (uri, keys) in uris.items():
+        datapoints = points.get(uri, {})
+        for key in keys:
+            series[key] = [datapoints.get(t) for t in timestamps]
+    if asFrame is True:
+        import pandas
+        return pandas.DataFrame(series, index=timestamps)
+    return {'timestamps': timestamps, 'series': series}
+
+
 ### convert usecs to date string
 def usecsToDate(uedate, fmt='%Y-%m-%d %H:%M:%S'):
     """Convert Unix Epoc Microseconds to Date String"""
@@ -572,41 +1650,87 @@ def storePasswordFromInput(vip, username, password, domain='local', useApiKey=Fa
         print('error trying to store password')
 
 
-lastapierrorusecs = dateToUsecs()
-lastapierror = ''
+LOGQUEUE = queue.Queue(maxsize=1000)
+LOGSTATE = {'thread': None, 'dropped': 0}
+LOGLOCK = threading.Lock()
+LOGMAXSIZE = 1048576
+LOGKEEP = 5  # rotated logs to keep
+LOGDEDUPSECS = 5
 
 
-### debug log
+### debug log (queued, written by a background thread)
 def __writelog(logmessage):
-    global lastapierrorusecs
-    global lastapierror
-    apidate = datetime.now()
-    apierrordatestring = apidate.strftime("%Y-%m-%d-%H-%M-%S")
-    apierrorusecs = dateToUsecs(apidate)
-
+    frame = sys._getframe()
+    while frame.f_back is not None:
+        frame = frame.f_back
+    callstack = 'File "%s", line %s, in %s %s' % (frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name,
+                                                 linecache.getline(frame.f_code.co_filename, frame.f_lineno).strip())
+    if LOGSTATE['thread'] is None:
+        LOGLOCK.acquire()
+        if LOGSTATE['thread'] is None:
+            __startlogwriter()
+        LOGLOCK.release()
     try:
-        # rotate log
-        if os.path.exists(LOGFILE):
-            logsize = os.path.getsize(LOGFILE)
-            if logsize > 1048576:
-                os.rename(LOGFILE, '%s-%s.txt' % (LOGFILE, apierrordatestring))
-    except:
-        pass
+        LOGQUEUE.put_nowait((datetime.now(), '%s :: %s' % (callstack, logmessage)))
+    except queue.Full:
+        LOGSTATE['dropped'] += 1
+
+
+def __startlogwriter():
+    thread = threading.Thread(target=__logwriter)
+    thread.daemon = True
+    LOGSTATE['thread'] = thread
+    thread.start()
+    atexit.register(__stoplogwriter)
 
-    # avoid race condition
-    callstack = traceback.format_stack()[0].replace('\n', ' ').strip()
-    apierror = '%s :: %s' % (callstack, logmessage)
-    if apierror == lastapierror and apierrorusecs < (lastapierrorusecs + 5000000):
-        time.sleep(5)
+
+def __stoplogwriter():
     try:
-        # output log message
-        debuglog = open(LOGFILE, 'a')
-        debuglog.write('%s: %s\n' % (apierrordatestring, apierror))
-        debuglog.close()
-    except:
+        LOGQUEUE.put((None, None), timeout=1)
+        LOGSTATE['thread'].join(2)
+    except Exception:
         pass
-    lastapierrorusecs = apierrorusecs
-    lastapierror = apierror
+
+
+def __logwriter():
+    lastmessage = None
+    lasttime = None
+    repeated = 0
+    while True:
+        (logtime, logmessage) = LOGQUEUE.get()
+        lines = []
+        if logmessage is not None and logmessage == lastmessage and (logtime - lasttime).total_seconds() < LOGDEDUPSECS:
+            # deduplicate repeated errors
+            repeated += 1
+            lasttime = logtime
+            continue
+        if repeated > 0:
+            lines.append('%s: (previous message repeated %s times)\n' % (lasttime.strftime("%Y-%m-%d-%H-%M-%S"), repeated))
+            repeated = 0
+        if LOGSTATE['dropped'] > 0:
+            lines.append('%s: (%s log messages dropped)\n' % (datetime.now().strftime("%Y-%m-%d-%H-%M-%S"), LOGSTATE['dropped']))
+            LOGSTATE['dropped'] = 0
+        if logmessage is not None:
+            lines.append('%s: %s\n' % (logtime.strftime("%Y-%m-%d-%H-%M-%S"), logmessage))
+            lastmessage = logmessage
+            lasttime = logtime
+        try:
+            # rotate log
+            if os.path.exists(LOGFILE) and os.path.getsize(LOGFILE) > LOGMAXSIZE:
+                os.rename(LOGFILE, '%s-%s.txt' % (LOGFILE, datetime.now().strftime("%Y-%m-%d-%H-%M-%S")))
+                # remove the oldest rotated logs (names sort by date)
+                for oldlog in sorted(glob.glob('%s-*.txt' % LOGFILE))[:-LOGKEEP]:
+                    os.remove(oldlog)
+        except Exception:
+            pass
+        try:
+            debuglog = open(LOGFILE, 'a')
+            debuglog.write(''.join(lines))
+            debuglog.close()
+        except Exception:
+            pass
+        if logmessage is None:
+            return
 
 
 ### display json/dictionary as formatted text
@@ -621,21 +1745,29 @@ def display(myjson):
         print(json.dumps(myjson, sort_keys=True, indent=4, separators=(', ', ': ')))
 
 
-def fileDownload(uri, fileName, v=1):
+def fileDownload(uri, fileName, v=1, context=None):
     """download file"""
-    if COHESITY_API['AUTHENTICATED'] is False:
+    THISCONTEXT = __context(context)
+    if THISCONTEXT['AUTHENTICATED'] is False:
         return "Not Connected"
+    session = __getsession(THISCONTEXT)
+    starttime = time.time()
     if v == 2:
-        response = requests.get(COHESITY_API['APIROOTv2'] + uri, headers=COHESITY_API['HEADER'], verify=False, timeout=300, stream=True)
+        response = session.get(THISCONTEXT['APIROOTv2'] + uri, headers=THISCONTEXT['HEADER'], verify=False, timeout=300, stream=True)
     else:
         if uri[0] != '/':
             uri = '/public/' + uri
-        response = requests.get(COHESITY_API['APIROOT'] + uri, headers=COHESITY_API['HEADER'], verify=False, timeout=300, stream=True)
+        response = session.get(THISCONTEXT['APIROOT'] + uri, headers=THISCONTEXT['HEADER'], verify=False, timeout=300, stream=True)
     f = open(fileName, 'wb')
+    downloaded = 0
     for chunk in response.iter_content(chunk_size=1048576):
         if chunk:
             f.write(chunk)
+            downloaded += len(chunk)
     f.close()
+    response.close()
+    if APIMETRICS['ENABLED'] is True:
+        __apimetric('download', uri, response.status_code, time.time() - starttime, downloaded)
 
 
 def showProps(obj, parent='myobject', search=None):
@@ -655,14 +1787,20 @@ def showProps(obj, parent='myobject', search=None):
             print("%s = %s" % (parent, obj))
 
 
-def getContext():
-    return COHESITY_API.copy()
+def getContext(context=None):
+    """copy of a context (headers are copied, the connection pool is shared)"""
+    THISCONTEXT = __context(context)
+    __getsession(THISCONTEXT)
+    contextcopy = THISCONTEXT.copy()
+    contextcopy['HEADER'] = dict(THISCONTEXT['HEADER'])
+    return contextcopy
 
 
 def setContext(context):
     global COHESITY_API
     if isinstance(context, dict) and 'HEADER' in context and 'APIROOT' in context and 'APIROOTv2' in context:
         COHESITY_API = context.copy()
+        COHESITY_API['HEADER'] = dict(context['HEADER'])
     else:
         print('Invalid context')
 
@@ -0,0 +1,420 @@
+#!/usr/bin/env python
+"""Cohesity Groot (Reporting Database) Runner Module - 2026.10.18"""
+
+##########################################################################################
+# Change Log
+# ==========
+#
+# 2026.10.18 - initial release
+#
+##########################################################################################
+# Install Notes
+# =============
+#
+# Requires psycopg2 (pip install psycopg2-binary), and pyhesity.py in the same folder
+#
+# The reporting database connection info comes from api('get', 'postgres'). If the
+# first node listed does not answer, the next one is tried. GrootRunner keeps a small
+# connection pool per cluster and runs the same query on many clusters at the same
+# time, yielding rows (tagged with the cluster name) as they arrive. GrootSummary keeps
+# report rows and daily rollups in a local SQLite database, so later runs only query
+# the runs that ended (or changed) since the last run.
+#
+##########################################################################################
+
+import json
+import os
+import sqlite3
+import threading
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+import psycopg2
+from psycopg2 import pool as pgpool
+from pyhesity import api, getContext, heliosClusters, usecsToDate, CONFIGDIR
+
+__all__ = ['grootConnect',
+           'grootPool',
+           'GrootRunner',
+           'GrootSummary']
+
+CONNECTTIMEOUT = 10  # seconds to wait for a node before trying the next one
+SUMMARYFILE = os.path.join(CONFIGDIR, 'grootsummary.db')
+RESCANUSECS = 3600000000  # look back an hour for rows written to groot after the run end time
+
+
+def _grootnodes(context=None):
+    """connection info of the reporting database (one entry per node)"""
+    reporting = api('get', 'postgres', quiet=True, context=context)
+    if not isinstance(reporting, list):
+        return []
+    return reporting
+
+
+def _connectargs(node, connectTimeout):
+    return {'host': node['nodeIp'], 'port': node['port'], 'database': 'postgres', 'user': node['defaultUsername'],
+            'password': node['defaultPassword'], 'connect_timeout': connectTimeout}
+
+
+### connect to the reporting database of the connected cluster
+def grootConnect(context=None, connectTimeout=CONNECTTIMEOUT):
+    """returns a psycopg2 connection (or None if no node answers)"""
+    for node in _grootnodes(context):
+        try:
+            return psycopg2.connect(**_connectargs(node, connectTimeout))
+        except psycopg2.OperationalError:
+            continue
+    return None
+
+
+### connection pool for the reporting database of the connected cluster
+def grootPool(context=None, minConn=1, maxConn=4, connectTimeout=CONNECTTIMEOUT, nodes=None):
+    """returns a psycopg2 ThreadedConnectionPool (or None if no node answers)"""
+    if nodes is None:
+        nodes = _grootnodes(context)
+    for node in nodes:
+        try:
+            return pgpool.ThreadedConnectionPool(minConn, maxConn, **_connectargs(node, connectTimeout))
+        except psycopg2.OperationalError:
+            continue
+    return None
+
+
+class GrootRunner(object):
+    """run the same groot query on many clusters in parallel
+
+    runner = GrootRunner(['cluster1', 'cluster2'])  # helios/mcm cluster names
+    runner = GrootRunner()  # every helios connected cluster, or the connected cluster
+    for (clusterName, row) in runner.query(sql):
+        ...
+    print(runner.columns, runner.errors)
+    runner.close()
+
+    Rows from different clusters arrive interleaved. The query must be a single SELECT
+    (it runs in a server side cursor, fetching itersize rows at a time).
+    """
+
+    def __init__(self, clusters=None, workers=4, poolSize=2, connectTimeout=CONNECTTIMEOUT, context=None):
+        self.workers = workers
+        self.poolSize = poolSize
+        self.connectTimeout = connectTimeout
+        self.columns = None
+        self.errors = {}
+        self.pools = {}
+        self.nodes = {}
+        self.lock = threading.Lock()
+        context = getContext(context)
+        self.clusters = []
+        if clusters is None or len(clusters) == 0:
+            if 'HELIOSCLUSTERS' in context and 'accessClusterId' not in context['HEADER']:
+                clusters = heliosClusters(context=context)
+            else:
+                cluster = api('get', 'cluster', context=context)
+                self.clusters.append((cluster['name'], context))
+        if clusters is not None:
+            connectedclusters = heliosClusters(context=context)
+            for cluster in clusters:
+                if not isinstance(cluster, dict):
+                    accessCluster = [c for c in connectedclusters if c['name'].lower() == str(cluster).lower()]
+                    if not accessCluster:
+                        self.errors[cluster] = 'Cluster %s not connected to Helios' % cluster
+                        continue
+                    cluster = accessCluster[0]
+                clustercontext = getContext(context)
+                clustercontext['HEADER']['accessClusterId'] = str(cluster['clusterId'])
+                self.clusters.append((cluster['name'], clustercontext))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def clusterNames(self):
+        return [name for (name, context) in self.clusters]
+
+    def __pool(self, name, context):
+        """connection pool of a cluster (created on first use)"""
+        with self.lock:
+            if name not in self.pools:
+                if name not in self.nodes:
+                    self.nodes[name] = _grootnodes(context)
+                self.pools[name] = None
+                # nodes that do not answer are dropped, so the pool is always connected to nodes[0]
+                while len(self.nodes[name]) > 0:
+                    self.pools[name] = grootPool(minConn=1, maxConn=self.poolSize, connectTimeout=self.connectTimeout, nodes=self.nodes[name][:1])
+                    if self.pools[name] is not None:
+                        break
+                    self.nodes[name] = self.nodes[name][1:]
+            return self.pools[name]
+
+    def __failover(self, name):
+        """drop the pool of a cluster and the node it was connected to, returns False if there is no other node"""
+        with self.lock:
+            thispool = self.pools.pop(name, None)
+            if thispool is not None:
+                thispool.closeall()
+            self.nodes[name] = self.nodes.get(name, [])[1:]
+            return len(self.nodes[name]) > 0
+
+    def __run(self, name, context, sql, params, itersize, results, stop):
+        """run the query on one cluster, putting batches of rows on the results queue"""
+        emitted = False
+        while True:
+            thispool = self.__pool(name, context)
+            if thispool is None:
+                return 'statistics DB not found on %s' % name
+            try:
+                conn = thispool.getconn()
+            except psycopg2.OperationalError as e:
+                if self.__failover(name):
+                    continue
+                return '%s' % e
+            try:
+                cur = conn.cursor(name='grootrunner')
+                cur.execute(sql, params)
+                while not stop.is_set():
+                    rows = cur.fetchmany(itersize)
+                    if self.columns is None and cur.description is not None:
+                        self.columns = [desc[0] for desc in cur.description]
+                    if not rows:
+                        break
+                    results.put(('rows', name, rows))
+                    emitted = True
+                cur.close()
+                conn.rollback()
+                thispool.putconn(conn)
+                return None
+            except psycopg2.OperationalError as e:
+                # node went away, try the next node unless rows were already returned
+                thispool.putconn(conn, close=True)
+                if emitted is False and self.__failover(name):
+                    continue
+                return '%s' % e
+            except Exception as e:
+                conn.rollback()
+                thispool.putconn(conn)
+                return '%s' % e
+
+    def query(self, sql, params=None, itersize=10000, clusterParams=None):
+        """yield (clusterName, row) from every cluster as the rows arrive
+
+        clusterParams ({clusterName: params}) overrides params for some clusters
+        """
+        sql = sql.strip().rstrip(';')
+        self.columns = None
+        if clusterParams is None:
+            clusterParams = {}
+        todo = queue.Queue()
+        for cluster in self.clusters:
+            todo.put(cluster)
+        results = queue.Queue(maxsize=self.workers * 4)
+        stop = threading.Event()
+
+        def worker():
+            while not stop.is_set():
+                try:
+                    (name, context) = todo.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    error = self.__run(name, context, sql, clusterParams.get(name, params), itersize, results, stop)
+                except Exception as e:
+                    error = '%s' % e
+                results.put(('done', name, error))
+
+        for i in range(max(1, min(self.workers, len(self.clusters)))):
+            thread = threading.Thread(target=worker)
+            thread.daemon = True
+            thread.start()
+
+        try:
+            finished = 0
+            while finished < len(self.clusters):
+                (status, name, result) = results.get()
+                if status == 'done':
+                    finished += 1
+                    if result is not None:
+                        self.errors[name] = result
+                    continue
+                for row in result:
+                    yield (name, row)
+        finally:
+            # stop the workers if the caller stops early
+            stop.set()
+            while True:
+                try:
+                    results.get_nowait()
+                except queue.Empty:
+                    break
+
+    def close(self):
+        with self.lock:
+            for thispool in self.pools.values():
+                if thispool is not None:
+                    thispool.closeall()
+            self.pools = {}
+
+
+class GrootSummary(object):
+    """local store of groot report rows, with daily rollups per job, object and status
+
+    summary = GrootSummary()  # or GrootSummary('/path/to/grootsummary.db')
+    fromUsecs = summary.start('soxReport', clusterName, startTimeUsecs)
+    ...query groot for (runId, runState) of runs that ended between startTimeUsecs and fromUsecs...
+    staleRuns = summary.staleRuns('soxReport', clusterName, runStates)
+    for row in ...query groot for runs that ended at or after fromUsecs, or are in staleRuns...:
+        summary.add('soxReport', clusterName, record)
+    summary.finish('soxReport', clusterName, startTimeUsecs)
+    for row in summary.rows('soxReport', clusterName, startTimeUsecs):
+        ...
+
+    records are dicts with runId, runEndUsecs (0 while the run is running), runState (the
+    values of the run that can change after it ends, e.g. snapshot expiry), startTimeUsecs,
+    endTimeUsecs, jobName, objectName, status, bytes, durationUsecs and row (the values of
+    the report row). The first sync fetches the whole range. Later syncs fetch runs that
+    ended since the newest stored run end (less rescanUsecs), runs that were still running,
+    and runs whose runState changed. The rows of a run are replaced whenever it is fetched.
+    """
+
+    def __init__(self, dbFile=None):
+        if dbFile is None:
+            dbFile = SUMMARYFILE
+        self.dbFile = dbFile
+        self.pending = []
+        self.synced = {}
+        self.db = sqlite3.connect(dbFile)
+        self.db.execute('''CREATE TABLE IF NOT EXISTS rows (
+            cluster TEXT, report TEXT, runId TEXT, runEndUsecs INTEGER, runState TEXT,
+            startTimeUsecs INTEGER, endTimeUsecs INTEGER, day TEXT, jobName TEXT, objectName TEXT,
+            status TEXT, bytes INTEGER, durationUsecs INTEGER, row TEXT)''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS rowsbyrun ON rows (cluster, report, runId)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS rowsbystart ON rows (cluster, report, startTimeUsecs)')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS daily (
+            cluster TEXT, report TEXT, day TEXT, jobName TEXT, objectName TEXT, status TEXT,
+            runs INTEGER, bytes INTEGER, durationUsecs INTEGER,
+            PRIMARY KEY (cluster, report, day, jobName, objectName, status))''')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS marks (
+            cluster TEXT, report TEXT, lowWaterUsecs INTEGER, highWaterUsecs INTEGER,
+            PRIMARY KEY (cluster, report))''')
+        self.db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def start(self, report, cluster, startTimeUsecs, rescanUsecs=RESCANUSECS, refresh=False):
+        """returns the run end time to query groot from"""
+        key = (cluster, report)
+        if refresh is True:
+            self.clear(report, cluster)
+        self.synced[key] = {'runs': set(), 'day': None}
+        mark = self.db.execute('SELECT lowWaterUsecs, highWaterUsecs FROM marks WHERE cluster=? AND report=?', key).fetchone()
+        if mark is None or startTimeUsecs < mark[0]:
+            return startTimeUsecs
+        return max(mark[0], mark[1] - rescanUsecs)
+
+    def staleRuns(self, report, cluster, runStates):
+        """stored runs to fetch again: runs that were still running, and runs whose state changed
+
+        runStates is {runId: runState} of the stored range, as returned by groot now
+        """
+        runStates = dict(('%s' % runId, '%s' % runState) for (runId, runState) in runStates.items())
+        stale = set()
+        query = 'SELECT DISTINCT runId, runEndUsecs, runState FROM rows WHERE cluster=? AND report=?'
+        for (runId, runEndUsecs, runState) in self.db.execute(query, (cluster, report)):
+            if runEndUsecs == 0 or (runId in runStates and runStates[runId] != runState):
+                stale.add(runId)
+        return sorted(stale)
+
+    def __flush(self):
+        if len(self.pending) > 0:
+            self.db.executemany('INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', self.pending)
+            self.pending = []
+
+    def __touch(self, key, day):
+        if day is not None and (self.synced[key]['day'] is None or day < self.synced[key]['day']):
+            self.synced[key]['day'] = day
+
+    def add(self, report, cluster, record):
+        """store a report row (see the class docstring for the record keys)"""
+        key = (cluster, report)
+        runId = '%s' % record['runId']
+        day = usecsToDate(record['startTimeUsecs'], '%Y-%m-%d')
+        if runId not in self.synced[key]['runs']:
+            # first row of this run in this sync, replace the stored rows of the run
+            self.synced[key]['runs'].add(runId)
+            self.__touch(key, self.db.execute('SELECT MIN(day) FROM rows WHERE cluster=? AND report=? AND runId=?', key + (runId,)).fetchone()[0])
+            self.db.execute('DELETE FROM rows WHERE cluster=? AND report=? AND runId=?', key + (runId,))
+        self.__touch(key, day)
+        self.pending.append(key + (runId, record.get('runEndUsecs') or 0, '%s' % record.get('runState'),
+                                   record['startTimeUsecs'], record.get('endTimeUsecs'), day, record.get('jobName'),
+                                   record.get('objectName'), record.get('status'), record.get('bytes') or 0,
+                                   record.get('durationUsecs') or 0, json.dumps(record['row'], default=str)))
+        if len(self.pending) >= 1000:
+            self.__flush()
+
+    def finish(self, report, cluster, startTimeUsecs):
+        """update the daily rollups of the days that changed, and the stored range"""
+        key = (cluster, report)
+        self.__flush()
+        mark = self.db.execute('SELECT lowWaterUsecs, highWaterUsecs FROM marks WHERE cluster=? AND report=?', key).fetchone()
+        lowWater = startTimeUsecs
+        if mark is not None and mark[0] < lowWater:
+            lowWater = mark[0]
+        highWater = self.db.execute('SELECT MAX(runEndUsecs) FROM rows WHERE cluster=? AND report=?', key).fetchone()[0]
+        if highWater is None or highWater < lowWater:
+            highWater = lowWater
+        day = self.synced.get(key, {}).get('day')
+        if day is not None:
+            self.db.execute('DELETE FROM daily WHERE cluster=? AND report=? AND day >= ?', key + (day,))
+            self.db.execute('''INSERT INTO daily
+                SELECT cluster, report, day, jobName, objectName, status, COUNT(*), SUM(bytes), SUM(durationUsecs)
+                FROM rows WHERE cluster=? AND report=? AND day >= ?
+                GROUP BY cluster, report, day, jobName, objectName, status''', key + (day,))
+        self.db.execute('INSERT OR REPLACE INTO marks VALUES (?, ?, ?, ?)', key + (lowWater, highWater))
+        self.db.commit()
+
+    def rows(self, report, cluster, startTimeUsecs=None, endTimeUsecs=None, by='startTimeUsecs'):
+        """yield stored report rows (newest first), filtered and ordered by startTimeUsecs or endTimeUsecs"""
+        if by not in ['startTimeUsecs', 'endTimeUsecs']:
+            raise ValueError('by must be startTimeUsecs or endTimeUsecs')
+        query = 'SELECT row FROM rows WHERE cluster=? AND report=?'
+        values = (cluster, report)
+        if startTimeUsecs is not None:
+            query += ' AND %s >= ?' % by
+            values += (startTimeUsecs,)
+        if endTimeUsecs is not None:
+            query += ' AND %s <= ?' % by
+            values += (endTimeUsecs,)
+        for row in self.db.execute(query + ' ORDER BY %s DESC, rowid' % by, values):
+            yield json.loads(row[0])
+
+    def daily(self, report, cluster, startDay=None):
+        """yield the daily rollups ({day, jobName, objectName, status, runs, bytes, durationUsecs})"""
+        query = 'SELECT day, jobName, objectName, status, runs, bytes, durationUsecs FROM daily WHERE cluster=? AND report=?'
+        values = (cluster, report)
+        if startDay is not None:
+            query += ' AND day >= ?'
+            values += (startDay,)
+        for row in self.db.execute(query + ' ORDER BY day, jobName, objectName, status', values):
+            yield dict(zip(['day', 'jobName', 'objectName', 'status', 'runs', 'bytes', 'durationUsecs'], row))
+
+    def clear(self, report, cluster=None):
+        """forget stored rows of a report (for one cluster, or every cluster)"""
+        for table in ['rows', 'daily', 'marks']:
+            if cluster is None:
+                self.db.execute('DELETE FROM %s WHERE report=?' % table, (report,))
+            else:
+                self.db.execute('DELETE FROM %s WHERE cluster=? AND report=?' % table, (cluster, report))
+        self.db.commit()
+
+    def close(self):
+        if self.db is not None:
+            self.__flush()
+            self.db.commit()
+            self.db.close()
+            self.db = None
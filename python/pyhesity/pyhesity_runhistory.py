@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+"""Cohesity Protection Run History Store - 2026.10.18"""
+
+##########################################################################################
+# Change Log
+# ==========
+#
+# 2026.10.18 - initial release
+#
+##########################################################################################
+# Install Notes
+# =============
+#
+# Place pyhesity_runhistory.py in the same folder as pyhesity.py and the report script
+#
+# Protection runs are kept in a local SQLite database, keyed by cluster, job and run.
+# Each call only downloads runs newer than the stored high-water mark (plus runs that
+# were still running last time) and then answers from the database, so a daily 90 day
+# report downloads a handful of pages instead of the whole 90 days.
+#
+# Finished runs are not downloaded again, so later changes to an old run (legal hold,
+# manual expiration, new archive copies) are only seen after clear() or refresh=True,
+# so reports on those fields should not use the store.
+#
+##########################################################################################
+
+import json
+import os
+import sqlite3
+from pyhesity import iterRuns, runInfo, getContext, CONFIGDIR
+
+__all__ = ['RunHistory']
+
+RUNHISTORYFILE = os.path.join(CONFIGDIR, 'runhistory.db')
+
+# run states (v1 and v2) that can still change
+RUNNINGSTATES = ['kAccepted', 'kRunning', 'kCanceling', 'kOnHold', 'kFinalizing', 'kPaused', 'kQueued',
+                 'Accepted', 'Running', 'Canceling', 'OnHold', 'Finalizing', 'Paused', 'Queued']
+
+
+def _runstates(run, v=1):
+    """status of the backup and of each copy task of a run"""
+    states = []
+    if v == 2:
+        for key in ['localBackupInfo', 'originalBackupInfo']:
+            if key in run:
+                states.append(run[key].get('status'))
+        for (key, results) in [('archivalInfo', 'archivalTargetResults'), ('replicationInfo', 'replicationTargetResults'), ('cloudSpinInfo', 'cloudSpinTargetResults')]:
+            if key in run:
+                states += [result.get('status') for result in run[key].get(results, [])]
+    else:
+        if 'backupRun' in run:
+            states.append(run['backupRun'].get('status'))
+        states += [copyRun.get('status') for copyRun in run.get('copyRun', [])]
+    return states
+
+
+def _runfinished(run, v=1):
+    return len([state for state in _runstates(run, v) if state in RUNNINGSTATES]) == 0
+
+
+class RunHistory(object):
+    """local store of protection runs
+
+    history = RunHistory()  # or RunHistory('/path/to/runhistory.db')
+    for run in history.runs(job['id'], startTimeUsecs=timeAgo(90, 'days'), v=2):
+        ...
+    history.close()
+
+    runs() takes the same parameters as iterRuns (and yields runs newest first), so a
+    script can use either one. Runs fetched with different v/params are stored separately.
+    """
+
+    def __init__(self, dbFile=None, context=None):
+        if dbFile is None:
+            dbFile = RUNHISTORYFILE
+        self.dbFile = dbFile
+        self.context = context
+        self.downloaded = 0
+        self.db = sqlite3.connect(dbFile)
+        self.db.execute('''CREATE TABLE IF NOT EXISTS runs (
+            cluster TEXT, jobId TEXT, view TEXT, runId TEXT,
+            startTimeUsecs INTEGER, finished INTEGER, run TEXT,
+            PRIMARY KEY (cluster, jobId, view, runId))''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS runsbystart ON runs (cluster, jobId, view, startTimeUsecs)')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS marks (
+            cluster TEXT, jobId TEXT, view TEXT,
+            highWaterUsecs INTEGER, lowWaterUsecs INTEGER,
+            PRIMARY KEY (cluster, jobId, view))''')
+        self.db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def __cluster(self, context):
+        """cluster identity of a context (host, helios cluster and impersonated tenant)"""
+        header = context['HEADER']
+        return '%s|%s|%s' % (context.get('APIROOT', ''), header.get('accessClusterId', ''), header.get('x-impersonate-tenant-id', ''))
+
+    def __store(self, key, runs, v, progress):
+        """store runs as they arrive (progress['oldest'] is the oldest start time stored)"""
+        rows = []
+        try:
+            for run in runs:
+                (startTimeUsecs, runId) = runInfo(run, v)
+                rows.append(key + ('%s' % runId, startTimeUsecs, int(_runfinished(run, v)), json.dumps(run)))
+                if progress.get('oldest') is None or startTimeUsecs < progress['oldest']:
+                    progress['oldest'] = startTimeUsecs
+        finally:
+            self.db.executemany('INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            self.downloaded += len(rows)
+
+    def __mark(self, key, lowWater):
+        highWater = self.db.execute('SELECT MAX(startTimeUsecs) FROM runs WHERE cluster=? AND jobId=? AND view=?', key).fetchone()[0] or 0
+        self.db.execute('INSERT OR REPLACE INTO marks VALUES (?, ?, ?, ?, ?)', key + (highWater, lowWater))
+
+    def sync(self, jobId, startTimeUsecs=None, numRuns=100, v=1, params='', context=None):
+        """download runs that are newer than the high-water mark, still running, or older than the stored range
+
+        if a download fails (iterRuns raises), the runs received so far are kept, the stored
+        range only covers what was actually downloaded, and the error is raised
+        """
+        context = getContext(context or self.context)
+        key = (self.__cluster(context), '%s' % jobId, '%s%s' % (v, params))
+        lowWater = startTimeUsecs or 0
+        mark = self.db.execute('SELECT highWaterUsecs, lowWaterUsecs FROM marks WHERE cluster=? AND jobId=? AND view=?', key).fetchone()
+        if mark is None:
+            # first time for this job, download the whole range
+            progress = {}
+            try:
+                self.__store(key, iterRuns(jobId, startTimeUsecs=startTimeUsecs, numRuns=numRuns, v=v, params=params, context=context), v, progress)
+            except Exception:
+                # runs are downloaded newest first, so the stored range ends at the oldest run received
+                if progress.get('oldest') is not None:
+                    self.__mark(key, progress['oldest'])
+                self.db.commit()
+                raise
+        else:
+            (highWater, storedLowWater) = mark
+            # new runs, and runs that were not finished last time
+            running = self.db.execute('SELECT MIN(startTimeUsecs) FROM runs WHERE cluster=? AND jobId=? AND view=? AND finished=0', key).fetchone()[0]
+            if running is not None and running < highWater:
+                highWater = running
+            try:
+                self.__store(key, iterRuns(jobId, startTimeUsecs=highWater, numRuns=numRuns, v=v, params=params, context=context), v, {})
+            except Exception:
+                # keep the old marks, so the missing runs are downloaded next time
+                self.db.commit()
+                raise
+            # runs older than what was stored before
+            if lowWater < storedLowWater:
+                progress = {}
+                try:
+                    self.__store(key, iterRuns(jobId, startTimeUsecs=startTimeUsecs, endTimeUsecs=storedLowWater - 1, numRuns=numRuns, v=v, params=params, context=context), v, progress)
+                except Exception:
+                    self.__mark(key, min(storedLowWater, progress.get('oldest') or storedLowWater))
+                    self.db.commit()
+                    raise
+            else:
+                lowWater = storedLowWater
+        self.__mark(key, lowWater)
+        self.db.commit()
+        return key
+
+    def runs(self, jobId, startTimeUsecs=None, endTimeUsecs=None, numRuns=100, v=1, params='', prefetch=True, context=None, refresh=False):
+        """sync, then yield stored runs (newest first) between startTimeUsecs and endTimeUsecs"""
+        if refresh is True:
+            self.clear(jobId, context=context)
+        key = self.sync(jobId, startTimeUsecs=startTimeUsecs, numRuns=numRuns, v=v, params=params, context=context)
+        query = 'SELECT run FROM runs WHERE cluster=? AND jobId=? AND view=?'
+        values = key
+        if startTimeUsecs is not None:
+            query += ' AND startTimeUsecs >= ?'
+            values += (startTimeUsecs,)
+        if endTimeUsecs is not None:
+            query += ' AND startTimeUsecs <= ?'
+            values += (endTimeUsecs,)
+        for row in self.db.execute(query + ' ORDER BY startTimeUsecs DESC', values).fetchall():
+            yield json.loads(row[0])
+
+    def clear(self, jobId=None, context=None):
+        """forget stored runs (for one job, or every job of the cluster)"""
+        cluster = self.__cluster(getContext(context or self.context))
+        if jobId is None:
+            self.db.execute('DELETE FROM runs WHERE cluster=?', (cluster,))
+            self.db.execute('DELETE FROM marks WHERE cluster=?', (cluster,))
+        else:
+            self.db.execute('DELETE FROM runs WHERE cluster=? AND jobId=?', (cluster, '%s' % jobId))
+            self.db.execute('DELETE FROM marks WHERE cluster=? AND jobId=?', (cluster, '%s' % jobId))
+        self.db.commit()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
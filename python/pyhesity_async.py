@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""Cohesity Python REST API Asyncio Wrapper Module - 2026.10.18"""
+
+##########################################################################################
+# Change Log
+# ==========
+#
+# 2026.10.18 - initial release
+#
+##########################################################################################
+# Install Notes
+# =============
+#
+# Requires python 3.5 or later, and pyhesity.py in the same folder
+#
+# Calls are made through the same api() function (and keep-alive session pool)
+# as pyhesity, so url routing (v1 /public/, v=2, mcm, mcmv2, reportingv2) and
+# error handling are identical. Concurrency is bounded overall and per cluster.
+#
+##########################################################################################
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import pyhesity
+
+__all__ = ['apiAsync',
+           'apiGather',
+           'apiRun',
+           'heliosClusterContext',
+           'setAsyncLimits']
+
+MAXCONCURRENCY = 16  # total in-flight api calls
+MAXPERCLUSTER = 4    # in-flight api calls per cluster
+
+EXECUTOR = None
+SEMAPHORES = {}
+
+
+### set concurrency limits (call before starting the event loop)
+def setAsyncLimits(maxConcurrency=None, maxPerCluster=None):
+    global MAXCONCURRENCY
+    global MAXPERCLUSTER
+    global EXECUTOR
+    if maxConcurrency is not None:
+        MAXCONCURRENCY = int(maxConcurrency)
+        if EXECUTOR is not None:
+            EXECUTOR.shutdown(wait=False)
+            EXECUTOR = None
+    if maxPerCluster is not None:
+        MAXPERCLUSTER = int(maxPerCluster)
+    SEMAPHORES.clear()
+
+
+def __executor():
+    global EXECUTOR
+    if EXECUTOR is None:
+        EXECUTOR = ThreadPoolExecutor(max_workers=MAXCONCURRENCY)
+    return EXECUTOR
+
+
+def __clusterkey(context):
+    """cluster identity of a context (helios calls are keyed by accessClusterId)"""
+    return (context.get('APIROOT', ''), context['HEADER'].get('accessClusterId', ''))
+
+
+def __semaphores(context):
+    """get the global and per cluster semaphores for the running event loop"""
+    loop = asyncio.get_event_loop()
+    loopkey = id(loop)
+    if loopkey not in SEMAPHORES:
+        SEMAPHORES.clear()
+        SEMAPHORES[loopkey] = {'all': asyncio.Semaphore(MAXCONCURRENCY), 'clusters': {}}
+    loopsemaphores = SEMAPHORES[loopkey]
+    clusterkey = __clusterkey(context)
+    if clusterkey not in loopsemaphores['clusters']:
+        loopsemaphores['clusters'][clusterkey] = asyncio.Semaphore(MAXPERCLUSTER)
+    return loopsemaphores['all'], loopsemaphores['clusters'][clusterkey]
+
+
+### snapshot of a context, so later header changes don't affect queued calls
+def __snapshot(context=None):
+    return pyhesity.getContext(context)
+
+
+### context for a helios connected cluster (does not change the default context)
+def heliosClusterContext(clusterName, context=None):
+    if isinstance(clusterName, dict) is True:
+        clusterName = clusterName['name']
+    accessCluster = [cluster for cluster in pyhesity.heliosClusters(context=context) if cluster['name'].lower() == clusterName.lower()]
+    if not accessCluster:
+        print('Cluster %s not connected to Helios' % clusterName)
+        return None
+    clustercontext = __snapshot(context)
+    clustercontext['HEADER']['accessClusterId'] = str(accessCluster[0]['clusterId'])
+    return clustercontext
+
+
+### async api call function
+async def apiAsync(method, uri, data=None, quiet=None, mcm=None, mcmv2=None, v=1, reportingv2=None, context=None):
+    """async api call function"""
+    context = __snapshot(context)
+    allsemaphore, clustersemaphore = __semaphores(context)
+    call = functools.partial(pyhesity.api, method, uri, data=data, quiet=quiet, mcm=mcm, mcmv2=mcmv2, v=v, reportingv2=reportingv2, context=context)
+    async with clustersemaphore:
+        async with allsemaphore:
+            return await asyncio.get_event_loop().run_in_executor(__executor(), call)
+
+
+### run many api calls concurrently, results are returned in the order of the calls
+async def apiGather(calls, context=None, return_exceptions=True):
+    """calls is a list of (method, uri) tuples or dicts of apiAsync keyword arguments"""
+    coros = []
+    for call in calls:
+        if isinstance(call, dict):
+            kwargs = dict(call)
+            if context is not None and 'context' not in kwargs:
+                kwargs['context'] = context
+            coros.append(apiAsync(**kwargs))
+        else:
+            coros.append(apiAsync(*call, context=context))
+    return await asyncio.gather(*coros, return_exceptions=return_exceptions)
+
+
+### run a coroutine from synchronous code
+def apiRun(coro):
+    if hasattr(asyncio, 'run'):
+        return asyncio.run(coro)
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
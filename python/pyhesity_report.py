@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""Cohesity Report Writer Module - 2026.10.18"""
+
+##########################################################################################
+# Change Log
+# ==========
+#
+# 2026.10.18 - initial release
+#
+##########################################################################################
+# Install Notes
+# =============
+#
+# Place pyhesity_report.py in the same folder as the report script
+#
+# Rows are written to the html and csv/tsv files as they are produced, rather than
+# building the whole document in a string, so memory use stays flat no matter how
+# many rows a report has. The report keeps its own html header (css, logo, title)
+# and passes it to write().
+#
+##########################################################################################
+
+import codecs
+import gzip
+
+__all__ = ['ReportWriter']
+
+HTMLFOOTER = '''</table>
+</div>
+</body>
+</html>
+'''
+
+
+class ReportWriter(object):
+    """stream report rows to an html file and/or a csv (or tsv) file
+
+    report = ReportWriter(htmlFileName='report.html', csvFileName='report.tsv')
+    report.write(htmlHeader)
+    report.headings(['Name', 'Size'])
+    report.row([name, size])
+    report.close()
+
+    compress=True writes gzip compressed files (.gz is added to the file names),
+    quote=True wraps csv values in double quotes.
+    """
+
+    def __init__(self, htmlFileName=None, csvFileName=None, delimiter=None, compress=False, quote=False):
+        self.htmlFileName = htmlFileName
+        self.csvFileName = csvFileName
+        self.compress = compress
+        self.quote = quote
+        self.rows = 0
+        if delimiter is None:
+            if csvFileName is not None and csvFileName.lower().endswith('.tsv'):
+                delimiter = '\t'
+            else:
+                delimiter = ','
+        self.delimiter = delimiter
+        self.htmlFile = None
+        self.csvFile = None
+        if htmlFileName is not None:
+            (self.htmlFileName, self.htmlFile) = self.__open(htmlFileName)
+        if csvFileName is not None:
+            (self.csvFileName, self.csvFile) = self.__open(csvFileName)
+
+    def __open(self, fileName):
+        if self.compress is True:
+            fileName = '%s.gz' % fileName
+            return fileName, codecs.getwriter('utf-8')(gzip.open(fileName, 'wb'))
+        return fileName, codecs.open(fileName, 'w', 'utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def write(self, html):
+        """write raw html (header, css, title, etc.)"""
+        if self.htmlFile is not None:
+            self.htmlFile.write(html)
+
+    def writeCsv(self, text):
+        """write raw text to the csv file"""
+        if self.csvFile is not None:
+            self.csvFile.write(text)
+
+    def headings(self, headings, csvHeadings=None, html=True, style=None):
+        """write the heading row (csvHeadings can differ from the html headings)"""
+        if csvHeadings is None:
+            csvHeadings = headings
+        self.csvRow(csvHeadings)
+        if html is True:
+            if style is not None:
+                self.write('<tr style="%s">\n' % style)
+            else:
+                self.write('<tr>\n')
+            self.write('\n'.join(['    <th>%s</th>' % h for h in headings]))
+            self.write('\n</tr>\n')
+
+    def htmlRow(self, values, rowClass=None, cellClass=None, rowStyle=None):
+        """write a table row to the html file (cellClass can be a list, one class per column)"""
+        if self.htmlFile is None:
+            return
+        if rowClass is not None:
+            tr = '<tr class="%s">' % rowClass
+        elif rowStyle is not None:
+            tr = '<tr style="%s">' % rowStyle
+        else:
+            tr = '<tr>'
+        if isinstance(cellClass, list):
+            cells = ['<td class="%s">%s</td>' % (c, v) if c else '<td>%s</td>' % v for (c, v) in zip(cellClass, values)]
+        elif cellClass is not None:
+            cells = ['<td class="%s">%s</td>' % (cellClass, v) for v in values]
+        else:
+            cells = ['<td>%s</td>' % v for v in values]
+        self.htmlFile.write('%s%s</tr>\n' % (tr, ''.join(cells)))
+
+    def csvRow(self, values):
+        """write a line to the csv file"""
+        if self.csvFile is not None:
+            if self.quote is True:
+                values = ['"%s"' % v for v in values]
+            self.csvFile.write('%s\n' % self.delimiter.join(['%s' % v for v in values]))
+
+    def row(self, values, csvValues=None, rowClass=None, cellClass=None, rowStyle=None):
+        """write a row to both files (csvValues can differ from the html values)"""
+        self.rows += 1
+        self.htmlRow(values, rowClass=rowClass, cellClass=cellClass, rowStyle=rowStyle)
+        if csvValues is None:
+            csvValues = values
+        self.csvRow(csvValues)
+
+    def close(self, footer=HTMLFOOTER):
+        """write the html footer and close the files"""
+        if self.htmlFile is not None:
+            self.htmlFile.write(footer)
+            self.htmlFile.close()
+            self.htmlFile = None
+        if self.csvFile is not None:
+            self.csvFile.close()
+            self.csvFile = None
+
+    def readHtml(self):
+        """read back the finished html (e.g. to send as an email body)"""
+        if self.compress is True:
+            f = gzip.open(self.htmlFileName, 'rb')
+        else:
+            f = open(self.htmlFileName, 'rb')
+        html = f.read().decode('utf-8')
+        f.close()
+        return html
@@ -119,9 +119,9 @@ if len(targetEntity) == 0:
     exit(1)
 
 # find backups for source server
-searchResults = api('get', '/searchvms?entityTypes=kPhysical')
+sourceserverNames = set([s.lower() for s in sourceservers])
+searchResults = [v for v in apiStream('get', '/searchvms?entityTypes=kPhysical', 'vms[*]') if v['vmDocument']['objectName'].lower() in sourceserverNames]
 if searchResults:
-    searchResults = [v for v in searchResults['vms'] if v['vmDocument']['objectName'].lower() in [s.lower() for s in sourceservers]]
     if jobname is not None:
         altJobName = 'old name: %s' % jobname.lower()
         altJobName2 = '%s (old name' % jobname.lower()
@@ -47,9 +47,12 @@ for v in vips:
     setContext(context)
     nodeinfo = api('get', 'node/status')
     nodeid = nodeinfo['id']
-    cpustats = api('get', 'statistics/timeSeriesStats?endTimeMsecs=%s&entityId=%s&metricName=kCpuUsagePct&metricUnitType=9&range=day&rollupFunction=average&rollupIntervalSecs=360&schemaName=kSentryNodeStats&startTimeMsecs=%s' % (nowMsecs, nodeid, hourAgoMsecs))
-    cpustat = cpustats['dataPointVec'][-1]['data']['doubleValue']
-    nodes.append({'nodeId': nodeid, 'vip': v, 'cpustat': cpustat})
+    nodes.append({'nodeId': nodeid, 'vip': v})
+
+# cpu stats of all nodes (fetched in parallel)
+cpustats = timeSeriesStats([{'schemaName': 'kSentryNodeStats', 'metricName': 'kCpuUsagePct', 'entityParam': 'entityId', 'entityId': node['nodeId'], 'params': '&metricUnitType=9&range=day'} for node in nodes], hourAgoMsecs, nowMsecs, rollupFunction='average', rollupIntervalSecs=360)
+for node in nodes:
+    node['cpustat'] = [value for value in cpustats['series'][('kSentryNodeStats', 'kCpuUsagePct', node['nodeId'])] if value is not None][-1]
 
 x = 0
 for node in sorted(nodes, key=lambda nodeinfo: nodeinfo['cpustat']):
@@ -21,6 +21,7 @@ parser.add_argument('-f', '--sendfrom', type=str)
 parser.add_argument('-b', '--maxbackuphrs', type=int, default=8)
 parser.add_argument('-r', '--maxreplicationhrs', type=int, default=12)
 parser.add_argument('-w', '--watch', type=str, choices=['all', 'backup', 'replication'], default='all')
+parser.add_argument('-n', '--workers', type=int, default=8)  # number of clusters to query in parallel
 
 args = parser.parse_args()
 
@@ -34,6 +35,7 @@ sendfrom = args.sendfrom
 maxbackuphrs = args.maxbackuphrs
 maxreplicationhrs = args.maxreplicationhrs
 watch = args.watch
+workers = args.workers
 
 ### authenticate
 apiauth(vip, username, domain)
@@ -48,22 +50,53 @@ missesRecorded = False
 message = '<html><body style="font-family: Helvetica, Arial, sans-serif; font-size: 12px; background-color: #f1f3f6; color: #444444;">'
 message += '<div style="background-color: #fff; width:fit-content; padding: 2px 6px 8px 6px; font-weight: 300; box-shadow: 1px 2px 4px #cccccc; border-radius: 4px;">'
 message += '<p style="font-weight: bold;">Helios SLA Miss Report (%s)</p>' % now.date()
-for hcluster in heliosClusters():
-    heliosCluster(hcluster['name'])
 
+
+def isActiveJob(job):
+    return 'isDeleted' not in job and ('isActive' not in job or job['isActive'] is not False) and ('isPaused' not in job or job['isPaused'] is not True)
+
+
+def getClusterRuns(hcluster):
     cluster = api('get', 'cluster')
+    jobs = None
+    jobRuns = {}
     if cluster:
+        jobs = api('get', 'protectionJobs')
+        if jobs:
+            for job in jobs:
+                if isActiveJob(job):
+                    jobRuns[job['id']] = api('get', 'protectionRuns?jobId=%s&numRuns=2' % job['id'])
+    return (cluster, jobs, jobRuns)
+
+
+# query clusters in parallel
+clusterRuns = {}
+clusterErrors = {}
+for result in forEachCluster(getClusterRuns, workers=workers):
+    if result['error'] is not None:
+        clusterErrors[result['cluster']['name']] = result['error']
+    elif result['result'] is not None:
+        clusterRuns[result['cluster']['name']] = result['result']
+
+for hcluster in heliosClusters():
+    (cluster, jobs, jobRuns) = clusterRuns.get(hcluster['name'], (None, None, {}))
+    if hcluster['name'] in clusterErrors:
+        # report the failure, so the cluster doesn't look healthy
+        print('%-15s: failed to query cluster: %s' % (hcluster['name'], clusterErrors[hcluster['name']]))
+        message += '<hr style="border: 1px solid #eee;"/><span style="font-weight: bold;">%s</span><br/>' % hcluster['name'].upper()
+        message += '<span style="margin-left: 20px; font-weight: normal; color: #000;">failed to query %s:</span> <span style="font-weight: 300;">%s</span><br/>' % (hcluster['name'], clusterErrors[hcluster['name']])
+        missesRecorded = True
+    elif cluster:
         printedClusterName = False
         # for each active job
-        jobs = api('get', 'protectionJobs')
         if jobs:
             for job in jobs:
-                if 'isDeleted' not in job and ('isActive' not in job or job['isActive'] is not False) and ('isPaused' not in job or job['isPaused'] is not True):
+                if isActiveJob(job):
                     jobId = job['id']
                     jobName = job['name']
                     sla = job['incrementalProtectionSlaTimeMins']
                     slaUsecs = sla * 60000000
-                    runs = api('get', 'protectionRuns?jobId=%s&numRuns=2' % jobId)
+                    runs = jobRuns.get(jobId, None) or []
                     for run in runs:
                         # get backup run time
                         startTimeUsecs = run['backupRun']['stats']['startTimeUsecs']
@@ -3,8 +3,17 @@
 
 # import pyhesity wrapper module
 from pyhesity import *
+from pyhesity_report import ReportWriter
 from datetime import datetime, timedelta
-import codecs
+import json
+import operator
+import os
+import re
+import threading
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 
 # command line arguments
 import argparse
@@ -26,6 +35,9 @@ parser.add_argument('-sr', '--showrecord', action='store_true')
 parser.add_argument('-f', '--filter', action='append', type=str)
 parser.add_argument('-fl', '--filterlist', type=str, default=None)
 parser.add_argument('-fp', '--filterproperty', type=str, default=None)
+parser.add_argument('-nw', '--nowindowcache', action='store_true')
+parser.add_argument('-w', '--workers', type=int, default=4)
+parser.add_argument('-gz', '--gzip', action='store_true')
 
 args = parser.parse_args()
 
@@ -46,6 +58,9 @@ showrecord = args.showrecord
 filters = args.filter
 filterlist = args.filterlist
 filterproperty = args.filterproperty
+nowindowcache = args.nowindowcache
+workers = max(1, args.workers)
+gzipoutput = args.gzip
 
 
 # gather server list
@@ -66,6 +81,27 @@ def gatherList(param=None, filename=None, name='items', required=True):
 
 filterTextList = gatherList(filename=filterlist, name='filter text list', required=False)
 
+# parse filters once (operators are checked in this order, e.g. >= before >)
+filterOperators = [('==', operator.eq), ('!=', operator.ne), ('>=', operator.ge), ('<=', operator.le), ('<', operator.lt), ('>', operator.gt)]
+compiledFilters = []
+if filters is not None:
+    for filter in filters:
+        op = [o for o in filterOperators if o[0] in filter]
+        if len(op) == 0:
+            print('\nInvalid filter format, should be one of ==, !=, <=, >=, <, >\n')
+            exit()
+        (fattrib, fvalue) = filter.split(op[0][0], 1)
+        fattrib = fattrib.strip()
+        fvalue = fvalue.strip()
+        if re.match(r'^-?[0-9]+(\.[0-9]+)?$', fvalue):
+            fvalue = float(fvalue)
+        elif fvalue.lower() in ['true', 'false']:
+            fvalue = (fvalue.lower() == 'true')
+        compiledFilters.append({'attribute': fattrib, 'operator': op[0][0], 'function': op[0][1], 'value': fvalue, 'pushed': False})
+filterSet = None
+if filterlist and filterproperty:
+    filterSet = set([f.lower() for f in filterTextList])
+
 multiplier = 1024 * 1024
 if units.lower() == 'gib':
     multiplier = 1024 * 1024 * 1024
@@ -117,20 +153,58 @@ else:
 start = usecsToDate(uStart, '%Y-%m-%d')
 end = usecsToDate(uEnd, '%Y-%m-%d')
 
-# build 7 day time ranges
+# push system and date filters into the report query
+for filter in compiledFilters:
+    if filter['attribute'] in ['system', 'systemName', 'clusterName'] and filter['operator'] in ['==', '!=']:
+        selectedClusters = [c for c in selectedClusters if (c['name'].lower() == str(filter['value']).lower()) == (filter['operator'] == '==')]
+        filter['pushed'] = True
+    elif filter['attribute'] == 'systemId' and filter['operator'] in ['==', '!=']:
+        selectedClusters = [c for c in selectedClusters if (str(c['id']).lower() == str(filter['value']).lower()) == (filter['operator'] == '==')]
+        filter['pushed'] = True
+    elif filter['attribute'] == 'date' and filter['operator'] in ['>=', '>', '<=', '<']:
+        if not isinstance(filter['value'], float):
+            if len(filter['value']) == 10:
+                filter['value'] = '%s 00:00:00' % filter['value']
+            filter['value'] = dateToUsecs(filter['value'])
+        filter['value'] = int(filter['value'])
+        if filter['operator'] in ['>=', '>']:
+            uStart = max(uStart, filter['value'])
+        else:
+            uEnd = min(uEnd, filter['value'])
+        filter['pushed'] = True
+
+# time windows (--dayrange is the initial window size, adjusted per cluster as records are counted)
 dayRangeUsecs = dayrange * 86400000000
-ranges = []
-gotAllRanges = False
-thisUend = uEnd
-thisUstart = uStart
-while gotAllRanges is False:
-    if (thisUend - uStart) > dayRangeUsecs:
-        thisUstart = thisUend - dayRangeUsecs
-        ranges.append({'start': thisUstart, 'end': thisUend})
-        thisUend = thisUstart - 1
-    else:
-        ranges.append({'start': uStart, 'end': thisUend})
-        gotAllRanges = True
+recordLimit = 10000
+targetRecords = recordLimit / 2
+minWindowUsecs = 60000000
+maxWindowUsecs = uEnd - uStart + 1
+previewCalls = 0
+
+# window sizes that worked on previous runs
+windowCacheFile = os.path.join(os.path.expanduser('~'), '.pyhesity', 'heliosReport-windows.json')
+windowSizes = {}
+if nowindowcache is not True and os.path.exists(windowCacheFile):
+    try:
+        f = open(windowCacheFile, 'r')
+        windowSizes = json.load(f)
+        f.close()
+    except Exception:
+        windowSizes = {}
+
+
+def saveWindowSizes():
+    if nowindowcache is True:
+        return
+    try:
+        if not os.path.isdir(os.path.dirname(windowCacheFile)):
+            os.makedirs(os.path.dirname(windowCacheFile))
+        f = open(windowCacheFile, 'w')
+        json.dump(windowSizes, f)
+        f.close()
+    except Exception:
+        pass
+
 
 # get list of available reports
 reports = api('get', 'reports', reportingv2=True)
@@ -143,13 +217,10 @@ if report is None or len(report) == 0:
 reportNumber = report[0]['componentIds'][0]
 title = report[0]['title']
 
-# CSV output
+# output files
 csvFileName = "%s_%s_%s.tsv" % (title.replace('/', '-').replace('\\', '-'), start, end)
-csv = codecs.open(csvFileName, 'w', 'utf-8')
-
-# HTML output
 htmlFileName = "%s_%s_%s.html" % (title.replace('/', '-').replace('\\', '-'), start, end)
-htmlFile = codecs.open(htmlFileName, 'w', 'utf-8')
+report = ReportWriter(htmlFileName=htmlFileName, csvFileName=csvFileName, compress=gzipoutput)
 
 html = '''<html>
 <head>
@@ -290,46 +361,191 @@ html += '%s to %s' % (start, end)
 html += '''</span>
 </p>
 <table>
-<tr style="background-color: #F1F1F1;">'''
+'''
+report.write(html)
 
 gotHeadings = False
 headings = []
 
-for cluster in sorted(selectedClusters, key=lambda c: c['name'].lower()):
-    print(cluster['name'])
-    for range in ranges:
-        csvLines = []
-        reportParams = {
-            "filters": [
-                {
-                    "attribute": "date",
-                    "filterType": "TimeRange",
-                    "timeRangeFilterParams": {
-                        "lowerBound": range['start'],
-                        "upperBound": range['end']
-                    }
-                },
-                {
-                    "attribute": "systemId",
-                    "filterType": "Systems",
-                    "systemsFilterParams": {
-                        "systemIds": [cluster['id']],
-                        "systemNames": [cluster['name']]
-                    }
+
+# get preview records for one time window
+def getPreview(cluster, windowStart, windowEnd):
+    reportParams = {
+        "filters": [
+            {
+                "attribute": "date",
+                "filterType": "TimeRange",
+                "timeRangeFilterParams": {
+                    "lowerBound": windowStart,
+                    "upperBound": windowEnd
+                }
+            },
+            {
+                "attribute": "systemId",
+                "filterType": "Systems",
+                "systemsFilterParams": {
+                    "systemIds": [cluster['id']],
+                    "systemNames": [cluster['name']]
                 }
-            ],
-            "sort": None,
-            "timezone": timezone,
-            "limit": {
-                "size": 10000,
             }
+        ],
+        "sort": None,
+        "timezone": timezone,
+        "limit": {
+            "size": recordLimit,
         }
-        preview = api('post', 'components/%s/preview' % reportNumber, reportParams, reportingv2=True)
-        if len(preview['component']['data']) == 10000:
-            print('Hit limit of records. Try reducing --dayrange (e.g. --dayrange 1)')
+    }
+    return api('post', 'components/%s/preview' % reportNumber, reportParams, reportingv2=True)
+
+
+# preview worker threads
+taskQueue = queue.Queue()
+resultQueue = queue.Queue()
+
+
+def previewWorker():
+    while True:
+        task = taskQueue.get()
+        if task is None:
+            return
+        try:
+            task['preview'] = getPreview(task['cursor']['cluster'], task['start'], task['end'])
+        except Exception as e:
+            task['preview'] = None
+            task['error'] = e
+        resultQueue.put(task)
+
+
+# one cursor per cluster, walking back from the end of the date range
+cursors = []
+for cluster in sorted(selectedClusters, key=lambda c: c['name'].lower()):
+    windowKey = '%s:%s' % (reportNumber, cluster['id'])
+    cursors.append({
+        'cluster': cluster,
+        'windowKey': windowKey,
+        'windowUsecs': min(windowSizes.get(windowKey, dayRangeUsecs), maxWindowUsecs),
+        'bestWindowUsecs': None,
+        'windowEnd': uEnd,
+        'pending': 0,
+        'attributes': None,
+        'chunks': []
+    })
+splitTasks = []
+
+
+# next window to fetch (split windows first, then clusters in output order)
+def nextTask():
+    if len(splitTasks) > 0:
+        return splitTasks.pop(0)
+    for cursor in cursors:
+        if cursor['windowEnd'] >= uStart:
+            windowStart = max(uStart, cursor['windowEnd'] - cursor['windowUsecs'] + 1)
+            task = {'cursor': cursor, 'start': windowStart, 'end': cursor['windowEnd']}
+            cursor['windowEnd'] = windowStart - 1
+            cursor['pending'] += 1
+            return task
+    return None
+
+
+# handle a fetched window, splitting it in half when the record limit is hit
+def taskDone(task):
+    global previewCalls
+    previewCalls += 1
+    cursor = task['cursor']
+    cursor['pending'] -= 1
+    preview = task['preview']
+    if preview is None or 'component' not in preview:
+        print('Failed to get report data for %s' % cursor['cluster']['name'])
+        if 'error' in task:
+            print(task['error'])
+        exit(1)
+    cursor['attributes'] = preview['component']['config']['xlsxParams']['attributeConfig']
+    data = preview['component']['data']
+    if len(data) >= recordLimit and task['end'] - task['start'] > minWindowUsecs:
+        middle = task['start'] + (task['end'] - task['start']) // 2
+        splitTasks.append({'cursor': cursor, 'start': middle + 1, 'end': task['end']})
+        splitTasks.append({'cursor': cursor, 'start': task['start'], 'end': middle})
+        cursor['pending'] += 2
+    else:
+        if len(data) >= recordLimit:
+            print('  warning: more than %s records between %s and %s, some records will be missing' % (recordLimit, usecsToDate(task['start']), usecsToDate(task['end'])))
+        cursor['chunks'].append((task['start'], data))
+    # size the next window to land near the target record count
+    spanUsecs = task['end'] - task['start'] + 1
+    if len(data) > 0:
+        idealUsecs = int(spanUsecs * targetRecords / len(data))
+        if cursor['bestWindowUsecs'] is None or idealUsecs < cursor['bestWindowUsecs']:
+            cursor['bestWindowUsecs'] = idealUsecs
+    else:
+        idealUsecs = spanUsecs * 4
+    cursor['windowUsecs'] = max(minWindowUsecs, min(idealUsecs, spanUsecs * 4, maxWindowUsecs))
+
+
+# fetch cluster x window previews concurrently, yield clusters in sorted order as they complete
+def clusterRecords():
+    for i in range(workers):
+        thread = threading.Thread(target=previewWorker)
+        thread.daemon = True
+        thread.start()
+    inFlight = 0
+    nextCluster = 0
+    while nextCluster < len(cursors):
+        while inFlight < workers:
+            task = nextTask()
+            if task is None:
+                break
+            taskQueue.put(task)
+            inFlight += 1
+        cursor = cursors[nextCluster]
+        if cursor['windowEnd'] < uStart and cursor['pending'] == 0:
+            if cursor['bestWindowUsecs'] is not None:
+                windowSizes[cursor['windowKey']] = max(minWindowUsecs, cursor['bestWindowUsecs'])
+            records = []
+            for (windowStart, data) in sorted(cursor['chunks'], key=lambda c: c[0], reverse=True):
+                records += data
+            cursor['chunks'] = []
+            nextCluster += 1
+            yield cursor['cluster'], cursor['attributes'], records
+            continue
+        taskDone(resultQueue.get())
+        inFlight -= 1
+    for i in range(workers):
+        taskQueue.put(None)
+
+
+# build a single pass record filter (attribute names are checked against the first record)
+def compileRecordFilter(rec):
+    checks = []
+    for filter in compiledFilters:
+        if filter['attribute'] not in rec:
+            if filter['pushed'] is True:
+                continue
+            print('\nInvalid filter attribute: %s\nUse --showrecord to see attribute names\n' % filter['attribute'])
             exit()
+        checks.append((filter['attribute'], filter['function'], filter['value']))
+    if filterSet is not None and filterproperty not in rec:
+        print('\nInvalid filter attribute: %s\nUse --showrecord to see attribute names\n' % filterproperty)
+        exit()
 
-        attributes = preview['component']['config']['xlsxParams']['attributeConfig']
+    def keep(r):
+        try:
+            for (attribute, function, value) in checks:
+                if not function(r[attribute], value):
+                    return False
+        except TypeError:
+            return False
+        if filterSet is not None and ('%s' % r[filterproperty]).lower() not in filterSet:
+            return False
+        return True
+    return keep
+
+
+keepRecord = None
+
+for (cluster, attributes, records) in clusterRecords():
+    print(cluster['name'])
+    csvLines = []
+    if attributes is not None:
         # headings
         if gotHeadings is False:
             for attribute in attributes:
@@ -356,64 +572,20 @@ for cluster in sorted(selectedClusters, key=lambda c: c['name'].lower()):
                     else:
                         headings.append(attribute['attributeName'])
             gotHeadings = True
-            csvHeadings = '\t'.join(headings)
-            csv.write('%s\n' % csvHeadings)
-            htmlHeadings = '\n'.join(['<th>%s</th>' % h for h in headings])
-            html += htmlHeadings
-            html += '</tr>'
+            report.headings(headings, style='background-color: #F1F1F1;')
+        if keepRecord is None and len(records) > 0:
+            keepRecord = compileRecordFilter(records[0])
+        if keepRecord is not None:
+            records = [r for r in records if keepRecord(r)]
         if 'format' in attributes[0] and attributes[0]['format'].lower() == 'timestamp':
-            previewData = sorted(preview['component']['data'], key=lambda d: d[attributes[0]['attributeName']], reverse=True)
+            previewData = sorted(records, key=lambda d: d[attributes[0]['attributeName']], reverse=True)
         else:
-            previewData = sorted(preview['component']['data'], key=lambda d: d[attributes[0]['attributeName']])
-        if filters is not None and len(filters) > 0:
-            for filter in filters:
-                if '==' in filter:
-                    (fattrib, fvalue) = filter.split('==')
-                elif '!=' in filter:
-                    (fattrib, fvalue) = filter.split('!=')
-                elif '>=' in filter:
-                    (fattrib, fvalue) = filter.split('>=')
-                elif '<=' in filter:
-                    (fattrib, fvalue) = filter.split('<=')
-                elif '<' in filter:
-                    (fattrib, fvalue) = filter.split('<')
-                elif '>' in filter:
-                    (fattrib, fvalue) = filter.split('>')
-                else:
-                    print('\nInvalid filter format, should be one of ==, !=, <=, >=, <, >\n')
-                    exit()
-                fattrib = fattrib.strip()
-                fvalue = fvalue.strip()
-                if len(previewData) > 0 and fattrib not in previewData[0]:
-                    print('\nInvalid filter attribute: %s\nUse --showrecord to see attribute names\n' % fattrib)
-                    exit()
-                else:
-                    if fvalue.isnumeric():
-                        fvalue = float(fvalue)
-                    if '==' in filter:
-                        previewData = [p for p in previewData if p[fattrib] == fvalue]
-                    elif '!=' in filter:
-                        previewData = [p for p in previewData if p[fattrib] != fvalue]
-                    elif '>=' in filter:
-                        previewData = [p for p in previewData if p[fattrib] >= fvalue]
-                    elif '<=' in filter:
-                        previewData = [p for p in previewData if p[fattrib] <= fvalue]
-                    elif '<' in filter:
-                        previewData = [p for p in previewData if p[fattrib] < fvalue]
-                    elif '>' in filter:
-                        previewData = [p for p in previewData if p[fattrib] > fvalue]
-        if filterlist and filterproperty:
-            if previewData and filterproperty not in previewData[0]:
-                print('\nInvalid filter attribute: %s\nUse --showrecord to see attribute names\n' % filterproperty)
-                exit()
-            else:
-                previewData = [p for p in previewData if p[filterproperty].lower() in [f.lower() for f in filterTextList]]
+            previewData = sorted(records, key=lambda d: d[attributes[0]['attributeName']])
         for rec in previewData:
             if showrecord:
                 display(rec)
                 exit()
             csvColumns = []
-            html += '<tr>'
             for attribute in attributes:
                 data = rec[attribute['attributeName']]
                 if 'format' in attribute and attribute['format'].lower() == 'timestamp':
@@ -440,19 +612,15 @@ for cluster in sorted(selectedClusters, key=lambda c: c['name'].lower()):
                     data = round(data, 1)
 
                 csvColumns.append(data)
-                html += '<td>%s</td>' % data
-            html += '</tr>'
+            report.htmlRow(csvColumns)
             csvLine = '\t'.join([str(i) for i in csvColumns])
             csvLines.append(csvLine)
-        csv.write('\n'.join(sorted(csvLines)))
+        if len(csvLines) > 0:
+            report.writeCsv('%s\n' % '\n'.join(sorted(csvLines)))
 
-html += '''</table>
-</div>
-</body>
-</html>'''
+saveWindowSizes()
 
-htmlFile.write(html)
-htmlFile.close()
-csv.close()
+report.close()
 
-print('\nOutput saved to %s\nAlso saved to %s\n' % (htmlFileName, csvFileName))
+print('\n%s preview calls' % previewCalls)
+print('\nOutput saved to %s\nAlso saved to %s\n' % (report.htmlFileName, report.csvFileName))
@@ -10,14 +10,26 @@ startMSecs = int(timeAgo(31, 'days') / 1000)
 
 data = []
 
-for hcluster in heliosClusters():
-    heliosCluster(hcluster['name'])
+
+def getTargetUsage(hcluster):
+    clusterdata = []
     vaults = api('get', 'vaults')
+    if vaults is None or 'error' in vaults:
+        raise Exception('failed to get vaults')
     for vault in vaults:
         stats = api('get', 'statistics/timeSeriesStats?endTimeMsecs=%s&entityId=%s&metricName=kMorphedUsageBytes&metricUnitType=0&range=day&rollupFunction=latest&rollupIntervalSecs=86400&schemaName=kIceboxVaultStats&startTimeMsecs=%s' % (endMSecs, vault['id'], startMSecs))
         if stats is not None and 'dataPointVec' in stats and len(stats['dataPointVec']) > 0:
             consumedBytes = stats['dataPointVec'][-1]['data']['int64Value']
-            data.append([hcluster['name'], vault['name'], vault['externalTargetType'][1:], round(float(consumedBytes) / (1024 * 1024 * 1024), 2)])
+            clusterdata.append([hcluster['name'], vault['name'], vault['externalTargetType'][1:], round(float(consumedBytes) / (1024 * 1024 * 1024), 2)])
+    return clusterdata
+
+
+# query clusters in parallel
+for result in forEachCluster(getTargetUsage, workers=8):
+    if result['error'] is not None:
+        print('failed to query %s: %s' % (result['cluster']['name'], result['error']))
+    elif result['result'] is not None:
+        data.extend(result['result'])
 
-df = pd.DataFrame(data, columns=['ClusterName', 'TargetName', 'TargetType', 'ConsumedGiB'])
+df = pd.DataFrame(sorted(data, key=lambda d: (d[0].lower(), d[1].lower())), columns=['ClusterName', 'TargetName', 'TargetType', 'ConsumedGiB'])
 print(df)
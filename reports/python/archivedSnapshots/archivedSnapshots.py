@@ -98,41 +98,34 @@ for job in sorted(jobs['protectionGroups'], key=lambda job: job['name'].lower())
 
         print('%s' % job['name'])
 
-        endUsecs = nowUsecs
-        while 1:
-            runs = api('get', 'data-protect/protection-groups/%s/runs?numRuns=%s&endTimeUsecs=%s&includeTenants=true' % (job['id'], numruns, endUsecs), v=2)
-            if len(runs['runs']) > 0:
-                endUsecs = int(runs['runs'][-1]['id'].split(':')[1]) - 1
-            else:
-                break
-            for run in runs['runs']:
-                runStartTime = usecsToDate(run['id'].split(':')[1])
-                status = ''
-                expired = ''
-                if 'localBackupInfo' in run:
-                    # runStartTime = usecsToDate(run['localBackupInfo']['startTimeUsecs'])
-                    status = run['localBackupInfo']['status']
-                    expired = False
-                if 'isLocalSnapshotsDeleted' in run and run['isLocalSnapshotsDeleted'] is True:
-                    expired = True
-                archiveTarget = ''
-                archiveStatus = ''
-                archiveExpires = ''
-                archived = False
-                archiveCount = 0
-                if 'archivalInfo' in run and 'archivalTargetResults' in run['archivalInfo'] and len(run['archivalInfo']['archivalTargetResults']) > 0:
-                    archiveTarget = run['archivalInfo']['archivalTargetResults'][-1]['targetName']
-                    archiveStatus = run['archivalInfo']['archivalTargetResults'][-1]['status']
-                    if 'expiryTimeUsecs' in run['archivalInfo']['archivalTargetResults'][-1]:
-                        archiveExpireUsecs = run['archivalInfo']['archivalTargetResults'][-1]['expiryTimeUsecs']
-                        if archiveExpireUsecs > nowUsecs:
-                            archiveExpires = usecsToDate(archiveExpireUsecs)
-                            archived = True
-                        else:
-                            archiveExpires = 'Expired'
-                    archiveCount = len(run['archivalInfo']['archivalTargetResults'])
-                print("    %s  %s  Expired: %s Archived: %s (%s)" % (runStartTime, status, expired, archived, archiveCount))
-                f.write('"%s","%s","%s","%s","%s","%s","%s","%s","%s"\n' % (job['name'], runStartTime, status, expired, archived, archiveTarget, archiveStatus, archiveExpires, archiveCount))
+        for run in iterRuns(job['id'], endTimeUsecs=nowUsecs, numRuns=numruns, v=2, params='&includeTenants=true'):
+            runStartTime = usecsToDate(run['id'].split(':')[1])
+            status = ''
+            expired = ''
+            if 'localBackupInfo' in run:
+                # runStartTime = usecsToDate(run['localBackupInfo']['startTimeUsecs'])
+                status = run['localBackupInfo']['status']
+                expired = False
+            if 'isLocalSnapshotsDeleted' in run and run['isLocalSnapshotsDeleted'] is True:
+                expired = True
+            archiveTarget = ''
+            archiveStatus = ''
+            archiveExpires = ''
+            archived = False
+            archiveCount = 0
+            if 'archivalInfo' in run and 'archivalTargetResults' in run['archivalInfo'] and len(run['archivalInfo']['archivalTargetResults']) > 0:
+                archiveTarget = run['archivalInfo']['archivalTargetResults'][-1]['targetName']
+                archiveStatus = run['archivalInfo']['archivalTargetResults'][-1]['status']
+                if 'expiryTimeUsecs' in run['archivalInfo']['archivalTargetResults'][-1]:
+                    archiveExpireUsecs = run['archivalInfo']['archivalTargetResults'][-1]['expiryTimeUsecs']
+                    if archiveExpireUsecs > nowUsecs:
+                        archiveExpires = usecsToDate(archiveExpireUsecs)
+                        archived = True
+                    else:
+                        archiveExpires = 'Expired'
+                archiveCount = len(run['archivalInfo']['archivalTargetResults'])
+            print("    %s  %s  Expired: %s Archived: %s (%s)" % (runStartTime, status, expired, archived, archiveCount))
+            f.write('"%s","%s","%s","%s","%s","%s","%s","%s","%s"\n' % (job['name'], runStartTime, status, expired, archived, archiveTarget, archiveStatus, archiveExpires, archiveCount))
 
 f.close()
 print('\nOutput saved to %s\n' % outfile)
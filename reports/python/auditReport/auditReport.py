@@ -3,8 +3,11 @@
 
 # import pyhesity wrapper module
 from pyhesity import *
+from pyhesity_report import ReportWriter
 from datetime import datetime, timedelta
-import codecs
+import gzip
+import json
+import os
 
 # command line arguments
 import argparse
@@ -25,6 +28,10 @@ parser.add_argument('-t', '--thismonth', action='store_true')
 parser.add_argument('-l', '--lastmonth', action='store_true')
 parser.add_argument('-y', '--days', type=int, default=31)
 parser.add_argument('-f', '--folder', type=str, default='.')
+parser.add_argument('-gz', '--gzip', action='store_true')
+parser.add_argument('-x', '--export', action='store_true')
+parser.add_argument('-xf', '--exportformat', type=str, choices=['jsonl', 'csv'], default='jsonl')
+parser.add_argument('-w', '--workers', type=int, default=4)
 
 args = parser.parse_args()
 
@@ -44,6 +51,10 @@ thismonth = args.thismonth
 lastmonth = args.lastmonth
 days = args.days
 folder = args.folder
+gzipoutput = args.gzip
+export = args.export
+exportformat = args.exportformat
+workers = args.workers
 
 # authenticate
 apiauth(vip=vip, username=username, domain=domain, password=password, useApiKey=useApiKey, helios=mcm, prompt=(not noprompt), emailMfaCode=emailmfacode, mfaCode=mfacode)
@@ -86,6 +97,105 @@ else:
     cluster = api('get', 'cluster')
     clusternames = [cluster['name']]
 
+
+
+# export new audit log entries to compressed jsonl/csv files (resumes from the last export)
+def saveCursor(cursorFile, cursor):
+    tmpFile = '%s.tmp' % cursorFile
+    f = open(tmpFile, 'w')
+    json.dump(cursor, f)
+    f.close()
+    if os.path.exists(cursorFile):
+        os.remove(cursorFile)
+    os.rename(tmpFile, cursorFile)
+
+
+def exportAuditLog(cluster):
+    clustername = cluster['name']
+    cursorFile = os.path.join(folder, 'auditLog-%s.cursor.json' % clustername)
+    cursor = {}
+    if os.path.exists(cursorFile):
+        f = open(cursorFile, 'r')
+        cursor = json.load(f)
+        f.close()
+    # only entries newer than the last export (or the requested start date on the first export)
+    lowerUsecs = cursor.get('highWaterUsecs', uStart)
+    segment = cursor.get('segment', None)
+    if segment is None:
+        if exportEnd <= lowerUsecs:
+            return 0
+        segment = {
+            'fileName': os.path.join(folder, 'auditLog-%s-%s-%s.%s.gz' % (clustername, usecsToDate(lowerUsecs, '%Y%m%d%H%M%S'), usecsToDate(exportEnd, '%Y%m%d%H%M%S'), exportformat)),
+            'endUsecs': exportEnd,
+            'nextEndUsecs': exportEnd,
+            'bytes': 0,
+            'entries': 0
+        }
+    else:
+        # resume an interrupted export, dropping anything written after the last saved page
+        print('%s: resuming export to %s' % (clustername, segment['fileName']))
+        if os.path.exists(segment['fileName']):
+            f = open(segment['fileName'], 'r+b')
+            f.truncate(segment['bytes'])
+            f.close()
+    endTimeUsecs = segment['nextEndUsecs']
+    while endTimeUsecs > lowerUsecs:
+        startTimeUsecs = max(endTimeUsecs - 604800000000, lowerUsecs)
+        logs = api('get', 'audit-logs?startTimeUsecs=%s&endTimeUsecs=%s&count=1000' % (startTimeUsecs, endTimeUsecs), v=2)
+        if logs is None or not isinstance(logs, dict):
+            raise Exception('error getting audit logs (run again to resume): %s' % LAST_API_ERROR())
+        auditLogs = logs.get('auditLogs', [])
+        lines = []
+        entries = 0
+        if segment['bytes'] == 0 and exportformat == 'csv':
+            lines.append('"Cluster","Date","User","Domain","Entity","Action","IP","Details"\n')
+        for log in auditLogs:
+            if log['timestampUsecs'] <= lowerUsecs:
+                continue
+            entries += 1
+            if exportformat == 'csv':
+                lines.append('"%s","%s","%s","%s","%s","%s","%s","%s"\n' % (clustername, usecsToDate(log['timestampUsecs']), log['username'], log['domain'], log['entityName'], log['action'], log.get('ip', ''), log['details']))
+            else:
+                log['clusterName'] = clustername
+                lines.append('%s\n' % json.dumps(log, sort_keys=True))
+        # a full page may have more entries in this window, before the oldest one returned
+        if len(auditLogs) >= 1000:
+            endTimeUsecs = min([log['timestampUsecs'] for log in auditLogs]) - 1
+        else:
+            endTimeUsecs = startTimeUsecs - 1
+        if entries > 0:
+            # each page is a complete gzip member, so the file is valid after every page
+            f = gzip.open(segment['fileName'], 'ab')
+            f.write(''.join(lines).encode('utf-8'))
+            f.close()
+            segment['bytes'] = os.path.getsize(segment['fileName'])
+            segment['entries'] += entries
+        segment['nextEndUsecs'] = endTimeUsecs
+        cursor['segment'] = segment
+        saveCursor(cursorFile, cursor)
+    saveCursor(cursorFile, {'highWaterUsecs': segment['endUsecs']})
+    return segment['entries']
+
+
+if export is True:
+    # export up to --enddate (if specified) or now
+    exportEnd = dateToUsecs(now)
+    if enddate != '':
+        exportEnd = min(dateToUsecs(enddate), exportEnd)
+    if mcm or vip.lower() == 'helios.cohesity.com':
+        for result in forEachCluster(exportAuditLog, clusters=clusternames, workers=workers):
+            if result['error'] is None:
+                print('%s: exported %s new entries' % (result['cluster']['name'], result['result']))
+            else:
+                print('%s: %s' % (result['cluster']['name'], result['error']))
+    else:
+        try:
+            print('%s: exported %s new entries' % (clusternames[0], exportAuditLog({'name': clusternames[0]})))
+        except Exception as e:
+            print('%s: %s' % (clusternames[0], e))
+            exit(1)
+    exit(0)
+
 print('Collecting report data...')
 
 title = 'Audit Log Report (%s - %s)' % (start, end)
@@ -96,8 +206,8 @@ if len(clusternames) == 1:
 
 htmlfileName = '%s/auditReport%s-%s-%s.html' % (folder, filepart, start, end)
 csvfileName = '%s/auditReport%s-%s-%s.csv' % (folder, filepart, start, end)
-csv = codecs.open(csvfileName, 'w', 'utf-8')
-csv.write('"Cluster","Date","User","Domain","Entity","Action","IP","Details"\n')
+report = ReportWriter(htmlFileName=htmlfileName, csvFileName=csvfileName, compress=gzipoutput, quote=True)
+report.writeCsv('"Cluster","Date","User","Domain","Entity","Action","IP","Details"\n')
 
 html = '''<html>
 <head>
@@ -269,7 +379,11 @@ html += '''</p>
     <th>Action</th>
     <th>IP</th>
     <th>Details</th>
-</tr>'''
+</tr>
+'''
+report.write(html)
+
+auditCellClasses = [None, None, None, None, 'wrap', None, None, 'wrap']
 
 for clustername in clusternames:
     if mcm or vip.lower() == 'helios.cohesity.com':
@@ -288,30 +402,12 @@ for clustername in clusternames:
                 if 'ip' not in log:
                     log['ip'] = ''
                 # display(log)
-                html += '''<tr><td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td class="wrap">%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td class="wrap">%s</td>
-                </tr>''' % (clustername, usecsToDate(log['timestampUsecs']), log['username'], log['domain'], log['entityName'], log['action'], log['ip'], log['details'])
-                csv.write('"%s","%s","%s","%s","%s","%s","%s","%s"\n' % (clustername, usecsToDate(log['timestampUsecs']), log['username'], log['domain'], log['entityName'], log['action'], log['ip'], log['details']))
+                report.row([clustername, usecsToDate(log['timestampUsecs']), log['username'], log['domain'], log['entityName'], log['action'], log['ip'], log['details']], cellClass=auditCellClasses)
                 endTimeUsecs = log['timestampUsecs'] - 1
         else:
             breakOut = True
 
-html += '''</table>
-</div>
-</body>
-</html>
-'''
-
-print('\nsaving report as %s' % htmlfileName)
-print('             and %s\n' % csvfileName)
+report.close()
 
-f = codecs.open(htmlfileName, 'w', 'utf-8')
-f.write(html)
-f.close()
-csv.close()
+print('\nsaving report as %s' % report.htmlFileName)
+print('             and %s\n' % report.csvFileName)
@@ -3,8 +3,8 @@
 
 # import pyhesity wrapper module
 from pyhesity import *
+from pyhesity_report import ReportWriter
 from datetime import datetime
-import codecs
 import sys
 import argparse
 if sys.version_info.major >= 3 and sys.version_info.minor >= 5:
@@ -19,6 +19,7 @@ parser.add_argument('-u', '--username', type=str, default='helios')   # username
 parser.add_argument('-d', '--domain', type=str, default='local')      # domain - defaults to local
 parser.add_argument('-i', '--useApiKey', action='store_true')         # use API key authentication
 parser.add_argument('-pwd', '--password', type=str, default=None)     # optional password
+parser.add_argument('-gz', '--gzip', action='store_true')             # gzip output files
 
 args = parser.parse_args()
 
@@ -27,6 +28,7 @@ username = args.username
 domain = args.domain
 password = args.password
 useApiKey = args.useApiKey
+gzipoutput = args.gzip
 
 # authenticate
 apiauth(vip=vip, username=username, domain=domain, password=password, useApiKey=useApiKey)
@@ -57,14 +59,11 @@ Path''').split('\n')
 csvHeadings = ','.join(headings)
 htmlHeadings = ''.join(['<th>%s</th>' % h for h in headings])
 
-# CSV output
+# output files
 csvFileName = "%s.csv" % filePrefix
-csv = codecs.open(csvFileName, 'w', 'utf-8')
-csv.write('%s\n' % csvHeadings)
-
-# HTML output
 htmlFileName = "%s.html" % filePrefix
-htmlFile = codecs.open(htmlFileName, 'w', 'utf-8')
+report = ReportWriter(htmlFileName=htmlFileName, csvFileName=csvFileName, compress=gzipoutput, quote=True)
+report.writeCsv('%s\n' % csvHeadings)
 
 html = '''<html>
 <head>
@@ -222,12 +221,12 @@ html += '''</span>
 <table>
 <tr style="background-color: #F1F1F1;">'''
 html += htmlHeadings
-html += '</tr>'
+html += '</tr>\n'
+report.write(html)
 
 
 def listdir(dirPath, instance, volumeInfoCookie=None, volumeName=None, cookie=None):
     global firstEntry
-    global html
     thisDirPath = quote_plus(dirPath).replace('%2F%2F', '%2F')
     if cookie is not None:
         if volumeName is not None:
@@ -242,31 +241,16 @@ def listdir(dirPath, instance, volumeInfoCookie=None, volumeName=None, cookie=No
     if dirList and 'entries' in dirList:
         for entry in sorted(dirList['entries'], key=lambda e: e['name']):
             if entry['type'] == 'kDirectory':
-                csv.write('"%s","%s","%s","%s","%s","%s"\n' % (jobName, jobType, objectName, policyName, lastBackup, entry['fullPath']))
+                csvValues = [jobName, jobType, objectName, policyName, lastBackup, entry['fullPath']]
                 if firstEntry is True:
-                    html += '''<tr>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            </tr>''' % (jobName, jobType, objectName, policyName, lastBackup, entry['fullPath'])
+                    report.row(csvValues, cellClass='nowrap')
                     firstEntry = False
                 else:
-                    html += '''<tr>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            </tr>''' % ('', '', '', '', '', entry['fullPath'])
+                    report.row(['', '', '', '', '', entry['fullPath']], csvValues=csvValues, cellClass='nowrap')
 
 
 def showFiles(doc, version):
     global firstEntry
-    global html
     instance = ("attemptNum=%s&clusterId=%s&clusterIncarnationId=%s&entityId=%s&jobId=%s&jobInstanceId=%s&jobStartTimeUsecs=%s&jobUidObjectId=%s" %
                 (version['instanceId']['attemptNum'],
                     doc['objectId']['jobUid']['clusterId'],
@@ -286,26 +270,12 @@ def showFiles(doc, version):
             volumeInfoCookie = volumeList['volumeInfoCookie']
             for volume in sorted(volumeList['volumeInfos'], key=lambda v: v['name']):
                 volumeName = quote_plus(volume['name'])
-                csv.write('"%s","%s","%s","%s","%s","%s"\n' % (jobName, jobType, objectName, policyName, lastBackup, volume['name']))
+                csvValues = [jobName, jobType, objectName, policyName, lastBackup, volume['name']]
                 if firstEntry is True:
-                    html += '''<tr>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            </tr>''' % (jobName, jobType, objectName, policyName, lastBackup, volume['name'])
+                    report.row(csvValues, cellClass='nowrap')
                     firstEntry = False
                 else:
-                    html += '''<tr>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            <td class="nowrap">%s</td>
-                            </tr>''' % ('', '', '', '', '', volume['name'])
+                    report.row(['', '', '', '', '', volume['name']], csvValues=csvValues, cellClass='nowrap')
     else:
         listdir('/', instance)
 
@@ -332,13 +302,6 @@ for vm in vms:
         version = doc['versions'][0]
         showFiles(doc, version)
 
-html += '''</table>
-</div>
-</body>
-</html>'''
-
-htmlFile.write(html)
-htmlFile.close()
-csv.close()
+report.close()
 
-print('\nOutput saved to %s\nAlso saved to %s\n' % (htmlFileName, csvFileName))
+print('\nOutput saved to %s\nAlso saved to %s\n' % (report.htmlFileName, report.csvFileName))
@@ -55,29 +55,24 @@ f.write('Date,Capacity (%s),Consumed (%s),Free (%s),Used %%,Data In (%s),Data Wr
 endMsecs = int(dateToUsecs(now.strftime("%Y-%m-%d %H:%M:%S")) / 1000)
 startMsecs = int((timeAgo(days, 'days')) / 1000)
 
-capacityStats = api('get', 'statistics/timeSeriesStats?endTimeMsecs=%s&entityId=%s&metricName=kCapacityBytes&metricUnitType=0&range=day&rollupFunction=average&rollupIntervalSecs=86400&schemaName=kBridgeClusterStats&startTimeMsecs=%s' % (endMsecs, cluster['id'], startMsecs))
-consumedStats = api('get', 'statistics/timeSeriesStats?startTimeMsecs=%s&schemaName=kBridgeClusterTierPhysicalStats&metricName=kMorphedUsageBytes&rollupIntervalSecs=86400&rollupFunction=latest&entityIdList=%s:Local&endTimeMsecs=%s' % (startMsecs, cluster['id'], endMsecs))
-dataInStats = api('get', 'statistics/timeSeriesStats?startTimeMsecs=%s&schemaName=ApolloV2ClusterStats&metricName=BrickBytesLogical&rollupIntervalSecs=86400&rollupFunction=latest&entityIdList=%s (ID %s)&endTimeMsecs=%s' % (startMsecs, cluster['name'], cluster['id'], endMsecs))
-dataWrittenStats = api('get', 'statistics/timeSeriesStats?startTimeMsecs=%s&schemaName=ApolloV2ClusterStats&metricName=ChunkBytesMorphed&rollupIntervalSecs=86400&rollupFunction=latest&entityIdList=%s (ID %s)&endTimeMsecs=%s' % (startMsecs, cluster['name'], cluster['id'], endMsecs))
-logicalSizeStats = api('get', 'statistics/timeSeriesStats?startTimeMsecs=%s&schemaName=kBridgeClusterLogicalStats&metricName=kUnmorphedUsageBytes&rollupIntervalSecs=86400&rollupFunction=latest&entityIdList=%s&endTimeMsecs=%s' % (startMsecs, cluster['id'], endMsecs))
+# gather the five stats in parallel
+clusterStats = timeSeriesStats([
+    {'key': 'capacity', 'schemaName': 'kBridgeClusterStats', 'metricName': 'kCapacityBytes', 'entityParam': 'entityId', 'entityId': cluster['id'], 'rollupFunction': 'average', 'params': '&metricUnitType=0&range=day'},
+    {'key': 'consumed', 'schemaName': 'kBridgeClusterTierPhysicalStats', 'metricName': 'kMorphedUsageBytes', 'entityId': '%s:Local' % cluster['id']},
+    {'key': 'dataIn', 'schemaName': 'ApolloV2ClusterStats', 'metricName': 'BrickBytesLogical', 'entityId': '%s (ID %s)' % (cluster['name'], cluster['id'])},
+    {'key': 'dataWritten', 'schemaName': 'ApolloV2ClusterStats', 'metricName': 'ChunkBytesMorphed', 'entityId': '%s (ID %s)' % (cluster['name'], cluster['id'])},
+    {'key': 'logicalSize', 'schemaName': 'kBridgeClusterLogicalStats', 'metricName': 'kUnmorphedUsageBytes', 'entityId': cluster['id']}
+], startMsecs, endMsecs)
 
 stats = {}
-
-
-def parseStats(dataPoints, statName):
-    for stat in dataPoints:
-        value = stat['data']['int64Value']
-        date = datetime.strptime(usecsToDate(stat['timestampMsecs'] * 1000), '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d')
-        if date not in stats.keys():
-            stats[date] = {}
-        stats[date][statName] = value
-
-
-parseStats(capacityStats['dataPointVec'], 'capacity')
-parseStats(consumedStats['dataPointVec'], 'consumed')
-parseStats(dataInStats['dataPointVec'], 'dataIn')
-parseStats(dataWrittenStats['dataPointVec'], 'dataWritten')
-parseStats(logicalSizeStats['dataPointVec'], 'logicalSize')
+for (i, timestampMsecs) in enumerate(clusterStats['timestamps']):
+    date = datetime.strptime(usecsToDate(timestampMsecs * 1000), '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d')
+    for statName in clusterStats['series']:
+        value = clusterStats['series'][statName][i]
+        if value is not None:
+            if date not in stats:
+                stats[date] = {}
+            stats[date][statName] = value
 
 lastStatReported = False
 for date in sorted(stats.keys(), reverse=True):
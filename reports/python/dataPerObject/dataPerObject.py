@@ -5,6 +5,7 @@
 from pyhesity import *
 from datetime import datetime
 import codecs
+import functools
 
 # command line arguments
 import argparse
@@ -15,6 +16,9 @@ parser.add_argument('-d', '--domain', type=str, default='local')  # Cohesity Use
 parser.add_argument('-n', '--numruns', type=int, default=100)
 parser.add_argument('-b', '--daysback', type=int, default=31)
 parser.add_argument('-x', '--units', type=str, choices=['MiB', 'GiB', 'mib', 'gib'], default='GiB')  # units
+parser.add_argument('-rh', '--runhistory', action='store_true')      # keep runs in a local run history store
+parser.add_argument('-hf', '--historyfile', type=str, default=None)   # run history file (default is ~/.pyhesity/runhistory.db)
+parser.add_argument('-rr', '--refreshhistory', action='store_true')  # download stored runs again
 
 args = parser.parse_args()
 
@@ -24,6 +28,9 @@ domain = args.domain
 units = args.units
 numruns = args.numruns
 daysback = args.daysback
+runhistory = args.runhistory
+historyfile = args.historyfile
+refreshhistory = args.refreshhistory
 
 multiplier = 1024 * 1024 * 1024
 if units.lower() == 'mib':
@@ -51,28 +58,27 @@ csv.write("Job Name,Object Name,Logical Size,Read Last 24 Hours (%s),Read Last %
 
 jobs = [j for j in api('get', 'protectionJobs?allUnderHierarchy=true') if ('isActive' not in j or j['isActive'] is not False) and ('isDeleted' not in j or j['isDeleted'] is not True)]
 
+# only download new runs if using the run history store
+getRuns = iterRuns
+if runhistory is True:
+    from pyhesity_runhistory import RunHistory
+    getRuns = functools.partial(RunHistory(historyfile).runs, refresh=refreshhistory)
+
 for job in sorted(jobs, key=lambda job: job['name'].lower()):
     print(job['name'])
     stats = {}
-    endUsecs = midnightusecs
-    while 1:
-        runs = [r for r in api('get', 'protectionRuns?jobId=%s&numRuns=%s&endTimeUsecs=%s&excludeNonRestoreableRuns=true' % (job['id'], numruns, endUsecs)) if r['backupRun']['stats']['endTimeUsecs'] < endUsecs]
-        if len(runs) > 0:
-            endUsecs = runs[-1]['backupRun']['stats']['startTimeUsecs']
-        else:
-            break
-        for run in runs:
-            for source in run['backupRun']['sourceBackupStatus']:
-                sourceName = source['source']['name']
-                if sourceName not in stats:
-                    stats[sourceName] = []
-                if run['backupRun']['stats']['startTimeUsecs'] > daysbackusecs:
-                    stats[sourceName].append({
-                        'startTimeUsecs': run['backupRun']['stats']['startTimeUsecs'],
-                        'dataRead': source['stats'].get('totalBytesReadFromSource', 0),
-                        'dataWritten': source['stats'].get('totalPhysicalBackupSizeBytes', 0),
-                        'logicalSize': source['stats'].get('totalLogicalBackupSizeBytes', 0)
-                    })
+    for run in getRuns(job['id'], startTimeUsecs=daysbackusecs, endTimeUsecs=midnightusecs, numRuns=numruns, params='&excludeNonRestoreableRuns=true'):
+        for source in run['backupRun']['sourceBackupStatus']:
+            sourceName = source['source']['name']
+            if sourceName not in stats:
+                stats[sourceName] = []
+            if run['backupRun']['stats']['startTimeUsecs'] > daysbackusecs:
+                stats[sourceName].append({
+                    'startTimeUsecs': run['backupRun']['stats']['startTimeUsecs'],
+                    'dataRead': source['stats'].get('totalBytesReadFromSource', 0),
+                    'dataWritten': source['stats'].get('totalPhysicalBackupSizeBytes', 0),
+                    'logicalSize': source['stats'].get('totalLogicalBackupSizeBytes', 0)
+                })
     for sourceName in stats:
         if len(stats[sourceName]) > 0:
             print("  %s" % sourceName)
@@ -3,8 +3,8 @@
 
 # import pyhesity wrapper module
 from pyhesity import *
+from pyhesity_report import ReportWriter
 from datetime import datetime
-import codecs
 
 # command line arguments
 import argparse
@@ -20,6 +20,7 @@ parser.add_argument('-np', '--noprompt', action='store_true')
 parser.add_argument('-m', '--mfacode', type=str, default=None)
 parser.add_argument('-em', '--emailmfacode', action='store_true')
 parser.add_argument('-f', '--folder', type=str, default='.')
+parser.add_argument('-gz', '--gzip', action='store_true')
 
 args = parser.parse_args()
 
@@ -34,6 +35,7 @@ noprompt = args.noprompt
 mfacode = args.mfacode
 emailmfacode = args.emailmfacode
 folder = args.folder
+gzipoutput = args.gzip
 
 # authenticate
 apiauth(vip=vip, username=username, domain=domain, password=password, useApiKey=useApiKey, helios=mcm, prompt=(not noprompt), emailMfaCode=emailmfacode, mfaCode=mfacode)
@@ -64,8 +66,8 @@ if len(clusternames) == 1:
 
 htmlfileName = '%s/jobEncryptionReport%s-%s.html' % (folder, filepart, dateString)
 csvfileName = '%s/jobEncryptionReport%s-%s.csv' % (folder, filepart, dateString)
-csv = codecs.open(csvfileName, 'w', 'utf-8')
-csv.write('"Cluster","Job Name","Job Type","Target Type","Storage Domain","Encrypted"\n')
+report = ReportWriter(htmlFileName=htmlfileName, csvFileName=csvfileName, compress=gzipoutput, quote=True)
+report.writeCsv('"Cluster","Job Name","Job Type","Target Type","Storage Domain","Encrypted"\n')
 
 html = '''<html>
 <head>
@@ -235,20 +237,25 @@ html += '''</p>
     <th>Target Type</th>
     <th>Storage Domain</th>
     <th>Encrypted</th>
-</tr>'''
+</tr>
+'''
+report.write(html)
+
+encryptionCellClasses = [None, None, None, None, None, 'wrap']
 
 for clustername in clusternames:
     if mcm or vip.lower() == 'helios.cohesity.com':
         heliosCluster(clustername)
         print(clustername)
-    vaults = api('get', 'vaults')
-    policies = api('get', 'data-protect/policies', v=2)
-    storageDomains = api('get', 'viewBoxes?allUnderHierarchy=true')
+    # index by id (rather than scanning the lists for every job)
+    vaults = dict((v['id'], v) for v in api('get', 'vaults'))
+    policies = dict((p['id'], p) for p in api('get', 'data-protect/policies', v=2)['policies'])
+    storageDomains = dict((s['id'], s) for s in api('get', 'viewBoxes?allUnderHierarchy=true'))
     jobs = api('get', 'data-protect/protection-groups?isDeleted=false&includeTenants=true', v=2)
     for job in sorted(jobs['protectionGroups'], key=lambda j: j['name'].lower()):
         targetType = 'Local'
         if 'storageDomainId' in job:
-            sd = [s for s in storageDomains if s['id'] == job['storageDomainId']]
+            sd = [storageDomains[job['storageDomainId']]] if job['storageDomainId'] in storageDomains else []
         else:
             sd = None
         if sd is not None and len(sd) > 0:
@@ -259,17 +266,17 @@ for clustername in clusternames:
         encrypted = False
         # cloud archive direct
         cad = False
-        policy = [p for p in policies['policies'] if p['id'] == job['policyId']]
+        policy = [policies[job['policyId']]] if job['policyId'] in policies else []
         if sd is not None and len(sd) == 0:
             # 6.8
             if 'regular' in policy[0]['backupPolicy'] and 'primaryBackupTarget' in policy[0]['backupPolicy']['regular']:
                 if policy[0]['backupPolicy']['regular']['primaryBackupTarget']['targetType'] == 'Archival':
-                    vault = [v for v in vaults if v['id'] == policy[0]['backupPolicy']['regular']['primaryBackupTarget']['archivalTargetSettings']['targetId']]
+                    vault = [vaults.get(policy[0]['backupPolicy']['regular']['primaryBackupTarget']['archivalTargetSettings']['targetId'])]
                     sdname = policy[0]['backupPolicy']['regular']['primaryBackupTarget']['archivalTargetSettings']['targetName']
                     cad = True
         elif 'directCloudArchive' in job[paramsKey] and job[paramsKey]['directCloudArchive'] is True:
             # 6.6
-            vault = [v for v in vaults if v['id'] == policy[0]['remoteTargetPolicy']['archivalTargets'][0]['targetId']]
+            vault = [vaults.get(policy[0]['remoteTargetPolicy']['archivalTargets'][0]['targetId'])]
             sdname = vault[0]['name']
             cad = True
         if cad is True:
@@ -288,39 +295,16 @@ for clustername in clusternames:
         # data is stored in local storage domain
         elif sd[0]['storagePolicy']['encryptionPolicy'] != 'kEncryptionNone':
             encrypted = True
-        html += '''<tr><td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td class="wrap">%s</td>
-                </tr>''' % (clustername, job['name'], job['environment'][1:], targetType, sdname, encrypted)
-        csv.write('"%s","%s","%s","%s","%s","%s"\n' % (clustername, job['name'], job['environment'][1:], targetType, sdname, encrypted))
+        report.row([clustername, job['name'], job['environment'][1:], targetType, sdname, encrypted], cellClass=encryptionCellClasses)
         if policy is not None and len(policy) > 0 and 'remoteTargetPolicy' in policy[0] and 'archivalTargets' in policy[0]['remoteTargetPolicy'] and len(policy[0]['remoteTargetPolicy']['archivalTargets']) > 0:
             for archivalTarget in policy[0]['remoteTargetPolicy']['archivalTargets']:
                 archiveEncrypted = 'Check Cloud Bucket'
-                vault = [v for v in vaults if v['id'] == archivalTarget['targetId']]
+                vault = [vaults.get(archivalTarget['targetId'])]
                 if vault[0]['encryptionPolicy'] != 'kEncryptionNone':
                     archiveEncrypted = True
-                html += '''<tr><td>%s</td>
-                        <td>%s</td>
-                        <td>%s</td>
-                        <td>%s</td>
-                        <td>%s</td>
-                        <td class="wrap">%s</td>
-                        </tr>''' % (clustername, job['name'], job['environment'][1:], 'Archive', vault[0]['name'], archiveEncrypted)
-                csv.write('"%s","%s","%s","%s","%s","%s"\n' % (clustername, job['name'], job['environment'][1:], 'Archive', vault[0]['name'], archiveEncrypted))
-
-html += '''</table>
-</div>
-</body>
-</html>
-'''
+                report.row([clustername, job['name'], job['environment'][1:], 'Archive', vault[0]['name'], archiveEncrypted], cellClass=encryptionCellClasses)
 
-print('\nsaving report as %s' % htmlfileName)
-print('             and %s\n' % csvfileName)
+report.close()
 
-f = codecs.open(htmlfileName, 'w', 'utf-8')
-f.write(html)
-f.close()
-csv.close()
+print('\nsaving report as %s' % report.htmlFileName)
+print('             and %s\n' % report.csvFileName)
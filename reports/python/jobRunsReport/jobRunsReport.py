@@ -5,6 +5,7 @@
 from pyhesity import *
 from datetime import datetime
 import codecs
+import functools
 
 # command line arguments
 import argparse
@@ -18,6 +19,9 @@ parser.add_argument('-j', '--jobname', type=str, required=True)
 parser.add_argument('-n', '--numruns', type=int, default=100)
 parser.add_argument('-y', '--days', type=int, default=7)
 parser.add_argument('-units', '--units', type=str, choices=['MB', 'GB', 'mb', 'gb'], default='MB')
+parser.add_argument('-rh', '--runhistory', action='store_true')      # keep runs in a local run history store
+parser.add_argument('-hf', '--historyfile', type=str, default=None)   # run history file (default is ~/.pyhesity/runhistory.db)
+parser.add_argument('-rr', '--refreshhistory', action='store_true')  # download stored runs again
 
 args = parser.parse_args()
 
@@ -30,6 +34,9 @@ jobname = args.jobname
 numruns = args.numruns
 days = args.days
 units = args.units
+runhistory = args.runhistory
+historyfile = args.historyfile
+refreshhistory = args.refreshhistory
 
 multiplier = 1024 * 1024
 if units.lower() == 'gb':
@@ -60,52 +67,49 @@ if jobs is None or len(jobs) == 0:
 else:
     job = job[0]
 
-finishedStates = ['kCanceled', 'kSuccess', 'kFailure', 'kWarning', 'kCanceling', '3', '4', '5', '6']
+# only download new runs if using the run history store
+getRuns = iterRuns
+if runhistory is True:
+    from pyhesity_runhistory import RunHistory
+    getRuns = functools.partial(RunHistory(historyfile).runs, refresh=refreshhistory)
 
-endUsecs = nowUsecs
+finishedStates = ['kCanceled', 'kSuccess', 'kFailure', 'kWarning', 'kCanceling', '3', '4', '5', '6']
 
-while 1:
-    runs = api('get', 'data-protect/protection-groups/%s/runs?numRuns=%s&endTimeUsecs=%s&includeTenants=true&includeObjectDetails=true' % (job['id'], numruns, endUsecs), v=2)
-    for run in runs['runs']:
-        try:
-            if 'localBackupInfo' in run:
-                info = run['localBackupInfo']
-            else:
-                info = run['archivalInfo']['archivalTargetResults'][0]
-            endUsecs = info['startTimeUsecs'] - 1
-            runtype = info['runType'][1:]
-            if runtype == 'Regular':
-                runType = 'Incremental'
-            startTimeUsecs = info['startTimeUsecs']
-            if 'endTimeUsecs' in info:
-                endTimeUsecs = info['endTimeUsecs']
-            else:
-                endTimeUsecs = nowUsecs
-            durationSecs = round((endTimeUsecs - startTimeUsecs) / 1000000, 0)
-            runStartTime = usecsToDate(info['startTimeUsecs'])
-            if info['startTimeUsecs'] < daysBackUsecs:
-                break
-            if 'localSnapshotStats' in info:
-                bytesread = round(info['localSnapshotStats']['bytesRead'] / multiplier, 2)
-                byteswritten = round(info['localSnapshotStats']['bytesWritten'] / multiplier, 2)
-                numsuccess = len([o for o in run['objects'] if o['localSnapshotInfo']['snapshotInfo']['status'] in ['kSuccessful', 'kWarning']])
-                numfailed = len([o for o in run['objects'] if o['localSnapshotInfo']['snapshotInfo']['status'] == 'kFailed'])
-            else:
-                bytesread = ''
-                byteswritten = ''
-                if 'stats' in info and 'bytesRead' in info['stats']:
-                    bytesread = round(info['stats']['bytesRead'] / multiplier, 2)
-                if 'stats' in info and 'physicalBytesTransferred' in info['stats']:
-                    byteswritten = round(info['stats']['physicalBytesTransferred'] / multiplier, 2)
-                numsuccess = ''
-                numfailed = ''
-            status = info['status']
-            print("    %s  %s" % (runStartTime, status))
-            f.write('"%s","%s","%s","%s","%s","%s","%s","%s"\n' % (runStartTime, runtype, durationSecs, status, bytesread, byteswritten, numsuccess, numfailed))
-        except Exception as e:
-            print('exception!')
-            pass
-    if len(runs['runs']) < numruns:
-        break
+for run in getRuns(job['id'], startTimeUsecs=daysBackUsecs, endTimeUsecs=nowUsecs, numRuns=numruns, v=2, params='&includeTenants=true&includeObjectDetails=true'):
+    try:
+        if 'localBackupInfo' in run:
+            info = run['localBackupInfo']
+        else:
+            info = run['archivalInfo']['archivalTargetResults'][0]
+        runtype = info['runType'][1:]
+        if runtype == 'Regular':
+            runType = 'Incremental'
+        startTimeUsecs = info['startTimeUsecs']
+        if 'endTimeUsecs' in info:
+            endTimeUsecs = info['endTimeUsecs']
+        else:
+            endTimeUsecs = nowUsecs
+        durationSecs = round((endTimeUsecs - startTimeUsecs) / 1000000, 0)
+        runStartTime = usecsToDate(info['startTimeUsecs'])
+        if 'localSnapshotStats' in info:
+            bytesread = round(info['localSnapshotStats']['bytesRead'] / multiplier, 2)
+            byteswritten = round(info['localSnapshotStats']['bytesWritten'] / multiplier, 2)
+            numsuccess = len([o for o in run['objects'] if o['localSnapshotInfo']['snapshotInfo']['status'] in ['kSuccessful', 'kWarning']])
+            numfailed = len([o for o in run['objects'] if o['localSnapshotInfo']['snapshotInfo']['status'] == 'kFailed'])
+        else:
+            bytesread = ''
+            byteswritten = ''
+            if 'stats' in info and 'bytesRead' in info['stats']:
+                bytesread = round(info['stats']['bytesRead'] / multiplier, 2)
+            if 'stats' in info and 'physicalBytesTransferred' in info['stats']:
+                byteswritten = round(info['stats']['physicalBytesTransferred'] / multiplier, 2)
+            numsuccess = ''
+            numfailed = ''
+        status = info['status']
+        print("    %s  %s" % (runStartTime, status))
+        f.write('"%s","%s","%s","%s","%s","%s","%s","%s"\n' % (runStartTime, runtype, durationSecs, status, bytesread, byteswritten, numsuccess, numfailed))
+    except Exception as e:
+        print('exception!')
+        pass
 f.close()
 print('\nOutput saved to %s\n' % outfile)
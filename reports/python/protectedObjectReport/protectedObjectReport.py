@@ -45,6 +45,7 @@ def gatherList(param=None, filename=None, name='items', required=True):
 
 
 objectnames = gatherList(objectnames, objectlist, name='objects', required=False)
+objectnameset = set([o.lower() for o in objectnames])
 
 # authenticate
 apiauth(vip=vip, username=username, domain=domain, password=password, useApiKey=useApiKey)
@@ -60,8 +61,11 @@ outfile = 'protectedObjectReport-%s-%s.csv' % (cluster['name'], dateString)
 f = codecs.open(outfile, 'w')
 
 # gather info
-sources = api('get', 'protectionSources?includeVMFolders=true')
-policies = api('get', 'data-protect/policies', v=2)['policies']
+# only the top level source names are needed (stream them rather than loading the whole source tree)
+sourceNames = {}
+for source in apiStream('get', 'protectionSources?includeVMFolders=true', '[*].protectionSource'):
+    sourceNames[source['id']] = source['name']
+policies = dict((p['id'], p) for p in api('get', 'data-protect/policies', v=2)['policies'])
 jobs = api('get', 'data-protect/protection-groups?includeTenants=true', v=2)
 
 # headings
@@ -100,10 +104,9 @@ for job in sorted(jobs['protectionGroups'], key=lambda j: j['name']):
             cloudArchiveDirect = True
 
         # policy
-        policy = [p for p in policies if p['id'] == job['policyId']]
+        policy = policies.get(job['policyId'], None)
 
-        if policy is not None and len(policy) > 0:
-            policy = policy[0]
+        if policy is not None:
             policyLink = 'https://%s/protection-policy/details/%s' % (vip, policy['id'])
         else:
             continue
@@ -162,7 +165,7 @@ for job in sorted(jobs['protectionGroups'], key=lambda j: j['name']):
                         else:
                             objectMiB = 0
 
-                        if object['id'] not in objects.keys():
+                        if object['id'] not in objects:
                             objects[object['id']] = {
                                 'name': object['name'],
                                 'id': object['id'],
@@ -197,22 +200,20 @@ for job in sorted(jobs['protectionGroups'], key=lambda j: j['name']):
                     except:
                         pass
 
-    for id in objects.keys():
+    for id in objects:
         object = objects[id]
-        if len(objectnames) == 0 or object['name'].lower() in [o.lower() for o in objectnames]:
+        if len(objectnameset) == 0 or object['name'].lower() in objectnameset:
             # parent
             parent = None
             parentName = '-'
             if object['sourceId'] != '':
-                parent = [s for s in sources if s['protectionSource']['id'] == object['sourceId']]
+                parent = []
 
-                if object['sourceId'] in objects.keys():
+                if object['sourceId'] in objects:
                     parent = objects[object['sourceId']]
                     parentName = parent['name']
-                else:
-                    parent = [s for s in sources if s['protectionSource']['id'] == object['sourceId']]
-                    if len(parent) > 0:
-                        parentName = parent[0]['protectionSource']['name']
+                elif object['sourceId'] in sourceNames:
+                    parentName = sourceNames[object['sourceId']]
 
             if parent is not None or object['environment'] == object['jobEnvironment']:
                 object['parent'] = parentName
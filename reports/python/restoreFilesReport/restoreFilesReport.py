@@ -3,8 +3,8 @@
 
 # import pyhesity wrapper module
 from pyhesity import *
+from pyhesity_report import ReportWriter
 from datetime import datetime
-import codecs
 import argparse
 
 from pyhesity import COHESITY_API
@@ -18,6 +18,9 @@ parser.add_argument('-i', '--useApiKey', action='store_true')         # use API
 parser.add_argument('-pwd', '--password', type=str, default=None)       # optional password
 parser.add_argument('-c', '--clustername', type=str, default=None)   # name of helios cluster to connect to
 parser.add_argument('-y', '--days', type=int, default=31)
+parser.add_argument('-gz', '--gzip', action='store_true')             # gzip output files
+parser.add_argument('-sd', '--slicedays', type=int, default=7)        # days per request
+parser.add_argument('-w', '--workers', type=int, default=4)           # parallel requests
 
 args = parser.parse_args()
 
@@ -28,8 +31,12 @@ password = args.password
 useApiKey = args.useApiKey
 clustername = args.clustername
 days = args.days
+gzipoutput = args.gzip
+slicedays = args.slicedays
+workers = args.workers
 
 ustart = timeAgo(days, 'days')
+uend = dateToUsecs(datetime.now())
 
 # authenticate
 apiauth(vip=vip, username=username, domain=domain, password=password, useApiKey=useApiKey, noretry=True)
@@ -68,14 +75,11 @@ htmlHeadings = ''.join(['<th>%s</th>' % h for h in headings])
 
 cluster = api('get', 'cluster')
 
-# CSV output
+# output files
 csvFileName = "%s_%s_%s.csv" % (filePrefix, cluster['name'], dateString)
-csv = codecs.open(csvFileName, 'w', 'utf-8')
-csv.write('%s\n' % csvHeadings)
-
-# HTML output
 htmlFileName = "%s_%s_%s.html" % (filePrefix, cluster['name'], dateString)
-htmlFile = codecs.open(htmlFileName, 'w', 'utf-8')
+report = ReportWriter(htmlFileName=htmlFileName, csvFileName=csvFileName, compress=gzipoutput, quote=True)
+report.writeCsv('%s\n' % csvHeadings)
 
 html = '''<html>
 <head>
@@ -209,7 +213,8 @@ html += '''</span>
 <table>
 <tr style="background-color: #F1F1F1;">'''
 html += htmlHeadings
-html += '</tr>'
+html += '</tr>\n'
+report.write(html)
 
 entityType = ['Unknown', 'VMware', 'HyperV', 'SQL', 'View', 'Puppeteer',
               'Physical', 'Pure', 'Azure', 'Netapp', 'Agent', 'GenericNas',
@@ -220,10 +225,46 @@ entityType = ['Unknown', 'VMware', 'HyperV', 'SQL', 'View', 'Puppeteer',
               'Nimble', 'AzureSnapshotManager', 'Elastifile', 'Cassandra', 'MongoDB',
               'HBase', 'Hive', 'Hdfs', 'Couchbase', 'Unknown', 'Unknown', 'Unknown']
 
-restores = api('get', 'data-protect/recoveries?startTimeUsecs=%s&recoveryActions=RecoverFiles&includeTenants=true' % ustart, v=2)
+# split the date range into slices (newest first) so each request stays small on a busy cluster
+slices = []
+sliceEnd = uend
+while sliceEnd >= ustart:
+    sliceStart = max(ustart, sliceEnd - (max(slicedays, 1) * 86400000000) + 1)
+    slices.append((sliceStart, sliceEnd))
+    sliceEnd = sliceStart - 1
+
+# collect the slices in parallel (up to --workers requests at a time)
+context = getContext()
+
+
+### collect one slice (in a worker thread)
+def getSlice(timeSlice):
+    (sliceStart, sliceEnd) = timeSlice
+    return api('get', 'data-protect/recoveries?startTimeUsecs=%s&endTimeUsecs=%s&recoveryActions=RecoverFiles&includeTenants=true' % (sliceStart, sliceEnd), v=2, context=context)
+
+
+### yield the recoveries of each slice as it arrives, in slice order
+def collectRestores():
+    for ((sliceStart, sliceEnd), restores, error) in parallelMap(getSlice, slices, workers=workers):
+        if error is not None:
+            print('error collecting restores: %s' % error)
+        if restores is None or 'recoveries' not in restores:
+            if restores is None or 'error' in restores:
+                print('failed to collect restores (%s - %s)' % (usecsToDate(sliceStart), usecsToDate(sliceEnd)))
+            continue
+        for restore in restores['recoveries']:
+            yield restore
 
-for restore in restores['recoveries']:
+
+taskCellClasses = ['nowrap', 'nowrap', None, None, None, None, None, None, None, None]
+
+seenTasks = set()
+for restore in collectRestores():
     taskId = restore['id']
+    # a recovery can be returned by two slices
+    if taskId in seenTasks:
+        continue
+    seenTasks.add(taskId)
     taskName = restore['name']
     status = restore['status']
     startTime = usecsToDate(restore['startTimeUsecs'], "%Y-%m-%d %H:%M")
@@ -255,47 +296,19 @@ for restore in restores['recoveries']:
             else:
                 continue
             filePath = ''
+            rowStyle = None
             if status == 'Failure':
-                html += "<tr style='color:BA3415;'>"
-            else:
-                html += "<tr>"
-            html += '''<td class="nowrap">%s</td>
-            <td class="nowrap"><a href=%s>%s</a></td>
-            <td>%s</td>
-            <td>%s</td>
-            <td>%s</td>
-            <td></td>
-            <td></td>
-            <td>%s</td>
-            <td>%s</td>
-            <td>%s</td>
-            </tr>''' % (startTime, link, taskName, objectName, targetObject, targetPath, status, duration, restore['creationInfo']['userName'])
-            csv.write('"%s","%s","%s","%s","%s","","","%s","%s","%s"\n' % (startTime, taskName, objectName, targetObject, targetPath, status, duration, restore['creationInfo']['userName']))
+                rowStyle = 'color:BA3415;'
+            report.row([startTime, '<a href=%s>%s</a>' % (link, taskName), objectName, targetObject, targetPath, '', '', status, duration, restore['creationInfo']['userName']],
+                       csvValues=[startTime, taskName, objectName, targetObject, targetPath, '', '', status, duration, restore['creationInfo']['userName']],
+                       cellClass=taskCellClasses, rowStyle=rowStyle)
         for file in restore[paramKey]['recoverFileAndFolderParams']['filesAndFolders']:
             if 'isDirectory' in file:
                 fileType = 'Folder'
             else:
                 fileType = 'File'
-            html += '''<td></td>
-            <td></td>
-            <td></td>
-            <td></td>
-            <td></td>
-            <td>%s</td>
-            <td>%s</td>
-            <td>%s</td>
-            <td></td>
-            <td></td>
-            </tr>''' % (fileType, file['absolutePath'], file['status'])
-            csv.write('"","","","","","%s","%s","%s","",""\n' % (fileType, file['absolutePath'], file['status']))
-
-html += '''</table>
-</div>
-</body>
-</html>'''
-
-htmlFile.write(html)
-htmlFile.close()
-csv.close()
-
-print('\nOutput saved to %s\nAlso saved to %s\n' % (htmlFileName, csvFileName))
+            report.row(['', '', '', '', '', fileType, file['absolutePath'], file['status'], '', ''])
+
+report.close()
+
+print('\nOutput saved to %s\nAlso saved to %s\n' % (report.htmlFileName, report.csvFileName))
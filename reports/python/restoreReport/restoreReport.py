@@ -3,8 +3,8 @@
 
 # import pyhesity wrapper module
 from pyhesity import *
+from pyhesity_report import ReportWriter
 from datetime import datetime, timedelta
-import codecs
 
 # command line arguments
 import argparse
@@ -25,6 +25,9 @@ parser.add_argument('-t', '--thismonth', action='store_true')
 parser.add_argument('-l', '--lastmonth', action='store_true')
 parser.add_argument('-y', '--days', type=int, default=31)
 parser.add_argument('-f', '--folder', type=str, default='.')
+parser.add_argument('-gz', '--gzip', action='store_true')
+parser.add_argument('-sd', '--slicedays', type=int, default=7)
+parser.add_argument('-w', '--workers', type=int, default=4)
 
 args = parser.parse_args()
 
@@ -44,6 +47,9 @@ thismonth = args.thismonth
 lastmonth = args.lastmonth
 days = args.days
 folder = args.folder
+gzipoutput = args.gzip
+slicedays = args.slicedays
+workers = args.workers
 
 # authenticate
 apiauth(vip=vip, username=username, domain=domain, password=password, useApiKey=useApiKey, helios=mcm, prompt=(not noprompt), emailMfaCode=emailmfacode, mfaCode=mfacode)
@@ -77,12 +83,31 @@ else:
 start = usecsToDate(uStart, '%Y-%m-%d')
 end = usecsToDate(uEnd, '%Y-%m-%d')
 
+# one context per cluster, so the clusters can be queried at the same time
+contexts = {}
 if mcm or vip.lower() == 'helios.cohesity.com':
+    connectedclusters = heliosClusters()
     if clusternames is None or len(clusternames) == 0:
-        clusternames = [c['name'] for c in heliosClusters()]
+        clusternames = [c['name'] for c in connectedclusters]
+    for clustername in clusternames:
+        accessCluster = [c for c in connectedclusters if c['name'].lower() == clustername.lower()]
+        if not accessCluster:
+            print('Cluster %s not connected to Helios' % clustername)
+            continue
+        contexts[clustername] = getContext()
+        contexts[clustername]['HEADER']['accessClusterId'] = str(accessCluster[0]['clusterId'])
 else:
     cluster = api('get', 'cluster')
     clusternames = [cluster['name']]
+    contexts[cluster['name']] = getContext()
+
+# split the date range into slices (newest first) so each request stays small on busy clusters
+slices = []
+sliceEnd = uEnd
+while sliceEnd >= uStart:
+    sliceStart = max(uStart, sliceEnd - (max(slicedays, 1) * 86400000000) + 1)
+    slices.append((sliceStart, sliceEnd))
+    sliceEnd = sliceStart - 1
 
 print('Collecting report data...')
 
@@ -94,8 +119,8 @@ if len(clusternames) == 1:
 
 htmlfileName = '%s/restoreReport%s-%s-%s.html' % (folder, filepart, start, end)
 csvfileName = '%s/restoreReport%s-%s-%s.csv' % (folder, filepart, start, end)
-csv = codecs.open(csvfileName, 'w', 'utf-8')
-csv.write('"Cluster","Date","Task","Object","Type","Target","Status","Duration (Min)","User"\n')
+report = ReportWriter(htmlFileName=htmlfileName, csvFileName=csvfileName, compress=gzipoutput, quote=True)
+report.writeCsv('"Cluster","Date","Task","Object","Type","Target","Status","Duration (Min)","User"\n')
 
 html = '''<html>
 <head>
@@ -264,7 +289,9 @@ html += '''</p>
     <th>Status</th>
     <th>Duration (Min)</th>
     <th>User</th>
-</tr>'''
+</tr>
+'''
+report.write(html)
 
 entityType = ['Unknown', 'VMware', 'HyperV', 'SQL', 'View', 'Puppeteer',
               'Physical', 'Pure', 'Azure', 'Netapp', 'Agent', 'GenericNas',
@@ -275,105 +302,97 @@ entityType = ['Unknown', 'VMware', 'HyperV', 'SQL', 'View', 'Puppeteer',
               'Nimble', 'AzureSnapshotManager', 'Elastifile', 'Cassandra', 'MongoDB',
               'HBase', 'Hive', 'Hdfs', 'Couchbase', 'Unknown', 'Unknown', 'Unknown']
 
-for clustername in clusternames:
-    if mcm or vip.lower() == 'helios.cohesity.com':
-        heliosCluster(clustername)
 
-    # restores = api('get', '/restoretasks?_includeTenantInfo=true&endTimeUsecs=%s&restoreTypes=kCloneView&restoreTypes=kConvertAndDeployVMs&restoreTypes=kCloneApp&restoreTypes=kCloneVMs&restoreTypes=kDeployVMs&restoreTypes=kMountFileVolume&restoreTypes=kMountVolumes&restoreTypes=kSystem&restoreTypes=kRecoverApp&restoreTypes=kRecoverSanVolume&restoreTypes=kRecoverVMs&restoreTypes=kRestoreFiles&restoreTypes=kRecoverVolumes&restoreTypes=kDownloadFiles&restoreTypes=kRecoverEmails&restoreTypes=kRecoverDisks&startTimeUsecs=%s&targetType=kLocal' % (uEnd, uStart))
-    restores = api('get', '/restoretasks?_includeTenantInfo=true&endTimeUsecs=%s&startTimeUsecs=%s&targetType=kLocal' % (uEnd, uStart))
-    for restore in restores:
-        taskId = restore['restoreTask']['performRestoreTaskState']['base']['taskId']
-        taskName = restore['restoreTask']['performRestoreTaskState']['base']['name']
-        status = restore['restoreTask']['performRestoreTaskState']['base']['publicStatus'][1:]
-        startTime = usecsToDate(restore['restoreTask']['performRestoreTaskState']['base']['startTimeUsecs'])
-        startTimeUsecs = restore['restoreTask']['performRestoreTaskState']['base']['startTimeUsecs']
-        restoreUser = restore['restoreTask']['performRestoreTaskState']['base']['user']
-        duration = '-'
-        if 'endTimeUsecs' in restore['restoreTask']['performRestoreTaskState']['base']:
-            endTime = usecsToDate(restore['restoreTask']['performRestoreTaskState']['base']['endTimeUsecs'])
-            endTimeUsecs = restore['restoreTask']['performRestoreTaskState']['base']['endTimeUsecs']
-            duration = round((endTimeUsecs - startTimeUsecs) / (60000000))
+def failureStyle(status):
+    if status == 'Failure':
+        return 'color:BA3415;'
+    return None
 
-        if 'objects' in restore['restoreTask']['performRestoreTaskState']:
-            for object in restore['restoreTask']['performRestoreTaskState']['objects']:
-                objectType = entityType[object['entity']['type']]
-                targetObject = objectName = object['entity']['displayName']
-                # vmware prefix/suffix
-                if 'renameRestoredObjectParam' in restore['restoreTask']['performRestoreTaskState']:
-                    if 'prefix' in restore['restoreTask']['performRestoreTaskState']['renameRestoredObjectParam']:
-                        targetObject = '%s%s' % (restore['restoreTask']['performRestoreTaskState']['renameRestoredObjectParam']['prefix'], targetObject)
-                    if 'suffix' in restore['restoreTask']['performRestoreTaskState']['renameRestoredObjectParam']:
-                        targetObject = '%s%s' % (targetObject, restore['restoreTask']['performRestoreTaskState']['renameRestoredObjectParam']['suffix'])
-                # netapp, isilon, genericNas
-                if 'restoreInfo' in restore['restoreTask']['performRestoreTaskState'] and restore['restoreTask']['performRestoreTaskState']['restoreInfo']['type'] in [9, 11, 14]:
-                    targetObject = restore['restoreTask']['performRestoreTaskState']['fullViewName']
-                if status == 'Failure':
-                    html += '<tr style="color:BA3415;">'
-                else:
-                    html += '<tr>'
-                html += '''<td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                </tr>''' % (clustername, startTime, taskName, objectName, objectType, targetObject, status, duration, restoreUser)
-                csv.write('"%s","%s","%s","%s","%s","%s","%s","%s","%s"\n' % (clustername, startTime, taskName, objectName, objectType, targetObject, status, duration, restoreUser))
-        elif 'restoreAppTaskState' in restore['restoreTask']['performRestoreTaskState']:
-            targetServer = sourceServer = restore['restoreTask']['performRestoreTaskState']['restoreAppTaskState']['restoreAppParams']['ownerRestoreInfo']['ownerObject']['entity']['displayName']
-            for restoreAppObject in restore['restoreTask']['performRestoreTaskState']['restoreAppTaskState']['restoreAppParams']['restoreAppObjectVec']:
-                objectName = restoreAppObject['appEntity']['displayName']
-                objectType = entityType[restoreAppObject['appEntity']['type']]
-                if 'targetHost' in restoreAppObject['restoreParams']:
-                    if restoreAppObject['restoreParams']['targetHost']['displayName']:
-                        targetServer = restoreAppObject['restoreParams']['targetHost']['displayName']
-                targetObject = targetServer
-                # sql target
-                if 'sqlRestoreParams' in restoreAppObject['restoreParams']:
-                    if 'instanceName' in restoreAppObject['restoreParams']['sqlRestoreParams']:
-                        if restoreAppObject['restoreParams']['sqlRestoreParams']['instanceName']:
-                            targetObject += '/%s' % restoreAppObject['restoreParams']['sqlRestoreParams']['instanceName']
-                    if 'newDatabaseName' in restoreAppObject['restoreParams']['sqlRestoreParams']:
-                        if restoreAppObject['restoreParams']['sqlRestoreParams']['newDatabaseName']:
-                            targetObject += '/%s' % restoreAppObject['restoreParams']['sqlRestoreParams']['newDatabaseName']
-                # oracle target
-                if 'oracleRestoreParams' in restoreAppObject['restoreParams']:
-                    if 'alternateLocationParams' in restoreAppObject['restoreParams']['oracleRestoreParams']:
-                        if 'newDatabaseName' in restoreAppObject['restoreParams']['oracleRestoreParams']['alternateLocationParams']:
-                            targetObject += '/%s' % restoreAppObject['restoreParams']['oracleRestoreParams']['alternateLocationParams']['newDatabaseName']
-                if targetObject == targetServer:
-                    targetObject = '%s/%s' % (targetServer, objectName)
-                if status == 'Failure':
-                    html += '<tr style="color:BA3415;">'
-                else:
-                    html += '<tr>'
-                html += '''<td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td>%s/%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                <td>%s</td>
-                </tr>''' % (clustername, startTime, taskName, sourceServer, objectName, objectType, targetObject, status, duration, restoreUser)
-                csv.write('"%s","%s","%s","%s/%s","%s","%s","%s","%s","%s"\n' % (clustername, startTime, taskName, sourceServer, objectName, objectType, targetObject, status, duration, restoreUser))
-        else:
-            print("***************more types****************")
 
-html += '''</table>
-</div>
-</body>
-</html>
-'''
+# collect the slices in parallel (up to --workers requests at a time)
+tasks = [(clustername, sliceStart, sliceEnd) for clustername in clusternames if clustername in contexts for (sliceStart, sliceEnd) in slices]
+
+
+### collect one slice (in a worker thread)
+def getSlice(task):
+    (clustername, sliceStart, sliceEnd) = task
+    # return api('get', '/restoretasks?_includeTenantInfo=true&endTimeUsecs=%s&restoreTypes=kCloneView&restoreTypes=kConvertAndDeployVMs&restoreTypes=kCloneApp&restoreTypes=kCloneVMs&restoreTypes=kDeployVMs&restoreTypes=kMountFileVolume&restoreTypes=kMountVolumes&restoreTypes=kSystem&restoreTypes=kRecoverApp&restoreTypes=kRecoverSanVolume&restoreTypes=kRecoverVMs&restoreTypes=kRestoreFiles&restoreTypes=kRecoverVolumes&restoreTypes=kDownloadFiles&restoreTypes=kRecoverEmails&restoreTypes=kRecoverDisks&startTimeUsecs=%s&targetType=kLocal' % (sliceEnd, sliceStart))
+    return api('get', '/restoretasks?_includeTenantInfo=true&endTimeUsecs=%s&startTimeUsecs=%s&targetType=kLocal' % (sliceEnd, sliceStart), context=contexts[clustername])
+
+
+### yield the restores of each slice as it arrives, in cluster and slice order
+def collectRestores():
+    for ((clustername, sliceStart, sliceEnd), restores, error) in parallelMap(getSlice, tasks, workers=workers):
+        if error is not None:
+            print('error collecting restores from %s: %s' % (clustername, error))
+        if not isinstance(restores, list):
+            print('failed to collect restores from %s (%s - %s)' % (clustername, usecsToDate(sliceStart), usecsToDate(sliceEnd)))
+            continue
+        for restore in restores:
+            yield (clustername, restore)
+
+
+seenTasks = set()
+for (clustername, restore) in collectRestores():
+    taskId = restore['restoreTask']['performRestoreTaskState']['base']['taskId']
+    # a task can be returned by two slices
+    if (clustername, taskId) in seenTasks:
+        continue
+    seenTasks.add((clustername, taskId))
+    taskName = restore['restoreTask']['performRestoreTaskState']['base']['name']
+    status = restore['restoreTask']['performRestoreTaskState']['base']['publicStatus'][1:]
+    startTime = usecsToDate(restore['restoreTask']['performRestoreTaskState']['base']['startTimeUsecs'])
+    startTimeUsecs = restore['restoreTask']['performRestoreTaskState']['base']['startTimeUsecs']
+    restoreUser = restore['restoreTask']['performRestoreTaskState']['base']['user']
+    duration = '-'
+    if 'endTimeUsecs' in restore['restoreTask']['performRestoreTaskState']['base']:
+        endTime = usecsToDate(restore['restoreTask']['performRestoreTaskState']['base']['endTimeUsecs'])
+        endTimeUsecs = restore['restoreTask']['performRestoreTaskState']['base']['endTimeUsecs']
+        duration = round((endTimeUsecs - startTimeUsecs) / (60000000))
+
+    if 'objects' in restore['restoreTask']['performRestoreTaskState']:
+        for object in restore['restoreTask']['performRestoreTaskState']['objects']:
+            objectType = entityType[object['entity']['type']]
+            targetObject = objectName = object['entity']['displayName']
+            # vmware prefix/suffix
+            if 'renameRestoredObjectParam' in restore['restoreTask']['performRestoreTaskState']:
+                if 'prefix' in restore['restoreTask']['performRestoreTaskState']['renameRestoredObjectParam']:
+                    targetObject = '%s%s' % (restore['restoreTask']['performRestoreTaskState']['renameRestoredObjectParam']['prefix'], targetObject)
+                if 'suffix' in restore['restoreTask']['performRestoreTaskState']['renameRestoredObjectParam']:
+                    targetObject = '%s%s' % (targetObject, restore['restoreTask']['performRestoreTaskState']['renameRestoredObjectParam']['suffix'])
+            # netapp, isilon, genericNas
+            if 'restoreInfo' in restore['restoreTask']['performRestoreTaskState'] and restore['restoreTask']['performRestoreTaskState']['restoreInfo']['type'] in [9, 11, 14]:
+                targetObject = restore['restoreTask']['performRestoreTaskState']['fullViewName']
+            report.row([clustername, startTime, taskName, objectName, objectType, targetObject, status, duration, restoreUser], rowStyle=failureStyle(status))
+    elif 'restoreAppTaskState' in restore['restoreTask']['performRestoreTaskState']:
+        targetServer = sourceServer = restore['restoreTask']['performRestoreTaskState']['restoreAppTaskState']['restoreAppParams']['ownerRestoreInfo']['ownerObject']['entity']['displayName']
+        for restoreAppObject in restore['restoreTask']['performRestoreTaskState']['restoreAppTaskState']['restoreAppParams']['restoreAppObjectVec']:
+            objectName = restoreAppObject['appEntity']['displayName']
+            objectType = entityType[restoreAppObject['appEntity']['type']]
+            if 'targetHost' in restoreAppObject['restoreParams']:
+                if restoreAppObject['restoreParams']['targetHost']['displayName']:
+                    targetServer = restoreAppObject['restoreParams']['targetHost']['displayName']
+            targetObject = targetServer
+            # sql target
+            if 'sqlRestoreParams' in restoreAppObject['restoreParams']:
+                if 'instanceName' in restoreAppObject['restoreParams']['sqlRestoreParams']:
+                    if restoreAppObject['restoreParams']['sqlRestoreParams']['instanceName']:
+                        targetObject += '/%s' % restoreAppObject['restoreParams']['sqlRestoreParams']['instanceName']
+                if 'newDatabaseName' in restoreAppObject['restoreParams']['sqlRestoreParams']:
+                    if restoreAppObject['restoreParams']['sqlRestoreParams']['newDatabaseName']:
+                        targetObject += '/%s' % restoreAppObject['restoreParams']['sqlRestoreParams']['newDatabaseName']
+            # oracle target
+            if 'oracleRestoreParams' in restoreAppObject['restoreParams']:
+                if 'alternateLocationParams' in restoreAppObject['restoreParams']['oracleRestoreParams']:
+                    if 'newDatabaseName' in restoreAppObject['restoreParams']['oracleRestoreParams']['alternateLocationParams']:
+                        targetObject += '/%s' % restoreAppObject['restoreParams']['oracleRestoreParams']['alternateLocationParams']['newDatabaseName']
+            if targetObject == targetServer:
+                targetObject = '%s/%s' % (targetServer, objectName)
+            report.row([clustername, startTime, taskName, '%s/%s' % (sourceServer, objectName), objectType, targetObject, status, duration, restoreUser], rowStyle=failureStyle(status))
+    else:
+        print("***************more types****************")
 
-print('\nsaving report as %s' % htmlfileName)
-print('             and %s\n' % csvfileName)
+report.close()
 
-f = codecs.open(htmlfileName, 'w', 'utf-8')
-f.write(html)
-f.close()
-csv.close()
+print('\nsaving report as %s' % report.htmlFileName)
+print('             and %s\n' % report.csvFileName)
@@ -5,6 +5,7 @@
 from pyhesity import *
 from datetime import datetime
 import codecs
+import functools
 
 # command line arguments
 import argparse
@@ -17,6 +18,9 @@ parser.add_argument('-pwd', '--password', type=str, default=None)   # optional p
 parser.add_argument('-j', '--jobname', action='append', type=str)
 parser.add_argument('-l', '--joblist', type=str)
 parser.add_argument('-n', '--numruns', type=int, default=100)
+parser.add_argument('-rh', '--runhistory', action='store_true')      # keep runs in a local run history store
+parser.add_argument('-hf', '--historyfile', type=str, default=None)   # run history file (default is ~/.pyhesity/runhistory.db)
+parser.add_argument('-rr', '--refreshhistory', action='store_true')  # download stored runs again
 args = parser.parse_args()
 
 vip = args.vip
@@ -27,6 +31,9 @@ useApiKey = args.useApiKey
 jobnames = args.jobname
 joblist = args.joblist
 numruns = args.numruns
+runhistory = args.runhistory
+historyfile = args.historyfile
+refreshhistory = args.refreshhistory
 
 # authenticate
 apiauth(vip=vip, username=username, domain=domain, password=password, useApiKey=useApiKey, noretry=True)
@@ -70,6 +77,12 @@ if len(notfoundjobs) > 0:
     print('Jobs not found: %s' % ', '.join(notfoundjobs))
     exit(1)
 
+# only download new runs if using the run history store
+getRuns = iterRuns
+if runhistory is True:
+    from pyhesity_runhistory import RunHistory
+    getRuns = functools.partial(RunHistory(historyfile).runs, refresh=refreshhistory)
+
 for job in sorted(jobs['protectionGroups'], key=lambda job: job['name'].lower()):
     if len(jobnames) == 0 or job['name'].lower() in [j.lower() for j in jobnames]:
 
@@ -80,18 +93,11 @@ for job in sorted(jobs['protectionGroups'], key=lambda job: job['name'].lower())
             tenant = ''
             print('%s' % job['name'])
 
-        endUsecs = nowUsecs
-        while 1:
-            runs = api('get', 'data-protect/protection-groups/%s/runs?numRuns=%s&endTimeUsecs=%s&includeTenants=true' % (job['id'], numruns, endUsecs), v=2)
-            if len(runs['runs']) > 0:
-                endUsecs = runs['runs'][-1]['localBackupInfo']['startTimeUsecs'] - 1
-            else:
-                break
-            for run in runs['runs']:
-                runStartTime = usecsToDate(run['localBackupInfo']['startTimeUsecs'])
-                status = run['localBackupInfo']['status']
-                print("    %s  %s" % (runStartTime, status))
-                f.write('"%s","%s","%s","%s"\n' % (job['name'], tenant, runStartTime, status))
+        for run in getRuns(job['id'], endTimeUsecs=nowUsecs, numRuns=numruns, v=2, params='&includeTenants=true'):
+            runStartTime = usecsToDate(run['localBackupInfo']['startTimeUsecs'])
+            status = run['localBackupInfo']['status']
+            print("    %s  %s" % (runStartTime, status))
+            f.write('"%s","%s","%s","%s"\n' % (job['name'], tenant, runStartTime, status))
 
 f.close()
 print('\nOutput saved to %s\n' % outfile)
@@ -3,8 +3,8 @@
 
 # import pyhesity wrapper module
 from pyhesity import *
+from pyhesity_report import ReportWriter
 from datetime import datetime
-import codecs
 
 # command line arguments
 import argparse
@@ -15,6 +15,7 @@ parser.add_argument('-d', '--domain', type=str, default='local')
 parser.add_argument('-i', '--useApiKey', action='store_true')
 parser.add_argument('-pwd', '--password', type=str)
 parser.add_argument('-of', '--outfolder', type=str, default='.')
+parser.add_argument('-gz', '--gzip', action='store_true')
 
 args = parser.parse_args()
 
@@ -24,6 +25,7 @@ domain = args.domain
 password = args.password
 folder = args.outfolder
 useApiKey = args.useApiKey
+gzipoutput = args.gzip
 
 # authenticate
 apiauth(vip=vip, username=username, domain=domain, password=password, useApiKey=useApiKey)
@@ -39,8 +41,8 @@ now = datetime.now()
 datestring = now.strftime("%Y-%m-%d")
 htmlfileName = '%s/storageReport-%s-%s.html' % (folder, cluster['name'], datestring)
 csvfileName = '%s/storageReport-%s-%s.csv' % (folder, cluster['name'], datestring)
-csv = codecs.open(csvfileName, 'w', 'utf-8')
-csv.write("Job/View Name,Environment,Local/Replicated,Source Cluster,GiB Logical,GiB Ingested,GiB Consumed,Dedup Ratio,Compression,Reduction\n")
+report = ReportWriter(htmlFileName=htmlfileName, csvFileName=csvfileName, compress=gzipoutput)
+report.writeCsv("Job/View Name,Environment,Local/Replicated,Source Cluster,GiB Logical,GiB Ingested,GiB Consumed,Dedup Ratio,Compression,Reduction\n")
 
 html = '''<html>
 <head>
@@ -218,7 +220,9 @@ html += '''</span>
     <th>Dedup Ratio</th>
     <th>Compression</th>
     <th>Reduction</th>
-</tr>'''
+</tr>
+'''
+report.write(html)
 
 
 def processStats(stats, name, environment, location):
@@ -257,19 +261,7 @@ def processStats(stats, name, environment, location):
     logical = round(float(logicalBytes) / (1024 * 1024 * 1024), 1)
     dataInGiB = round(float(dataIn) / (1024 * 1024 * 1024), 1)
     print('%30s: %11s %s' % (name, consumption, 'GiB'))
-    csv.write('%s,%s,%s,%s,%s,%s,%s,%s,%s,%s\n' % (name, environment, location, sourcecluster, logical, dataInGiB, consumption, dedup, compression, reduction))
-    return '''<tr>
-    <td>%s</td>
-    <td>%s</td>
-    <td>%s</td>
-    <td>%s</td>
-    <td>%s</td>
-    <td>%s</td>
-    <td>%s</td>
-    <td>%s</td>
-    <td>%s</td>
-    <td>%s</td>
-    </tr>''' % (name, environment, location, sourcecluster, logical, dataInGiB, consumption, dedup, compression, reduction)
+    report.row([name, environment, location, sourcecluster, logical, dataInGiB, consumption, dedup, compression, reduction])
 
 
 jobs = api('get', 'protectionJobs?allUnderHierarchy=true')
@@ -282,7 +274,7 @@ for job in sorted(jobs, key=lambda job: job['name'].lower()):
         else:
             stats = api('get', 'stats/consumers?consumerType=kProtectionRuns&consumerIdList=%s' % job['id'])
         if 'statsList' in stats and stats['statsList'] is not None:
-            html += processStats(stats, job['name'], job['environment'][1:], 'Local')
+            processStats(stats, job['name'], job['environment'][1:], 'Local')
 
 print("\n  Unprotected Views...")
 views = api('get', 'views?allUnderHierarchy=true')
@@ -290,7 +282,7 @@ if 'views' in views and len(views['views']) > 0:
     for view in sorted([v for v in views['views'] if 'viewProtection' not in v], key=lambda view: view['name'].lower()):
         stats = api('get', 'stats/consumers?consumerType=kViews&consumerIdList=%s' % view['viewId'])
         if 'statsList' in stats and stats['statsList'] is not None:
-            html += processStats(stats, view['name'], 'View', 'Local')
+            processStats(stats, view['name'], 'View', 'Local')
 
 print("\n  Replicated ProtectionJobs...")
 for job in sorted(jobs, key=lambda job: job['name'].lower()):
@@ -300,17 +292,9 @@ for job in sorted(jobs, key=lambda job: job['name'].lower()):
         else:
             stats = api('get', 'stats/consumers?consumerType=kReplicationRuns&consumerIdList=%s' % job['id'])
         if 'statsList' in stats and stats['statsList'] is not None:
-            html += processStats(stats, job['name'], job['environment'][1:], 'Replicated')
-
-html += '''</table>
-</div>
-</body>
-</html>
-'''
+            processStats(stats, job['name'], job['environment'][1:], 'Replicated')
 
-print('\nsaving report as %s' % htmlfileName)
-print('             and %s\n' % csvfileName)
+report.close()
 
-f = codecs.open(htmlfileName, 'w', 'utf-8')
-f.write(html)
-f.close()
+print('\nsaving report as %s' % report.htmlFileName)
+print('             and %s\n' % report.csvFileName)
@@ -3,8 +3,9 @@
 
 # import pyhesity wrapper module
 from pyhesity import *
+from pyhesity_report import ReportWriter
 from datetime import datetime
-import codecs
+import bisect
 
 # command line arguments
 import argparse
@@ -16,6 +17,8 @@ parser.add_argument('-i', '--useApiKey', action='store_true')
 parser.add_argument('-pwd', '--password', type=str)
 parser.add_argument('-of', '--outfolder', type=str, default='.')
 parser.add_argument('-dy', '--days', type=int, default=31)
+parser.add_argument('-gz', '--gzip', action='store_true')
+parser.add_argument('-w', '--workers', type=int, default=4)
 
 args = parser.parse_args()
 
@@ -26,11 +29,33 @@ password = args.password
 folder = args.outfolder
 days = args.days
 useApiKey = args.useApiKey
+gzipoutput = args.gzip
+workers = args.workers
 
-for vip in vips:
 
-    # authenticate
-    apiauth(vip=vip, username=username, domain=domain, password=password, useApiKey=useApiKey)
+def searchJob(job, sourceTypes):
+    """latest snapshot of each object in a job (one paged searchvms query per job)"""
+    latestSnapshots = {}
+    pageSize = 1000
+    start = 0
+    entityTypes = ''.join(['&entityTypes=%s' % sourceType for sourceType in sorted(sourceTypes)])
+    while True:
+        search = api('get', '/searchvms?allUnderHierarchy=true&jobIds=%s%s&size=%s&from=%s' % (job['id'], entityTypes, pageSize, start))
+        if search is None or 'vms' not in search:
+            break
+        for vm in search['vms']:
+            objectName = vm['vmDocument']['objectName']
+            snapshotUsecs = vm['vmDocument']['versions'][0]['instanceId']['jobStartTimeUsecs']
+            if objectName not in latestSnapshots or snapshotUsecs > latestSnapshots[objectName]:
+                latestSnapshots[objectName] = snapshotUsecs
+        if search.get('count', 0) > start + pageSize:
+            start += pageSize
+        else:
+            break
+    return latestSnapshots
+
+
+def strikeReport(vip):
 
     print('Collecting report data for %s...' % vip)
 
@@ -42,7 +67,7 @@ for vip in vips:
     datestring = now.strftime("%Y-%m-%d")
     htmlfileName = '%s/%s-%s-strikeReport.html' % (folder, datestring, cluster['name'])
     csvfileName = '%s/%s-%s-strikeReport.csv' % (folder, datestring, cluster['name'])
-    csv = codecs.open(csvfileName, 'w', 'utf-8')
+    report = ReportWriter(htmlFileName=htmlfileName, csvFileName=csvfileName, compress=gzipoutput, quote=True)
 
     html = '''<html>
     <head>
@@ -159,89 +184,112 @@ for vip in vips:
         <th>Failure Count</th>
         <th>Last Good Backup</th>
         <th>Error Message</th>
-    </tr>'''
-
-    csv.write('Object Name,Type,Job Name,Failure Count,Last Good Backup,Error Message\n')
+    </tr>
+'''
+    report.write(html)
+    report.writeCsv('Object Name,Type,Job Name,Failure Count,Last Good Backup,Error Message\n')
 
     objectStatus = {}
     totalObjects = 0
+    daysBackUsecs = timeAgo(days, 'days')
 
     print('getting runs...')
-    allruns = api('get', 'protectionRuns?excludeTasks=true&startTimeUsecs=%s&numRuns=999999' % timeAgo(31, 'days'))
+    allruns = api('get', 'protectionRuns?excludeTasks=true&startTimeUsecs=%s&numRuns=999999' % daysBackUsecs)
     print('getting jobs...')
     jobs = api('get', 'protectionJobs?allUnderHierarchy=true&isActive=true&includeLastRunAndStats=true')
 
+    # run start times per job (sorted, so runs since a given time is a binary search)
+    runStarts = {}
+    for run in allruns:
+        runStarts.setdefault(run['jobId'], []).append(run['backupRun']['stats']['startTimeUsecs'])
+    for jobId in runStarts:
+        runStarts[jobId].sort()
+
     for job in sorted(jobs, key=lambda job: job['name'].lower()):
         print("  %s" % job['name'])
         if 'lastRun' in job:
             startTimeUsecs = job['lastRun']['backupRun']['stats']['startTimeUsecs']
-            for source in job['lastRun']['backupRun']['sourceBackupStatus']:
-                totalObjects += 1
+            sources = job['lastRun']['backupRun']['sourceBackupStatus']
+            totalObjects += len(sources)
+            failedSources = [source for source in sources if source['status'] not in ['kSuccess', 'kWarning']]
+            if len(failedSources) == 0:
+                continue
+            latestSnapshots = searchJob(job, set([source['source']['environment'] for source in failedSources]))
+            jobRunStarts = runStarts.get(job['id'], [])
+            for source in failedSources:
                 sourcename = source['source']['name']
-                if source['status'] not in ['kSuccess', 'kWarning']:
-                    sourceType = source['source']['environment']
-                    if sourceType == 'kPuppeteer':
-                        sourceType == 'kView'
-                    search = api('get', '/searchvms?vmName=%s&entityTypes=%s&allUnderHierarchy=true&jobIds=%s' % (sourcename, sourceType, job['id']))
-                    if 'vms' in search:
-                        latestSnapshotUsecs = search['vms'][0]['vmDocument']['versions'][0]['instanceId']['jobStartTimeUsecs']
-                        errorRuns = [run for run in allruns if run['jobId'] == job['id'] and run['backupRun']['stats']['startTimeUsecs'] > latestSnapshotUsecs]
-                    else:
-                        errorRuns = [run for run in allruns if run['jobId'] == job['id'] and run['backupRun']['stats']['startTimeUsecs'] > (timeAgo(31, 'days'))]
-                        latestSnapshotUsecs = 0
-                    if errorRuns:
-                        numErrors = len(errorRuns)
-                        if source['status'] != 'kFailure':
-                            numErrors -= 1
-                    else:
-                        numErrors = '-'
-                    thisStatus = {'objectName': sourcename,
-                                  'status': source['status'],
-                                  'jobName': job['name'],
-                                  'jobId': job['id'],
-                                  'jobType': source['source']['environment'],
-                                  'startTimeUsecs': startTimeUsecs,
-                                  'latestSnapshotUsecs': latestSnapshotUsecs,
-                                  'numErrors': numErrors}
-                    if 'error' in source:
-                        thisStatus['message'] = source['error']
-                    else:
-                        thisStatus['message'] = ''
-                    if numErrors != 0 and (sourcename not in objectStatus or startTimeUsecs > objectStatus[sourcename]['startTimeUsecs']):
-                        objectStatus[sourcename] = thisStatus
+                if sourcename in latestSnapshots:
+                    latestSnapshotUsecs = latestSnapshots[sourcename]
+                    errorRuns = len(jobRunStarts) - bisect.bisect_right(jobRunStarts, latestSnapshotUsecs)
+                else:
+                    errorRuns = len(jobRunStarts) - bisect.bisect_right(jobRunStarts, daysBackUsecs)
+                    latestSnapshotUsecs = 0
+                if errorRuns > 0:
+                    numErrors = errorRuns
+                    if source['status'] != 'kFailure':
+                        numErrors -= 1
+                else:
+                    numErrors = '-'
+                thisStatus = {'objectName': sourcename,
+                              'status': source['status'],
+                              'jobName': job['name'],
+                              'jobId': job['id'],
+                              'jobType': source['source']['environment'],
+                              'startTimeUsecs': startTimeUsecs,
+                              'latestSnapshotUsecs': latestSnapshotUsecs,
+                              'numErrors': numErrors}
+                if 'error' in source:
+                    thisStatus['message'] = source['error']
+                else:
+                    thisStatus['message'] = ''
+                if numErrors != 0 and (sourcename not in objectStatus or startTimeUsecs > objectStatus[sourcename]['startTimeUsecs']):
+                    objectStatus[sourcename] = thisStatus
 
     for entity in objectStatus:
         if objectStatus[entity]['latestSnapshotUsecs'] == 0:
             lastSuccess = '-'
         else:
             lastSuccess = usecsToDate(objectStatus[entity]['latestSnapshotUsecs'])
-        row = '''<tr>
-                    <td>%s</td>
-                    <td>%s</td>
-                    <td>%s</td>
-                    <td>%s</td>
-                    <td>%s</td>
-                    <td>%s</td>
-                </tr>''' % (entity, objectStatus[entity]['jobType'], objectStatus[entity]['jobName'], objectStatus[entity]['numErrors'], lastSuccess, objectStatus[entity]['message'][:99])
-        html += row
-        csv.write('"%s","%s","%s","%s","%s","%s"\n' % (entity, objectStatus[entity]['jobType'], objectStatus[entity]['jobName'], objectStatus[entity]['numErrors'], lastSuccess, objectStatus[entity]['message'][:99]))
+        report.row([entity, objectStatus[entity]['jobType'], objectStatus[entity]['jobName'], objectStatus[entity]['numErrors'], lastSuccess, objectStatus[entity]['message'][:99]])
     totalFailedObjects = len(objectStatus)
     if totalObjects != 0:
         percentFailed = round((100 * (float(totalObjects - totalFailedObjects)) / float(totalObjects)), 2)
     else:
         percentFailed = 0
 
-    html += '''</table>
+    report.close(footer='''</table>
     <p style="margin-top: 15px; margin-bottom: 15px;"><span style="font-size:1em;">%s protected objects failed out of %s total objects (%s%% success rate)</span></p>
     </div>
     </body>
     </html>
-    ''' % (totalFailedObjects, totalObjects, percentFailed)
+    ''' % (totalFailedObjects, totalObjects, percentFailed))
+
+    print('saving report as %s' % report.htmlFileName)
+    print('also saving as %s' % report.csvFileName)
+
+
+# authenticate to each cluster (one at a time, in case of password prompts)
+contexts = []
+for vip in vips:
+    context = newContext()
+    apiauth(vip=vip, username=username, domain=domain, password=password, useApiKey=useApiKey, context=context)
+    if apiconnected(context=context) is False:
+        print('authentication to %s failed' % vip)
+        continue
+    contexts.append((vip, context))
+
+
+### report on one cluster (in a worker thread)
+def reportOn(cluster):
+    (vip, context) = cluster
+    useContext(context)
+    try:
+        strikeReport(vip)
+    finally:
+        useContext(None)
 
-    print('saving report as %s' % htmlfileName)
-    print('also saving as %s' % csvfileName)
 
-    f = codecs.open(htmlfileName, 'w', 'utf-8')
-    f.write(html)
-    f.close()
-    csv.close()
+# report on the clusters in parallel
+for ((vip, context), result, error) in parallelMap(reportOn, contexts, workers=workers, ordered=False):
+    if error is not None:
+        print('error reporting on %s: %s' % (vip, error))
@@ -36,20 +36,26 @@ views = api('get', 'views')
 
 if views['count'] > 0:
 
-    for view in sorted(views['views'], key=lambda v: v['name'].lower()):
+    # stats entity of each view
+    entityIds = {}
+    for view in views['views']:
         consumer = api('get', 'stats/consumers?consumerType=kViews&consumerIdList=%s' % view['viewId'])
         if consumer is not None and 'statsList' in consumer and consumer['statsList'] is not None and len(consumer['statsList']) > 0 and 'groupList' in consumer['statsList'][0] and consumer['statsList'][0] is not None and len(consumer['statsList'][0]['groupList']) > 0 and 'entityId' in consumer['statsList'][0]['groupList'][0]:
-            entityId = consumer['statsList'][0]['groupList'][0]['entityId']
-            folderStats = api('get', 'statistics/timeSeriesStats?startTimeMsecs=%s&schemaName=BookKeeperStats&metricName=NumDirectories&rollupIntervalSecs=21600&rollupFunction=latest&entityIdList=%s&endTimeMsecs=%s' % (startMsecs, entityId, endMsecs))
-            if folderStats is not None and 'dataPointVec' in folderStats and len(folderStats['dataPointVec']) > 0:
-                numDirectories = folderStats['dataPointVec'][0]['data']['int64Value']
-            else:
-                numDirectories = 0
-            fileStats = api('get', 'statistics/timeSeriesStats?startTimeMsecs=%s&schemaName=BookKeeperStats&metricName=NumFiles&rollupIntervalSecs=21600&rollupFunction=latest&entityIdList=%s&endTimeMsecs=%s' % (startMsecs, entityId, endMsecs))
-            if fileStats is not None and 'dataPointVec' in fileStats and len(fileStats['dataPointVec']) > 0:
-                numFiles = fileStats['dataPointVec'][0]['data']['int64Value']
-            else:
-                numFiles = 0
+            entityIds[view['viewId']] = consumer['statsList'][0]['groupList'][0]['entityId']
+
+    # folder and file counts of all views (fetched in parallel)
+    counts = timeSeriesStats([('BookKeeperStats', metricName, entityId) for entityId in entityIds.values() for metricName in ['NumDirectories', 'NumFiles']], startMsecs, endMsecs, rollupIntervalSecs=21600)
+
+    def firstValue(metricName, entityId):
+        for value in counts['series'][('BookKeeperStats', metricName, entityId)]:
+            if value is not None:
+                return value
+        return 0
+
+    for view in sorted(views['views'], key=lambda v: v['name'].lower()):
+        if view['viewId'] in entityIds:
+            numDirectories = firstValue('NumDirectories', entityIds[view['viewId']])
+            numFiles = firstValue('NumFiles', entityIds[view['viewId']])
         else:
             numFiles = 0
             numDirectories = 0
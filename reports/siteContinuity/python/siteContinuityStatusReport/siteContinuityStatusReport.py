@@ -3,8 +3,8 @@
 
 # import pyhesity wrapper module
 from pyhesity import *
+from pyhesity_report import ReportWriter
 from datetime import datetime, timedelta
-import codecs
 
 # command line arguments
 import argparse
@@ -17,6 +17,7 @@ parser.add_argument('-l', '--lastmonth', action='store_true')
 parser.add_argument('-y', '--days', type=int, default=90)
 parser.add_argument('-n', '--drplanname', type=str, default=None)
 parser.add_argument('-p', '--datapoolname', type=str, default=None)
+parser.add_argument('-gz', '--gzip', action='store_true')
 
 args = parser.parse_args()
 
@@ -28,6 +29,7 @@ lastmonth = args.lastmonth
 days = args.days
 drPlanName = args.drplanname
 dataPoolName = args.datapoolname
+gzipoutput = args.gzip
 
 filePrefix = "SiteContinuityStatusReport"
 title = "SiteContinuity Status Report"
@@ -70,14 +72,11 @@ end = usecsToDate(uEnd, '%Y-%m-%d')
 csvHeadings = ','.join(headings)
 htmlHeadings = ''.join(['<th>%s</th>' % h for h in headings])
 
-# CSV output
+# output files
 csvFileName = "%s_%s_%s.csv" % (filePrefix, start, end)
-csv = codecs.open(csvFileName, 'w', 'utf-8')
-csv.write('%s\n' % csvHeadings)
-
-# HTML output
 htmlFileName = "%s_%s_%s.html" % (filePrefix, start, end)
-htmlFile = codecs.open(htmlFileName, 'w', 'utf-8')
+report = ReportWriter(htmlFileName=htmlFileName, csvFileName=csvFileName, compress=gzipoutput, quote=True)
+report.writeCsv('%s\n' % csvHeadings)
 
 html = '''<html>
 <head>
@@ -234,7 +233,8 @@ html += '''</span>
 <table>
 <tr style="background-color: #F1F1F1;">'''
 html += htmlHeadings
-html += '</tr>'
+html += '</tr>\n'
+report.write(html)
 
 activities = api('get', 'site-continuity/activities?fromTimeUsecs=%s&toTimeUsecs=%s' % (uStart, uEnd), mcmv2=True)
 drPlans = api('get', 'site-continuity/dr-plans', mcmv2=True)
@@ -244,6 +244,8 @@ if drPlanName is not None:
 else:
     drPlans = drPlans['drPlans']
 
+planCellClasses = ['nowrap', 'nowrap', 'nowrap', 'nowrap', 'nowrap', 'nowrap', 'nowrap', 'wide']
+
 for drPlan in sorted(drPlans, key=lambda p: p['name'].lower()):
     planNameReported = False
     planName = drPlan['name']
@@ -267,37 +269,10 @@ for drPlan in sorted(drPlans, key=lambda p: p['name'].lower()):
                     planNameReported = True
                 else:
                     planName = ''
-                csv.write('"%s","%s","%s","%s","%s","%s","%s","%s"\n' % (planName, ('; '.join(dataPoolNames)), startTime, durationMinutes, activityType, status, planStatus, message))
-                html += '''<tr>
-                           <td class="nowrap">%s</td>
-                           <td class="nowrap">%s</td>
-                           <td class="nowrap">%s</td>
-                           <td class="nowrap">%s</td>
-                           <td class="nowrap">%s</td>
-                           <td class="nowrap">%s</td>
-                           <td class="nowrap">%s</td>
-                           <td class="wide">%s</td>
-                           </tr>''' % (planName, ('; '.join(dataPoolNames)), startTime, durationMinutes, activityType, status, planStatus, message)
+                report.row([planName, ('; '.join(dataPoolNames)), startTime, durationMinutes, activityType, status, planStatus, message], cellClass=planCellClasses)
     else:
-        csv.write('"%s","%s","%s","%s","%s","%s","%s","%s"\n' % (planName, '', '', '', '', '', planStatus, ''))
-        html += '''<tr>
-                   <td class="nowrap">%s</td>
-                   <td class="nowrap">%s</td>
-                   <td class="nowrap">%s</td>
-                   <td class="nowrap">%s</td>
-                   <td class="nowrap">%s</td>
-                   <td class="nowrap">%s</td>
-                   <td class="nowrap">%s</td>
-                   <td class="wide">%s</td>
-                   </tr>''' % (planName, '-', '-', '-', '-', '-', planStatus, '')
-
-html += '''</table>
-</div>
-</body>
-</html>'''
-
-htmlFile.write(html)
-htmlFile.close()
-csv.close()
-
-print('\nOutput saved to %s\nAlso saved to %s\n' % (htmlFileName, csvFileName))
+        report.row([planName, '-', '-', '-', '-', '-', planStatus, ''], csvValues=[planName, '', '', '', '', '', planStatus, ''], cellClass=planCellClasses)
+
+report.close()
+
+print('\nOutput saved to %s\nAlso saved to %s\n' % (report.htmlFileName, report.csvFileName))